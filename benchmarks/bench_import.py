@@ -0,0 +1,93 @@
+"""Benchmark the import time of the server and CLI entry points.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_import
+
+Each entry point is imported in fresh interpreters with ``-X importtime``, the best
+cumulative time is checked against its budget and the heavy dependencies, which must
+only be loaded on use, are checked not to be imported.
+"""
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+import click
+
+ROOT = Path(__file__).parent.parent
+
+# budgets in milliseconds, about twice the import time of a developer laptop
+BUDGETS = {
+    'normalizer.core': 400,
+    'generator.core': 250,
+    'server.app': 750,
+    'executor_manager.main': 500,
+}
+
+# dependencies whose import alone costs more than the entry points
+DEFERRED_MODULES = ['jina', 'docarray', 'pipreqs', 'pypi_simple']
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)$')
+
+
+def measure(module: str) -> Tuple[float, List[str]]:
+    """Import a module in a fresh interpreter.
+
+    :param module: the module to import
+    :return: the cumulative import time in milliseconds, and the deferred modules loaded
+    """
+    code = (
+        f'import sys, json, {module}; '
+        f'print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))'
+    )
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative = 0
+    for line in process.stderr.splitlines():
+        matched = IMPORTTIME_RE.match(line)
+        if matched and matched.group(2) == module:
+            cumulative = int(matched.group(1))
+    return cumulative / 1000, json.loads(process.stdout.splitlines()[-1])
+
+
+@click.command()
+@click.option('--repeat', type=int, default=5, show_default=True)
+@click.option(
+    '--scale',
+    type=float,
+    default=1.0,
+    show_default=True,
+    help='Factor applied to the budgets, e.g. for slow CI machines.',
+)
+def main(repeat, scale):
+    """Check the import time of the entry points against their budget."""
+    failures = []
+    for module, budget in BUDGETS.items():
+        results = [measure(module) for _ in range(repeat)]
+        best = min(ms for ms, _ in results)
+        loaded = results[0][1]
+        budget *= scale
+
+        status = 'ok'
+        if best > budget:
+            status = 'OVER BUDGET'
+            failures.append(module)
+        if loaded:
+            status = f'loads {", ".join(loaded)}'
+            failures.append(module)
+        click.echo(f'{module:<24} {best:>8.1f}ms / {budget:>6.0f}ms  {status}')
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,410 @@
+"""Benchmark normalize over synthetic executor bundles.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_normalize --save      # store the baseline
+    python -m benchmarks.bench_normalize --compare   # compare against the baseline
+
+The bundles are generated in a temporary folder and the Jina version lookup is
+answered from a local file, so that the benchmark runs offline.
+"""
+import builtins
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import click
+from loguru import logger
+
+from normalizer.core import normalize
+from normalizer.stats import RunStats
+from normalizer.versions import JinaVersionResolver, set_resolver
+
+DEFAULT_BASELINE = Path(__file__).parent / 'baseline.json'
+
+SCENARIOS = {
+    'small': dict(modules=5, depth=2, classes=5, endpoints=5, dockerfile_lines=10),
+    'many_modules': dict(
+        modules=300, depth=5, classes=10, endpoints=5, dockerfile_lines=10
+    ),
+    'deep_imports': dict(
+        modules=100, depth=100, classes=10, endpoints=5, dockerfile_lines=10
+    ),
+    'many_classes': dict(
+        modules=20, depth=2, classes=1000, endpoints=100, dockerfile_lines=10
+    ),
+    'long_dockerfile': dict(
+        modules=5, depth=2, classes=5, endpoints=5, dockerfile_lines=5000
+    ),
+}
+
+# the file system functions counted, looked up at call time by os.path and pathlib
+FS_FUNCTIONS = [
+    (os, 'stat'),
+    (os, 'lstat'),
+    (os, 'scandir'),
+    (os, 'listdir'),
+    (io, 'open'),
+    (builtins, 'open'),
+]
+
+
+def make_bundle(
+    root: Path,
+    modules: int = 5,
+    depth: int = 2,
+    classes: int = 5,
+    endpoints: int = 5,
+    dockerfile_lines: int = 10,
+) -> Path:
+    """Generate an executor bundle.
+
+    The modules are spread over ``depth`` levels, each module importing a module of
+    the previous level, and the executor module imports the modules of the last level.
+
+    :param root: the folder of the bundle, created if missing
+    :param modules: number of python modules besides the executor module
+    :param depth: depth of the import graph
+    :param classes: number of classes defined besides the executor
+    :param endpoints: number of endpoints of the executor
+    :param dockerfile_lines: number of ``RUN`` lines of the Dockerfile
+    :return: the folder of the bundle
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    depth = max(1, min(depth, modules))
+
+    levels: Dict[int, List[str]] = defaultdict(list)
+    for i in range(modules):
+        levels[i * depth // modules].append(f'module_{i}')
+
+    module_classes: Dict[str, List[str]] = defaultdict(list)
+    names = [name for level in sorted(levels) for name in levels[level]]
+    for i in range(classes):
+        module_classes[names[i % len(names)] if names else 'executor'].append(
+            f'Helper{i}'
+        )
+
+    def _classes_source(name: str) -> str:
+        return ''.join(
+            f'\n\nclass {c}:\n'
+            f'    """Helper class {c}."""\n\n'
+            f'    def __init__(self, value: int = 0):\n'
+            f'        self.value = value\n\n'
+            f'    def run(self, docs, factor: float = 1.0):\n'
+            f'        return [d for d in docs if self.value * factor]\n'
+            for c in module_classes[name]
+        )
+
+    for level in sorted(levels):
+        for i, name in enumerate(levels[level]):
+            imports = ['import os']
+            if level > 0:
+                parents = levels[level - 1]
+                imports.append(f'import {parents[i % len(parents)]}')
+            (root / f'{name}.py').write_text(
+                '\n'.join(imports) + '\n' + _classes_source(name)
+            )
+
+    last_level = levels[max(levels)] if levels else []
+    executor_source = (
+        'from typing import Dict, Optional\n\n'
+        'from jina import DocumentArray, Executor, requests\n'
+        + ''.join(f'import {name}\n' for name in last_level)
+        + _classes_source('executor')
+        + '\n\nclass BenchExecutor(Executor):\n'
+        '    """Executor of the benchmark."""\n\n'
+        '    def __init__(self, width: int = 8, name: Optional[str] = None, **kwargs):\n'
+        '        """Create the executor."""\n'
+        '        super().__init__(**kwargs)\n'
+        + ''.join(
+            f'\n    @requests(on=\'/endpoint_{i}\')\n'
+            f'    def endpoint_{i}(self, docs: DocumentArray, parameters: Dict = {{}}, **kwargs):\n'
+            f'        """Endpoint {i}."""\n'
+            f'        return docs\n'
+            for i in range(endpoints)
+        )
+    )
+    (root / 'executor.py').write_text(executor_source)
+
+    (root / 'requirements.txt').write_text('numpy\nPillow>=9.0\ntorch==1.12.0\n')
+
+    dockerfile = ['FROM jinaai/jina:3-py38-perf\n', '\n']
+    for i in range(dockerfile_lines):
+        if i % 2:
+            dockerfile.append(f'# step {i}\n')
+        dockerfile.append(f'RUN echo step {i} \\\n    && true\n')
+    dockerfile += [
+        'COPY . /workspace\n',
+        'WORKDIR /workspace\n',
+        '\n',
+        'ENTRYPOINT ["jina", "executor", "--uses", "config.yml"]\n',
+    ]
+    (root / 'Dockerfile').write_text(''.join(dockerfile))
+
+    return root
+
+
+class ProfiledRunStats(RunStats):
+    """Run stats additionally recording the peak memory and file system calls of stages."""
+
+    def __init__(self):
+        super().__init__()
+        self.peak_memory: Dict[str, int] = {}
+        self.fs_calls: Dict[str, int] = defaultdict(int)
+        self.current: Optional[str] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        previous = self.current
+        self.current = name
+        tracemalloc.reset_peak()
+        start_memory, _ = tracemalloc.get_traced_memory()
+        try:
+            with super().stage(name):
+                yield
+        finally:
+            _, peak = tracemalloc.get_traced_memory()
+            self.peak_memory[name] = max(
+                self.peak_memory.get(name, 0), peak - start_memory
+            )
+            self.current = previous
+
+
+@contextmanager
+def count_fs_calls(stats: ProfiledRunStats) -> Iterator[None]:
+    """Count the file system calls, attributing them to the current stage of ``stats``."""
+    originals = [(module, name, getattr(module, name)) for module, name in FS_FUNCTIONS]
+
+    def _counted(fn):
+        def _wrapper(*args, **kwargs):
+            stats.fs_calls[stats.current or 'other'] += 1
+            return fn(*args, **kwargs)
+
+        return _wrapper
+
+    for module, name, fn in originals:
+        setattr(module, name, _counted(fn))
+    try:
+        yield
+    finally:
+        for module, name, fn in originals:
+            setattr(module, name, fn)
+
+
+def _normalize(bundle: Path, stats: RunStats):
+    normalize(
+        bundle, meta={'jina': '3', 'docarray': '0.21.0'}, dry_run=True, stats=stats
+    )
+
+
+def run_scenario(bundle: Path, repeat: int) -> Dict:
+    """Normalize a bundle and summarize the measures per stage.
+
+    The wall time is the median of ``repeat`` plain runs, the peak memory and the file
+    system calls are recorded by one more run under tracing.
+
+    :param bundle: the folder of the bundle
+    :param repeat: number of timed runs
+    :return: wall time in seconds, peak memory in bytes and file system calls per stage
+    """
+    runs = []
+    for _ in range(repeat):
+        stats = RunStats()
+        start = time.perf_counter()
+        _normalize(bundle, stats)
+        runs.append((stats.timings, time.perf_counter() - start))
+
+    profiled = ProfiledRunStats()
+    tracemalloc.start()
+    try:
+        with count_fs_calls(profiled):
+            _normalize(bundle, profiled)
+        _, total_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    stages = {}
+    for name in profiled.timings:
+        stages[name] = {
+            'wall': statistics.median(timings[name] for timings, _ in runs),
+            'peak_memory': profiled.peak_memory[name],
+            'fs_calls': profiled.fs_calls.get(name, 0),
+        }
+    stages['total'] = {
+        'wall': statistics.median(wall for _, wall in runs),
+        'peak_memory': total_peak,
+        'fs_calls': sum(profiled.fs_calls.values()),
+    }
+    return stages
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).parent,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """List the stages whose wall time regressed by more than ``threshold``.
+
+    Differences under a millisecond are ignored as noise.
+    """
+    regressions = []
+    for scenario, stages in results['scenarios'].items():
+        base_stages = baseline['scenarios'].get(scenario, {}).get('stages', {})
+        for stage, measures in stages['stages'].items():
+            base = base_stages.get(stage)
+            if base is None:
+                continue
+            wall, base_wall = measures['wall'], base['wall']
+            if wall > base_wall * (1 + threshold) and wall - base_wall > 1e-3:
+                regressions.append(
+                    f'{scenario}/{stage}: {base_wall * 1000:.1f}ms -> {wall * 1000:.1f}ms'
+                )
+    return regressions
+
+
+def _print_results(results: Dict, baseline: Optional[Dict]):
+    for scenario, data in results['scenarios'].items():
+        click.echo(f'{scenario} {data["params"]}')
+        base_stages = (
+            (baseline or {}).get('scenarios', {}).get(scenario, {}).get('stages', {})
+        )
+        for stage, m in data['stages'].items():
+            line = (
+                f'  {stage:<24} {m["wall"] * 1000:>10.2f}ms '
+                f'{m["peak_memory"] / 1024:>10.1f}KiB {m["fs_calls"]:>8} fs calls'
+            )
+            base = base_stages.get(stage)
+            if base and base['wall']:
+                line += f'  x{m["wall"] / base["wall"]:.2f} vs baseline'
+            click.echo(line)
+
+
+@click.command()
+@click.option(
+    '--scenario',
+    'scenarios',
+    multiple=True,
+    type=click.Choice(sorted(SCENARIOS)),
+    help='Scenario to run, all of them by default.',
+)
+@click.option(
+    '--modules', type=int, help='Run a custom scenario with this many modules.'
+)
+@click.option('--depth', type=int, default=2, show_default=True)
+@click.option('--classes', type=int, default=5, show_default=True)
+@click.option('--endpoints', type=int, default=5, show_default=True)
+@click.option('--dockerfile-lines', type=int, default=10, show_default=True)
+@click.option(
+    '--repeat', type=int, default=5, show_default=True, help='Number of timed runs.'
+)
+@click.option(
+    '--baseline',
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=DEFAULT_BASELINE,
+    show_default=True,
+)
+@click.option('--verbose', is_flag=True, help='Keep the normalize logs.')
+@click.option('--save', is_flag=True, help='Store the results as the baseline.')
+@click.option('--compare', 'compare_', is_flag=True, help='Fail on regressions.')
+@click.option(
+    '--threshold',
+    type=float,
+    default=0.2,
+    show_default=True,
+    help='Relative wall time increase considered a regression.',
+)
+def main(
+    scenarios,
+    modules,
+    depth,
+    classes,
+    endpoints,
+    dockerfile_lines,
+    repeat,
+    baseline,
+    verbose,
+    save,
+    compare_,
+    threshold,
+):
+    """Benchmark normalize over synthetic executor bundles."""
+    if not verbose:
+        logger.remove()
+
+    if modules is not None:
+        selected = {
+            'custom': dict(
+                modules=modules,
+                depth=depth,
+                classes=classes,
+                endpoints=endpoints,
+                dockerfile_lines=dockerfile_lines,
+            )
+        }
+    else:
+        selected = {name: SCENARIOS[name] for name in scenarios or SCENARIOS}
+
+    results = {
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'scenarios': {},
+    }
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        index_path = tmp_path / 'jina.json'
+        index_path.write_text(json.dumps({'info': {'version': '3.10.0'}}))
+        resolver = JinaVersionResolver(index_url=index_path.as_uri())
+        resolver.refresh()
+        set_resolver(resolver)
+
+        for name, params in selected.items():
+            bundle = make_bundle(tmp_path / name, **params)
+            results['scenarios'][name] = {
+                'params': params,
+                'stages': run_scenario(bundle, repeat),
+            }
+
+    previous = json.loads(baseline.read_text()) if baseline.exists() else None
+    _print_results(results, previous)
+
+    if save:
+        baseline.write_text(json.dumps(results, indent=2) + '\n')
+        click.echo(f'baseline saved to {baseline}')
+
+    if compare_:
+        if previous is None:
+            # the timings are specific to a machine, the baseline is not committed
+            click.echo(
+                f'Warning: no baseline found at {baseline}, skip the comparison. '
+                'Store one with --save.',
+                err=True,
+            )
+            return
+        regressions = compare(results, previous, threshold)
+        for regression in regressions:
+            click.echo(f'REGRESSION {regression}', err=True)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
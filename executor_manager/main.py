@@ -1,10 +1,21 @@
 import pathlib
+from importlib.metadata import PackageNotFoundError, version
+
 import click
+from pydantic import ValidationError
 
-from jina import __version__ as __jina_version__
 from server import __version__
 from normalizer.core import normalize as normalizer_normalize
-from generator.core import generate as generate_yaml
+from normalizer.models import PackagePayload
+from server.tasks import list_packages, normalize_batch
+from generator.core import generate as generate_yaml, render_batch
+from generator.models import BatchPackagePayload as BatchGeneratorPayload
+
+try:
+    __jina_version__ = version('jina')
+except PackageNotFoundError:
+    __jina_version__ = 'unknown'
+
 
 @click.group()
 @click.version_option(
@@ -14,28 +25,136 @@ from generator.core import generate as generate_yaml
 def cli():
     pass
 
+
 @cli.command()
-@click.argument('path', default='.')
+@click.argument('paths', nargs=-1)
 @click.option('--jina-version', default='2', help='Specify the jina version.')
+@click.option('--batch', is_flag=True, help='Normalize several executors in parallel.')
+@click.option(
+    '--workers', type=int, default=None, help='Number of processes in batch mode.'
+)
 @click.option('--verbose', '-v', is_flag=True, help='Enables verbose mode.')
-def normalize(path, jina_version, verbose):
-    normalizer_normalize(pathlib.Path(path), meta={'jina': jina_version}, verbose=verbose)
+def normalize(paths, jina_version, batch, workers, verbose):
+    """
+    Normalize the executor located at PATH.
+
+    With --batch, normalize each given PATH in parallel, or every sub-folder of PATH
+    when a single one is given, and print one JSON result per line as they finish.
+    """
+    if not batch:
+        if len(paths) > 1:
+            raise click.UsageError('Only one PATH is accepted without --batch.')
+        path = paths[0] if paths else '.'
+        normalizer_normalize(
+            pathlib.Path(path), meta={'jina': jina_version}, verbose=verbose
+        )
+        return
+
+    if not paths:
+        raise click.UsageError('At least one PATH is required with --batch.')
+    if len(paths) == 1:
+        package_paths = list_packages([], pathlib.Path(paths[0]))
+    else:
+        package_paths = [pathlib.Path(p) for p in paths]
+
+    payloads = [
+        PackagePayload(package_path=p, meta={'jina': jina_version})
+        for p in package_paths
+    ]
+    for result in normalize_batch(payloads, max_workers=workers):
+        click.echo(result.json())
+
+
+def _parse_needs(needs):
+    parsed = {}
+    for value in needs:
+        name, sep, names = value.partition('=')
+        if not sep or not name or not names:
+            raise click.BadParameter(
+                f'{value!r} is not NAME=NEED[,NEED...]', param_hint='--needs'
+            )
+        parsed[name] = names.split(',')
+    return parsed
+
 
 @cli.command()
-@click.argument('executor')
-@click.option('--type', type=click.Choice(['k8s', 'docker_compose', 'jcloud']), default='k8s', help='Specify the deployment type.')
-@click.option('--protocol', type=click.Choice(['http', 'grpc', 'websocket']), default='http', help='Specify the protocol.')
-def generate(executor, type, protocol):
+@click.argument('executors', nargs=-1, required=True)
+@click.option(
+    '--type',
+    'types',
+    type=click.Choice(['k8s', 'docker_compose', 'jcloud']),
+    default=['k8s'],
+    multiple=True,
+    help='Specify the deployment type, repeated with --batch.',
+)
+@click.option(
+    '--protocol',
+    type=click.Choice(['http', 'grpc', 'websocket']),
+    default='http',
+    help='Specify the protocol.',
+)
+@click.option(
+    '--batch',
+    is_flag=True,
+    help='Generate the deployment of a Flow of several executors.',
+)
+@click.option(
+    '--needs',
+    multiple=True,
+    help='NAME=NEED[,NEED...], the deployments NAME receives data from in batch mode.',
+)
+@click.option(
+    '--output',
+    '-o',
+    default='deployments.zip',
+    show_default=True,
+    help='The archive written in batch mode.',
+)
+def generate(executors, types, protocol, batch, needs, output):
     """
     Generate corresponding deployment files for EXECUTOR.
 
     EXECUTOR format should be in the form of:
     <executor_name>[/<executor_tag>]
     For example: `Hello/latest` or just `Hello`
+
+    With --batch, generate the files of every given --type for a Flow chaining the
+    given EXECUTORS, each optionally named as <name>=<executor_name>[/<executor_tag>]
+    to be referred to by --needs, in a single archive.
     """
+    if not batch:
+        if len(executors) > 1 or len(types) > 1:
+            raise click.UsageError(
+                'Only one EXECUTOR and --type are accepted without --batch.'
+            )
+        return generate_yaml(executors[0], types[0], protocol)
+
+    needs = _parse_needs(needs)
+    specs = []
+    for value in executors:
+        name, sep, executor = value.rpartition('=')
+        specs.append(
+            {'executor': executor, 'name': name or None, 'needs': needs.pop(name, None)}
+        )
+    if needs:
+        raise click.BadParameter(
+            f'no EXECUTOR is named {sorted(needs)}', param_hint='--needs'
+        )
+
+    try:
+        payload = BatchGeneratorPayload(
+            executors=specs, types=list(types), protocol=protocol
+        )
+    except ValidationError as ex:
+        raise click.UsageError(str(ex))
 
-    return generate_yaml(executor, type, protocol)
+    pathlib.Path(output).write_bytes(
+        render_batch(
+            [spec.dict() for spec in payload.executors], payload.types, payload.protocol
+        )
+    )
+    click.echo(output)
 
 
 if __name__ == "__main__":
-    cli()
\ No newline at end of file
+    cli()
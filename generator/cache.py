@@ -0,0 +1,149 @@
+"""Cache the generated deployment files keyed by executor, deployment type and protocol."""
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+LATEST_TAG = 'latest'
+
+
+class Artifact(NamedTuple):
+    content: bytes
+    file_type: str
+    etag: str
+
+
+def artifact_key(executor: str, type: str, protocol: str) -> Tuple[str, str, str]:
+    return executor.strip(), type, protocol
+
+
+def split_executor(executor: str) -> Tuple[str, Optional[str]]:
+    """Split an executor reference into its name and tag.
+
+    :param executor: the executor, in the form of ``<executor_name>[:<secret>][/<executor_tag>]``
+    :return: the name, without the secret, and the tag, None when omitted
+    """
+    name, _, tag = executor.strip().partition('/')
+    return name.partition(':')[0], tag or None
+
+
+def _is_latest(tag: Optional[str]) -> bool:
+    return tag is None or tag == LATEST_TAG
+
+
+class ArtifactCache:
+    """LRU cache of generated deployment files bounded in entry count and total size.
+
+    Executors are resolved against the Hub when their files are generated, so the
+    entries of an executor must be invalidated when one of its tags is republished.
+    """
+
+    def __init__(self, max_entries: int = 512, max_bytes: int = 64 * 1024 * 1024):
+        """Create a cache.
+
+        :param max_entries: maximum number of entries kept in memory
+        :param max_bytes: maximum total size in bytes of the entries kept in memory
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries: 'OrderedDict[Tuple[str, str, str], Artifact]' = OrderedDict()
+        self._size = 0
+        # bumped on each invalidation, so that files generated before are not stored
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the entries kept in memory."""
+        return self._size
+
+    @property
+    def epoch(self) -> int:
+        """Number of invalidations so far, to be passed to :meth:`put`."""
+        return self._epoch
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[Artifact]:
+        """Look up an entry, promoting it to most recently used.
+
+        :param key: the key built by :func:`artifact_key`
+        :return: the cached entry, or None on a miss
+        """
+        with self._lock:
+            artifact = self._entries.get(key)
+            if artifact is not None:
+                self._entries.move_to_end(key)
+        return artifact
+
+    def put(
+        self,
+        key: Tuple[str, str, str],
+        content: bytes,
+        file_type: str,
+        epoch: Optional[int] = None,
+    ) -> Artifact:
+        """Store generated files, evicting the least recently used ones when over budget.
+
+        :param key: the key built by :func:`artifact_key`
+        :param content: the generated files
+        :param file_type: the file type of the content
+        :param epoch: the :attr:`epoch` read before generating the files, they are not
+            stored when the cache was invalidated meanwhile
+        :return: the entry, with the ETag of the content
+        """
+        artifact = Artifact(
+            content, file_type, f'"{hashlib.sha256(content).hexdigest()}"'
+        )
+        if len(content) > self.max_bytes:
+            return artifact
+
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return artifact
+
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous.content)
+            self._entries[key] = artifact
+            self._size += len(content)
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.content)
+
+        return artifact
+
+    def invalidate(self, executor: str) -> int:
+        """Drop the entries of an executor, for all deployment types and protocols.
+
+        Without a tag all the entries of the executor are dropped. With a tag, the
+        entries of that tag are dropped along with the ones of the latest tag, which
+        is moved by a new release.
+
+        :param executor: the executor, in the form of ``<executor_name>[/<executor_tag>]``
+        :return: the number of entries dropped
+        """
+        name, tag = split_executor(executor)
+
+        def _matches(key):
+            entry_name, entry_tag = split_executor(key[0])
+            if entry_name != name:
+                return False
+            return tag is None or entry_tag == tag or _is_latest(entry_tag)
+
+        with self._lock:
+            self._epoch += 1
+            keys = [key for key in self._entries if _matches(key)]
+            for key in keys:
+                self._size -= len(self._entries.pop(key).content)
+        return len(keys)
+
+    def clear(self):
+        """Drop all the entries kept in memory."""
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._size = 0
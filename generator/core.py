@@ -1,35 +1,412 @@
-import tempfile
+import io
+import itertools
 import os
-import shutil
-from jina import Flow
+import re
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
 from loguru import logger
 
-def generate(executor: str, type: str, protocol: str):
-    f = Flow(
-        protocol=protocol,
-    ).add(
-        uses=f'jinahub+docker://{executor}',
-    )
+# the exporters of jina are redirected module-wide while they run
+_capture_lock = threading.Lock()
+_MISSING = object()
 
-    (fp, temp_file_path) = tempfile.mkstemp()
+# the Flow of a single executor only depends on it through its reference and its
+# docker image, its files are exported once for a sentinel executor and rendered by
+# substituting the sentinel
+TEMPLATE_TYPES = ('k8s', 'docker_compose', 'jcloud')
+TEMPLATE_PROTOCOLS = ('http', 'grpc', 'websocket')
+SENTINEL_NAME = 'GeneratorTemplateSentinel'
+SENTINEL_USES = f'jinahub+docker://{SENTINEL_NAME}'
+SENTINEL_IMAGE = 'generator-template-sentinel:latest'
+_SENTINEL_RE = re.compile(f'{re.escape(SENTINEL_USES)}|{re.escape(SENTINEL_IMAGE)}')
 
-    if type == 'k8s':
-        with tempfile.TemporaryDirectory() as tmpdirname:
-            f.to_k8s_yaml(tmpdirname)
-            shutil.make_archive(temp_file_path, 'zip', tmpdirname)
-            os.remove(temp_file_path)
+# the ports jina leaves unset are numbered from a fixed base instead of drawn at random
+PORT_BASE = 49153
+_ports_lock = threading.Lock()
 
-        return (f'{temp_file_path}.zip', 'zip')
+_templates: Dict[Tuple[str, str], Optional['_Template']] = {}
+# the time after which a template that failed to derive is derived again
+_template_failures: Dict[Tuple[str, str], float] = {}
+TEMPLATE_RETRY_INTERVAL = float(os.environ.get('GENERATOR_TEMPLATE_RETRY_INTERVAL', 60))
+# guards the derivation of the templates and the patches of ``get_image_name``
+_template_lock = threading.Lock()
 
-    if type == 'docker_compose':
-        f.to_docker_compose_yaml(temp_file_path)
 
-        return (temp_file_path, 'yaml')
+class _CapturedFile(io.StringIO):
+    def __init__(self, files: Dict[str, str], path: str):
+        super().__init__()
+        self._files = files
+        self._path = path
+
+    def close(self):
+        if not self.closed:
+            self._files[self._path] = self.getvalue()
+        super().close()
+
+
+class _OsProxy:
+    """``os`` module whose ``makedirs`` does nothing, the folders are implied by the paths."""
+
+    def __getattr__(self, name):
+        return getattr(os, name)
+
+    @staticmethod
+    def makedirs(*args, **kwargs):
+        pass
+
+
+@contextmanager
+def _capture_files(exporter: Callable) -> Iterator[Dict[str, str]]:
+    """Capture in memory the files written by a jina exporter, keyed by path.
+
+    The exporter writes with ``open`` and creates folders with ``os.makedirs``, both
+    looked up in the globals of its module, which are shadowed while it runs.
+    """
+    module_globals = exporter.__globals__
+    files: Dict[str, str] = {}
+
+    def _open(path, mode='r', *args, **kwargs):
+        if 'w' not in mode:
+            return open(path, mode, *args, **kwargs)
+        return _CapturedFile(files, os.fspath(path))
+
+    patches = {'open': _open}
+    if 'os' in module_globals:
+        patches['os'] = _OsProxy()
+
+    with _capture_lock:
+        originals = {name: module_globals.get(name, _MISSING) for name in patches}
+        module_globals.update(patches)
+        try:
+            yield files
+        finally:
+            for name, value in originals.items():
+                if value is _MISSING:
+                    del module_globals[name]
+                else:
+                    module_globals[name] = value
+
+
+@contextmanager
+def _sequential_ports() -> Iterator[None]:
+    """Number the ports jina picks for the Flows built and exported meanwhile in sequence.
+
+    jina draws a free port of the host for each port left unset, the files are deployed
+    elsewhere, so numbering them from :data:`PORT_BASE` makes the files of identical
+    requests identical in all the processes. ``random_port`` is imported by name in
+    several modules of jina, it is shadowed in all of them while the Flows are built.
+    """
+    from jina import helper
+
+    random_port = helper.random_port
+    ports = itertools.count(PORT_BASE)
+
+    def _next_port():
+        return next(ports)
+
+    with _ports_lock:
+        modules = [
+            module
+            for name, module in list(sys.modules.items())
+            if name.partition('.')[0] == 'jina'
+            and getattr(module, 'random_port', None) is random_port
+        ]
+        for module in modules:
+            module.random_port = _next_port
+        try:
+            yield
+        finally:
+            for module in modules:
+                module.random_port = random_port
+
+
+def _zip_files(files: Dict[str, str]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, content in sorted(files.items()):
+            archive.writestr(path, content)
+    return buffer.getvalue()
+
+
+def _k8s_files(f) -> Dict[str, str]:
+    from jina.orchestrate.deployments import Deployment
+
+    with _capture_files(Deployment._to_kubernetes_yaml) as files:
+        f.to_k8s_yaml('k8s')
+    if files:
+        return {
+            os.path.relpath(path, 'k8s'): content for path, content in files.items()
+        }
+
+    # the exporter does not write through the shadowed functions
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        f.to_k8s_yaml(tmpdirname)
+        files = {}
+        for root, _, names in os.walk(tmpdirname):
+            for name in names:
+                path = os.path.join(root, name)
+                with open(path, encoding='utf-8') as fp:
+                    files[os.path.relpath(path, tmpdirname)] = fp.read()
+    return files
+
+
+def _docker_compose_yaml(f) -> str:
+    from jina import Flow
+
+    with _capture_files(Flow.to_docker_compose_yaml) as files:
+        f.to_docker_compose_yaml('docker-compose.yml')
+    if files:
+        return files['docker-compose.yml']
+
+    with tempfile.TemporaryDirectory() as tmpdirname:
+        path = os.path.join(tmpdirname, 'docker-compose.yml')
+        f.to_docker_compose_yaml(path)
+        with open(path, encoding='utf-8') as fp:
+            return fp.read()
+
+
+def _flow_files(f, type: str) -> Dict[str, str]:
+    """Export the deployment files of a Flow.
+
+    :return: the content of the files keyed by their relative path
+    """
+    from jina.jaml import JAML
+
+    if type == 'k8s':
+        return _k8s_files(f)
+
+    if type == 'docker_compose':
+        return {'docker-compose.yml': _docker_compose_yaml(f)}
 
     if type == 'jcloud':
-        f.save_config(temp_file_path)
+        return {'flow.yml': JAML.dump(f)}
+
+    raise ValueError(f'Unsupported deployment type: {type}')
+
+
+def _export_files(uses: str, type: str, protocol: str) -> Dict[str, str]:
+    from jina import Flow
+
+    with _sequential_ports():
+        f = Flow(protocol=protocol).add(uses=uses)
+        return _flow_files(f, type)
+
+
+def _pack_files(files: Dict[str, str], type: str) -> Tuple[bytes, str]:
+    if type == 'k8s':
+        return _zip_files(files), 'zip'
+    (content,) = files.values()
+    return content.encode(), 'yaml'
+
+
+class _Template(NamedTuple):
+    files: Dict[str, str]
+    # whether the files hold the docker image of the executor
+    needs_image: bool
+
+
+def _is_plain(value: str) -> bool:
+    """Whether a value is dumped to YAML as is, i.e. can replace a sentinel."""
+    import yaml
+
+    return yaml.safe_dump(value) == f'{value}\n...\n'
+
+
+def _resolve_image(uses: str) -> str:
+    from jina.orchestrate.deployments.config import helper
+
+    return helper.get_image_name(uses)
+
+
+@contextmanager
+def _memoized_image_names() -> Iterator[None]:
+    """Resolve the docker image of each executor once for all the deployment types."""
+    from jina.orchestrate.deployments.config import helper
+
+    get_image_name = helper.get_image_name
+    images: Dict[str, str] = {}
+
+    def _get_image_name(uses):
+        if uses not in images:
+            images[uses] = get_image_name(uses)
+        return images[uses]
+
+    with _template_lock:
+        helper.get_image_name = _get_image_name
+        try:
+            yield
+        finally:
+            helper.get_image_name = get_image_name
+
+
+def _derive_template(type: str, protocol: str) -> Optional[_Template]:
+    from jina.orchestrate.deployments.config import helper
+
+    get_image_name = helper.get_image_name
+
+    def _get_image_name(uses):
+        if uses == SENTINEL_USES:
+            return SENTINEL_IMAGE
+        return get_image_name(uses)
+
+    # the image of the gateway is still resolved, it does not depend on the executor
+    helper.get_image_name = _get_image_name
+    try:
+        files = _export_files(SENTINEL_USES, type, protocol)
+    finally:
+        helper.get_image_name = get_image_name
+
+    for content in files.values():
+        if SENTINEL_NAME in _SENTINEL_RE.sub('', content):
+            logger.warning(
+                f'The {type} deployment over {protocol} can not be templated'
+            )
+            return None
+
+    return _Template(
+        files=files,
+        needs_image=any(SENTINEL_IMAGE in content for content in files.values()),
+    )
+
+
+def _get_template(type: str, protocol: str) -> Optional[_Template]:
+    key = (type, protocol)
+    template = _templates.get(key, _MISSING)
+    if template is not _MISSING:
+        return template
+
+    if time.monotonic() < _template_failures.get(key, 0):
+        return None
+
+    with _template_lock:
+        if key in _templates:
+            return _templates[key]
+        if time.monotonic() < _template_failures.get(key, 0):
+            return None
+
+        try:
+            _templates[key] = _derive_template(type, protocol)
+        except Exception as ex:
+            # retried later, e.g. the image of the gateway may be resolved once online
+            logger.warning(
+                f'Failed to derive the {type} template over {protocol}: {ex!r}'
+            )
+            _template_failures[key] = time.monotonic() + TEMPLATE_RETRY_INTERVAL
+            return None
+        _template_failures.pop(key, None)
+        return _templates[key]
+
+
+def _render_template(
+    executor: str, type: str, protocol: str
+) -> Optional[Dict[str, str]]:
+    uses = f'jinahub+docker://{executor}'
+    if (
+        type not in TEMPLATE_TYPES
+        or protocol not in TEMPLATE_PROTOCOLS
+        or not _is_plain(uses)
+    ):
+        return None
+
+    template = _get_template(type, protocol)
+    if template is None:
+        return None
+
+    substitutions = {SENTINEL_USES: uses}
+    if template.needs_image:
+        image = _resolve_image(uses)
+        if not _is_plain(image):
+            return None
+        substitutions[SENTINEL_IMAGE] = image
+
+    def _substitute(matched):
+        return substitutions[matched.group(0)]
+
+    return {
+        path: _SENTINEL_RE.sub(_substitute, content)
+        for path, content in template.files.items()
+    }
+
+
+def derive_templates():
+    """Derive the templates of all the deployment types and protocols up front."""
+    derived = [
+        key
+        for key in itertools.product(TEMPLATE_TYPES, TEMPLATE_PROTOCOLS)
+        if _get_template(*key) is not None
+    ]
+    logger.info(f'Derived {len(derived)} deployment templates')
+
+
+def render(executor: str, type: str, protocol: str) -> Tuple[bytes, str]:
+    """Render the deployment files of an executor in memory.
+
+    The files are rendered from a template when there is one for the deployment type
+    and protocol, they are exported from a jina Flow otherwise.
+
+    :param executor: the executor, in the form of ``<executor_name>[/<executor_tag>]``
+    :param type: the deployment type, ``k8s``, ``docker_compose`` or ``jcloud``
+    :param protocol: the protocol of the gateway
+    :return: the content, a zip of the k8s folders or a yaml file, and its file type
+    """
+    files = _render_template(executor, type, protocol)
+    if files is None:
+        files = _export_files(f'jinahub+docker://{executor}', type, protocol)
+    return _pack_files(files, type)
+
+
+def render_batch(executors: List[Dict], types: List[str], protocol: str) -> bytes:
+    """Render the deployment files of a Flow of several executors in one archive.
+
+    The Flow is built once and exported for each deployment type, to the ``k8s``
+    folder, ``docker-compose.yml`` and ``flow.yml`` of the archive.
+
+    :param executors: the ``executor`` reference of each deployment, in the form of
+        ``<executor_name>[/<executor_tag>]``, with optionally its ``name`` and the
+        ``needs`` it receives data from
+    :param types: the deployment types, ``k8s``, ``docker_compose`` or ``jcloud``
+    :param protocol: the protocol of the gateway
+    :return: the content of the zip archive
+    """
+    from jina import Flow
+
+    files = {}
+    # the ports are numbered under the lock of the templates, as when they are derived
+    with _memoized_image_names(), _sequential_ports():
+        f = Flow(protocol=protocol)
+        for spec in executors:
+            kwargs = {'uses': f'jinahub+docker://{spec["executor"]}'}
+            if spec.get('name'):
+                kwargs['name'] = spec['name']
+            if spec.get('needs'):
+                kwargs['needs'] = spec['needs']
+            f = f.add(**kwargs)
+
+        for type in dict.fromkeys(types):
+            exported = _flow_files(f, type)
+            if type == 'k8s':
+                exported = {
+                    f'k8s/{path}': content for path, content in exported.items()
+                }
+            files.update(exported)
+    return _zip_files(files)
+
+
+def generate(executor: str, type: str, protocol: str):
+    content, file_type = render(executor, type, protocol)
+
+    (fp, temp_file_path) = tempfile.mkstemp(suffix=f'.{file_type}')
+    with os.fdopen(fp, 'wb') as f:
+        f.write(content)
+
+    return (temp_file_path, file_type)
 
-        return (temp_file_path, 'yaml')
 
 def clean(path: str):
     logger.info(f'Clean temp file: {path}')
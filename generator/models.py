@@ -1,6 +1,44 @@
-from pydantic import BaseModel
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, conlist, validator
+
+DeploymentType = Literal['k8s', 'docker_compose', 'jcloud']
+
 
 class PackagePayload(BaseModel):
     executor: str
     type: str = 'k8s'
     protocol: str = 'http'
+
+
+class InvalidatePayload(BaseModel):
+    executor: str
+
+
+class ExecutorSpec(BaseModel):
+    executor: str
+    # the name of the deployment, named after its position in the Flow if omitted
+    name: Optional[str] = None
+    # the deployments it receives data from, the previous one if omitted
+    needs: Optional[List[str]] = None
+
+
+class BatchPackagePayload(BaseModel):
+    executors: conlist(ExecutorSpec, min_items=1)
+    types: conlist(DeploymentType, min_items=1) = ['k8s']
+    protocol: str = 'http'
+
+    @validator('executors')
+    def check_needs(cls, executors):
+        names = {'gateway'}
+        for spec in executors:
+            unknown = set(spec.needs or []) - names
+            if unknown:
+                raise ValueError(
+                    f'{spec.executor} needs deployments not named before it: {sorted(unknown)}'
+                )
+            if spec.name in names:
+                raise ValueError(f'{spec.name} names several deployments')
+            if spec.name:
+                names.add(spec.name)
+        return executors
@@ -0,0 +1,117 @@
+"""Parse python modules once and share the results across the normalize steps."""
+import ast
+import io
+import pathlib
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
+
+from importlab.import_finder import ImportFinder
+from importlab.import_finder import resolve_import as resolve_system_import
+
+from .fs import BundleIndex
+
+ImportType = Tuple[str, Optional[str], bool, bool, Optional[str]]
+
+
+class ModuleAnalysis:
+    """Lazily computed views over a single parsed python module.
+
+    The file is read and parsed at most once, whatever the number of consumers.
+    """
+
+    def __init__(
+        self,
+        filepath: 'pathlib.Path',
+        source: Optional[str] = None,
+        index: Optional[BundleIndex] = None,
+    ):
+        """Create the analysis of a module.
+
+        :param filepath: path of the python module
+        :param source: source code of the module, read from ``filepath`` if omitted
+        :param index: the bundle the module is read from, the file system if omitted
+        """
+        self.filepath = filepath
+        self._index = index
+        if source is not None:
+            self.source = source
+
+    @cached_property
+    def source(self) -> str:
+        """Source code of the module."""
+        if self._index is not None:
+            return self._index.read_text(self.filepath)
+        with self.filepath.open() as fin:
+            return fin.read()
+
+    @property
+    def parsed(self) -> bool:
+        """Whether the syntax tree of the module is built already."""
+        return 'tree' in self.__dict__
+
+    @cached_property
+    def lines(self) -> List[str]:
+        """Source lines of the module, line endings included."""
+        return io.StringIO(self.source, newline=None).readlines()
+
+    @cached_property
+    def tree(self) -> ast.Module:
+        """Abstract syntax tree of the module."""
+        return ast.parse(self.source, filename=str(self.filepath))
+
+    @cached_property
+    def nodes(self) -> List[ast.AST]:
+        """All the nodes of the syntax tree, in :func:`ast.walk` order."""
+        return list(ast.walk(self.tree))
+
+    @cached_property
+    def class_defs(self) -> List[ast.ClassDef]:
+        """Class definitions of the module, nested ones included."""
+        return [o for o in self.nodes if isinstance(o, ast.ClassDef)]
+
+    @cached_property
+    def import_froms(self) -> List[ast.ImportFrom]:
+        """``from ... import ...`` statements of the module."""
+        return [o for o in self.nodes if isinstance(o, ast.ImportFrom)]
+
+    @cached_property
+    def imports(self) -> List[ImportType]:
+        """Imports of the module in the format of :func:`importlab.import_finder.get_imports`.
+
+        Each import is a tuple of ``(name, alias, is_from, is_star, source_file)``,
+        where ``source_file`` is None when the module is not installed in the system.
+        """
+        finder = ImportFinder()
+        finder.visit(self.tree)
+        return [i + (resolve_system_import(i[0], i[2], i[3]),) for i in finder.imports]
+
+
+class ModuleAnalyzer:
+    """Per-run cache of :class:`ModuleAnalysis`, keyed by module path."""
+
+    def __init__(self, index: Optional[BundleIndex] = None):
+        """Create the cache.
+
+        :param index: the bundle the modules are read from, the file system if omitted
+        """
+        self._index = index
+        self._analyses: Dict['pathlib.Path', ModuleAnalysis] = {}
+
+    def __contains__(self, filepath: 'pathlib.Path') -> bool:
+        return filepath in self._analyses
+
+    def __len__(self) -> int:
+        return len(self._analyses)
+
+    def get(self, filepath: 'pathlib.Path') -> ModuleAnalysis:
+        """Return the analysis of a module, creating it on first access.
+
+        :param filepath: path of the python module
+        :return: the shared analysis of the module
+        """
+        analysis = self._analyses.get(filepath)
+        if analysis is None:
+            analysis = self._analyses[filepath] = ModuleAnalysis(
+                filepath, index=self._index
+            )
+        return analysis
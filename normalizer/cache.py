@@ -0,0 +1,163 @@
+"""Cache normalize results keyed by the content of the executor bundle."""
+import hashlib
+import json
+import os
+import pathlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from loguru import logger
+
+from .fs import BundleIndex, DirectoryIndex
+
+BUNDLE_FILES = [
+    'config.yml',
+    'manifest.yml',
+    'requirements.txt',
+    'pyproject.toml',
+]
+
+# files whose existence, but not content, is reflected in the result
+BUNDLE_MARKERS = ['README.md', 'Dockerfile.gpu']
+
+
+def bundle_digest(
+    work_path: 'pathlib.Path',
+    dockerfile_path: 'pathlib.Path',
+    params: Dict,
+    index: Optional[BundleIndex] = None,
+) -> str:
+    """Compute the digest of the files and parameters a normalize result depends on.
+
+    The digest is computed on each normalize, before the cache is looked up: every
+    ``.py`` file of the bundle is read and hashed, the vendored ones included, so a hit
+    still costs a read of the sources, though none of them is parsed.
+
+    :param work_path: the executor folder
+    :param dockerfile_path: the Dockerfile of the executor, which may not exist
+    :param params: the normalize parameters that influence the result
+    :param index: the bundle the files are read from, the folder is indexed if omitted
+    :return: hex digest identifying the normalize result
+    """
+    if index is None:
+        index = DirectoryIndex(work_path)
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+
+    filepaths = [p for p in index.iter_files() if p.suffix == '.py'] + [
+        work_path / name for name in BUNDLE_FILES
+    ]
+    filepaths.append(dockerfile_path)
+    for filepath in filepaths:
+        if not index.is_file(filepath):
+            continue
+        digest.update(f'\0{filepath.relative_to(work_path)}\0'.encode())
+        digest.update(hashlib.sha256(index.read_bytes(filepath)).digest())
+
+    for name in BUNDLE_MARKERS:
+        digest.update(f'\0{name}:{index.exists(work_path / name)}'.encode())
+
+    return digest.hexdigest()
+
+
+class NormalizeCache:
+    """LRU cache of normalize results bounded in entry count and total size.
+
+    Each entry holds the serialized executor model and the content of the files
+    written by normalize. Entries can additionally be persisted to ``cache_dir``
+    so that they survive restarts and are shared between processes, e.g. the
+    workers of the server, whose entries in memory are private to each of them.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_bytes: int = 64 * 1024 * 1024,
+        cache_dir: Optional['pathlib.Path'] = None,
+    ):
+        """Create a cache.
+
+        :param max_entries: maximum number of entries kept in memory
+        :param max_bytes: maximum total size in bytes of the entries kept in memory
+        :param cache_dir: optional folder where entries are persisted
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        if cache_dir:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of the entries kept in memory."""
+        return self._size
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Look up an entry, promoting it to most recently used.
+
+        :param key: the bundle digest
+        :return: the cached entry, or None on a miss
+        """
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+
+        if data is None and self.cache_dir:
+            try:
+                data = (self.cache_dir / f'{key}.json').read_bytes()
+            except FileNotFoundError:
+                return None
+            self._insert(key, data)
+
+        return json.loads(data) if data is not None else None
+
+    def put(self, key: str, entry: Dict):
+        """Store an entry, evicting the least recently used ones when over budget.
+
+        :param key: the bundle digest
+        :param entry: JSON serializable entry
+        """
+        data = json.dumps(entry).encode()
+        self._insert(key, data)
+
+        if self.cache_dir:
+            entry_path = self.cache_dir / f'{key}.json'
+            tmp_path = self.cache_dir / f'{key}.{os.getpid()}.tmp'
+            try:
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, entry_path)
+            except OSError as ex:
+                logger.warning(
+                    f'=> failed to persist normalize cache entry {key}: {ex}'
+                )
+
+    def clear(self):
+        """Drop all the entries kept in memory."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _insert(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._entries[key] = data
+            self._size += len(data)
+
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
@@ -1,13 +1,16 @@
 import ast
+import multiprocessing
+import os
 import re
 import pathlib
 import yaml
-from typing import Dict, List, Tuple, Optional, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple, Optional, Sequence, Type
 
 from loguru import logger
-from jina.helper import colored
 
-from . import __resources_path__
+from .analysis import ImportType, ModuleAnalysis, ModuleAnalyzer
+from .cache import NormalizeCache, bundle_digest
 from .deps import (
     Package,
     get_dep_tools,
@@ -21,41 +24,64 @@ from .excepts import (
     ExecutorNotFoundError,
     IllegalExecutorError,
 )
+from .fs import BundleIndex, DirectoryIndex, open_bundle
 from .helper import (
-    get_config_template,
     get_dependencies_from_pyproject,
-    get_imports,
     resolve_import,
     convert_from_to_path,
     topological_sort,
     choose_jina_version,
     get_jina_image_tag,
+    render_template,
 )
-from .models import ExecutorModel
-
-ArgType = List[Tuple[str, Optional[str]]]
-KWArgType = List[Tuple[str, Optional[str], str]]
+from .models import (
+    ArgModel,
+    EndpointArgsModel,
+    ExecutorModel,
+    FuncArgsModel,
+    KWArgModel,
+)
+from .records import ArgRecord, ExecutorRecord, FuncRecord, KWArgRecord
+from .resources import get_resource
+from .stats import RunStats
 
-InitInspectionType = Tuple[ArgType, KWArgType, str]
-EndpointInspectionType = Tuple[str, ArgType, KWArgType, str, str]
+# processes inspecting the modules of large bundles, 0 for the CPU count in the main
+# process and 1 in worker processes, e.g. the normalize workers of the server
+INSPECT_WORKERS = int(os.environ.get('NORMALIZER_INSPECT_WORKERS', 0))
+# bundles with fewer modules to inspect stay in the calling process
+INSPECT_THRESHOLD = int(os.environ.get('NORMALIZER_INSPECT_THRESHOLD', 64))
 
 
-def order_py_modules(py_modules: List['pathlib.Path'], work_path: 'pathlib.Path'):
+def order_py_modules(
+    py_modules: List['pathlib.Path'],
+    work_path: 'pathlib.Path',
+    analyzer: Optional[ModuleAnalyzer] = None,
+    index: Optional[BundleIndex] = None,
+):
     """
     Order the py_modules in the right order to be imported
 
     :param py_modules: list of py_modules to be imported
     :param work_path: path to the working directory
+    :param analyzer: the per-run module analyses, created if not given
+    :param index: the index of the working directory, created if not given
 
     :return: ordered list of py_modules
+    :raises DependencyError: the py_modules have cyclic dependencies
     """
+    if index is None:
+        index = DirectoryIndex(work_path)
+    if analyzer is None:
+        analyzer = ModuleAnalyzer(index=index)
 
     dependencies = {x: [] for x in py_modules}
 
     for py_module in py_modules:
-        py_imports = [m[:-1] for m in get_imports(py_module) if m[-1] is None]
+        py_imports = [m[:-1] for m in analyzer.get(py_module).imports if m[-1] is None]
 
-        py_import_moduels = [resolve_import(*m, work_path) for m in py_imports]
+        py_import_moduels = [
+            resolve_import(*m, work_path, index=index) for m in py_imports
+        ]
         for imp_m in py_import_moduels:
             if imp_m is None:
                 continue
@@ -63,8 +89,13 @@ def order_py_modules(py_modules: List['pathlib.Path'], work_path: 'pathlib.Path'
                 dependencies[imp_m] = []
             dependencies[py_module].append(imp_m)
 
-    orders = list(topological_sort([(k, v) for k, v in dependencies.items()]))
-    return orders
+    # sort on the relative paths so that the broken dependencies are reported with them
+    names = {m: os.path.relpath(m, work_path) for m in dependencies}
+    modules = {name: m for m, name in names.items()}
+    orders = topological_sort(
+        [(names[k], [names[m] for m in v]) for k, v in dependencies.items()]
+    )
+    return [modules[name] for name in orders]
 
 
 def _get_element_source(
@@ -86,33 +117,48 @@ def _get_element_source(
 
 def _get_args_kwargs(
     func_args: List[str],
-    func_args_defaults: List[str],
+    func_args_defaults: List[Optional[str]],
     annotations: List[Optional[str]],
-) -> Tuple[ArgType, KWArgType]:
+) -> Tuple[List[ArgRecord], List[KWArgRecord]]:
     if len(func_args_defaults) == 0:
         kwargs_idx = len(func_args)
     else:
         kwargs_idx = -len(func_args_defaults)
-    kwarg_arguments, kwargs_annotations, kwargs_defaults = (
-        func_args[kwargs_idx:],
-        annotations[kwargs_idx:],
-        func_args_defaults,
-    )
 
     kwargs = [
-        (arg, annotation, default)
+        KWArgRecord(arg, annotation, default)
         for arg, annotation, default in zip(
-            kwarg_arguments, kwargs_annotations, kwargs_defaults
+            func_args[kwargs_idx:], annotations[kwargs_idx:], func_args_defaults
         )
     ]
-
-    arg_arguments, args_annotations = func_args[:kwargs_idx], annotations[:kwargs_idx]
     args = [
-        (arg, annotation) for arg, annotation in zip(arg_arguments, args_annotations)
+        ArgRecord(arg, annotation)
+        for arg, annotation in zip(func_args[:kwargs_idx], annotations[:kwargs_idx])
     ]
     return args, kwargs
 
 
+def _inspect_function(
+    element: ast.FunctionDef, lines: List[str], requests: Optional[str] = None
+) -> FuncRecord:
+    arguments = element.args.args + element.args.kwonlyargs
+    func_args = [argument.arg for argument in arguments]
+    annotations = [
+        _get_element_source(lines, argument.annotation, remove_whitespace=True)
+        if argument.annotation
+        else None
+        for argument in arguments
+    ]
+    func_args_defaults = [
+        _get_element_source(lines, default, remove_whitespace=False)
+        if default
+        else None
+        for default in element.args.defaults + element.args.kw_defaults
+    ]
+    args, kwargs = _get_args_kwargs(func_args, func_args_defaults, annotations)
+    return FuncRecord(element.name, args, kwargs, ast.get_docstring(element), requests)
+
+
 def _inspect_requests(element: ast.FunctionDef, lines: List[str]) -> Optional[str]:
     """
     Returns requests inspection details about a method
@@ -178,118 +224,188 @@ def _inspect_requests(element: ast.FunctionDef, lines: List[str]) -> Optional[st
             return 'ALL'
 
 
+CLASS_RE = re.compile(r'\bclass\b')
+EXECUTOR_RE = re.compile(r'\bExecutor\b')
+
+
+def _may_define_executor(source: str, class_name: Optional[str] = None) -> bool:
+    """Cheap check whether a module may define the executor, without parsing it.
+
+    The words ``class`` and ``Executor``, or the class name, must appear in the source
+    of a module defining the executor, comments and strings may only add false
+    positives. Non-ASCII sources are always parsed: their identifiers are normalized.
+    """
+    if not source.isascii():
+        return True
+    if not CLASS_RE.search(source):
+        return False
+    if class_name:
+        return re.search(rf'\b{re.escape(class_name)}\b', source) is not None
+    return EXECUTOR_RE.search(source) is not None
+
+
+def _inspect_module(
+    analysis: ModuleAnalysis, class_name: Optional[str] = None
+) -> List[ExecutorRecord]:
+    lines = analysis.lines
+
+    executors = []
+    for class_def in analysis.class_defs:
+        if class_name:
+            if class_name != class_def.name:
+                continue
+        else:
+            base_names = []
+            for base_class in class_def.bases:
+                # if the class looks like class MyExecutor(Executor)
+                if isinstance(base_class, ast.Name):
+                    base_names.append(base_class.id)
+                # if the class looks like class MyExecutor(jina.Executor):
+                if isinstance(base_class, ast.Attribute):
+                    base_names.append(base_class.attr)
+            if 'Executor' not in base_names:
+                continue
+
+        init = None
+        endpoints = []
+        for body_item in class_def.body:
+            if not isinstance(body_item, ast.FunctionDef):
+                continue
+
+            # check __init__ function arguments
+            if body_item.name == '__init__':
+                init = _inspect_function(body_item, lines)
+            else:
+                requests_decorator = _inspect_requests(body_item, lines)
+
+                # add only methods that are decorated with requests
+                if requests_decorator:
+                    if re.match('\'.*\'', requests_decorator, flags=re.DOTALL):
+                        requests_decorator = f'[{requests_decorator}]'
+                    endpoints.append(
+                        _inspect_function(body_item, lines, requests_decorator)
+                    )
+        executors.append(
+            ExecutorRecord(
+                class_def.name,
+                analysis.filepath,
+                ast.get_docstring(class_def),
+                init,
+                endpoints,
+            )
+        )
+    return executors
+
+
+def _inspect_source(
+    filepath: 'pathlib.Path', source: str, class_name: Optional[str]
+) -> Tuple[List[ExecutorRecord], List[ImportType]]:
+    # runs in the inspect pool, the imports are resolved too to spare a parse later on
+    analysis = ModuleAnalysis(filepath, source=source)
+    return _inspect_module(analysis, class_name), analysis.imports
+
+
+def _default_inspect_workers() -> int:
+    # the worker processes already run one per CPU, a nested pool would oversubscribe them
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return os.cpu_count() or 1
+
+
+_inspect_pools: Dict[int, ProcessPoolExecutor] = {}
+
+
+def _get_inspect_pool(max_workers: int) -> ProcessPoolExecutor:
+    # created on first use and shared by the runs of the process
+    pool = _inspect_pools.get(max_workers)
+    if pool is None:
+        pool = _inspect_pools[max_workers] = ProcessPoolExecutor(
+            max_workers=max_workers
+        )
+    return pool
+
+
 def inspect_executors(
     py_modules: Sequence['pathlib.Path'],
     class_name: Optional[str] = None,
-) -> List[Tuple[str, str, Optional[str], Tuple, List[Tuple]]]:
+    analyzer: Optional[ModuleAnalyzer] = None,
+    max_workers: Optional[int] = None,
+    threshold: Optional[int] = None,
+    stats: Optional[RunStats] = None,
+) -> List[ExecutorRecord]:
     """
     Inspect the executors in the given modules
+
+    The modules whose source can not define the executor are skipped without being
+    parsed. The others not parsed yet are inspected in a process pool when there are
+    at least ``threshold`` of them, the results are merged in the order of ``py_modules``.
+
     :param py_modules: list of py_modules to be inspected
     :param class_name: name of the class to be inspected
-
-    :return: list of tuples (module_name, class_name, class_docstring, class_args, class_kwargs)
+    :param analyzer: the per-run module analyses, created if not given
+    :param max_workers: number of inspect processes, ``INSPECT_WORKERS`` if not given,
+        or if 0 the CPU count, 1 in a worker process. With 1, the modules are inspected
+        in the calling process
+    :param threshold: minimum number of modules to inspect in parallel,
+        ``INSPECT_THRESHOLD`` if not given
+    :param stats: counts the ``modules_inspected`` and ``modules_skipped``
+
+    :return: the executors found, in the order of ``py_modules``
     """
+    if analyzer is None:
+        analyzer = ModuleAnalyzer()
+    if max_workers is None:
+        max_workers = INSPECT_WORKERS
+    max_workers = max_workers or _default_inspect_workers()
+    if threshold is None:
+        threshold = INSPECT_THRESHOLD
+
+    if stats is None:
+        stats = RunStats()
+
+    analyses = [analyzer.get(filepath) for filepath in py_modules]
+    results: List[Optional[List[ExecutorRecord]]] = [None] * len(analyses)
+    inspected = [False] * len(analyses)
+
+    candidates = [_may_define_executor(a.source, class_name) for a in analyses]
+    pending = [
+        i
+        for i, analysis in enumerate(analyses)
+        if candidates[i] and not analysis.parsed
+    ]
+    if max_workers > 1 and len(pending) >= max(threshold, 2):
+        pool = _get_inspect_pool(max_workers)
+        chunksize = max(1, len(pending) // (max_workers * 4))
+        outputs = pool.map(
+            _inspect_source,
+            [analyses[i].filepath for i in pending],
+            [analyses[i].source for i in pending],
+            [class_name] * len(pending),
+            chunksize=chunksize,
+        )
+        for i, (executors, imports) in zip(pending, outputs):
+            results[i] = executors
+            inspected[i] = True
+            analyses[i].imports = imports
 
-    def _inspect_class_defs(tree):
-        return [o for o in ast.walk(tree) if isinstance(o, ast.ClassDef)]
+    for i, analysis in enumerate(analyses):
+        if not inspected[i] and candidates[i]:
+            results[i] = _inspect_module(analysis, class_name)
 
-    executors = []
-    for filepath in py_modules:
-        with filepath.open() as fin:
-            tree = ast.parse(fin.read(), filename=str(filepath))
-            fin.seek(0)
-            lines = fin.readlines()
-
-            for class_def in _inspect_class_defs(tree):
-                if class_name:
-                    if class_name != class_def.name:
-                        continue
-                else:
-                    base_names = []
-                    for base_class in class_def.bases:
-                        # if the class looks like class MyExecutor(Executor)
-                        if isinstance(base_class, ast.Name):
-                            base_names.append(base_class.id)
-                        # if the class looks like class MyExecutor(jina.Executor):
-                        if isinstance(base_class, ast.Attribute):
-                            base_names.append(base_class.attr)
-                    if 'Executor' not in base_names:
-                        continue
-
-                init = None
-                endpoints = []
-                for body_item in class_def.body:
-                    if not isinstance(body_item, ast.FunctionDef):
-                        continue
-                    docstring = ast.get_docstring(body_item)
-                    func_args = [
-                        element.arg
-                        for element in body_item.args.args + body_item.args.kwonlyargs
-                    ]
-                    annotations = [
-                        _get_element_source(
-                            lines, element.annotation, remove_whitespace=True
-                        )
-                        if element.annotation
-                        else None
-                        for element in body_item.args.args + body_item.args.kwonlyargs
-                    ]
-                    func_args_defaults = [
-                        _get_element_source(lines, element, remove_whitespace=False)
-                        if element
-                        else None
-                        for element in body_item.args.defaults
-                        + body_item.args.kw_defaults
-                    ]
-
-                    # check __init__ function arguments
-                    if body_item.name == '__init__':
-                        init = (func_args, func_args_defaults, annotations, docstring)
-                    else:
-                        requests_decorator = _inspect_requests(body_item, lines)
-
-                        # add only methods that are decorated with requests
-                        if requests_decorator:
-                            if re.match('\'.*\'', requests_decorator, flags=re.DOTALL):
-                                requests_decorator = f'[{requests_decorator}]'
-                            endpoints.append(
-                                (
-                                    body_item.name,
-                                    func_args,
-                                    func_args_defaults,
-                                    annotations,
-                                    docstring,
-                                    requests_decorator,
-                                )
-                            )
-                executors.append(
-                    (
-                        class_def.name,
-                        filepath,
-                        ast.get_docstring(class_def),
-                        init,
-                        endpoints,
-                    )
-                )
-    return executors
+    skipped = results.count(None)
+    stats.count('modules_skipped', skipped)
+    stats.count('modules_inspected', len(results) - skipped)
+    return [executor for result in results if result for executor in result]
 
 
-def filter_executors(executors: List[Tuple[str, str, Tuple, List[Tuple]]]):
+def filter_executors(executors: List[ExecutorRecord]) -> List[ExecutorRecord]:
     """
     Filter the executors based on the given criteria
-    :param executors: list of tuples (class_name, filepath, class_docstring, class_args, class_kwargs)
-    :return: list of tuples (class_name, filepath, class_docstring, class_args, class_kwargs)
+    :param executors: the executors found
+    :return: the executors whose ``__init__``, if any, takes ``self``
     """
-    result = []
-    for i, (executor, _, _, init, _) in enumerate(executors):
-        # An Executor without __init__ should be valid
-        if not init:
-            result.append(executors[i])
-        else:
-            func_args, func_args_defaults, _, _ = init
-            if len(func_args) - len(func_args_defaults) >= 1:
-                result.append(executors[i])
-    return result
+    # An Executor without __init__ should be valid
+    return [e for e in executors if not e.init or len(e.init.args) >= 1]
 
 
 def prelude(imports: List['Package']):
@@ -309,60 +425,86 @@ def prelude(imports: List['Package']):
     return base_images, dep_tools
 
 
-def to_dto(
-    executor: str,
-    docstring: Optional[str],
-    init: InitInspectionType,
-    endpoints: List[EndpointInspectionType],
-    filepath: str,
-    hubble_score_metrics: Dict,
-) -> ExecutorModel:
+def _func_dto(func: FuncRecord, model: Type[FuncArgsModel], **fields) -> FuncArgsModel:
+    return model.construct(
+        args=[
+            ArgModel.construct(arg=a.arg, annotation=a.annotation) for a in func.args
+        ],
+        kwargs=[
+            KWArgModel.construct(arg=a.arg, annotation=a.annotation, default=a.default)
+            for a in func.kwargs
+        ],
+        docstring=func.docstring,
+        **fields,
+    )
+
+
+def _func_model(data: Dict, model: Type[FuncArgsModel]) -> FuncArgsModel:
+    return model.construct(
+        **{
+            **data,
+            'args': [ArgModel.construct(**a) for a in data['args']],
+            'kwargs': [KWArgModel.construct(**a) for a in data['kwargs']],
+        }
+    )
+
+
+def dto_from_dict(data: Dict) -> ExecutorModel:
     """
-    Convert the given executor to a DTO
-    :param executor: name of the executor
-    :param docstring: docstring of the executor
-    :param init: init function of the executor
-    :param endpoints: endpoints of the executor
-    :param filepath: filepath of the executor
-    :param hubble_score_metrics: hubble score metrics of the executor
+    Build a DTO from its ``dict()``, e.g. as stored in the normalize cache
+
+    The data is well-formed by construction, the models are built without
+    validation, as by :func:`to_dto`.
+
+    :param data: the fields of the DTO
     :return: DTO of the executor
     """
-    if init:
-        init_args, init_kwargs, init_docstring = init
-        init = {
-            'args': [
-                {'arg': arg, 'annotation': annotation} for arg, annotation in init_args
+    return ExecutorModel.construct(
+        **{
+            **data,
+            'init': _func_model(data['init'], FuncArgsModel) if data['init'] else None,
+            'endpoints': [
+                _func_model(endpoint, EndpointArgsModel)
+                for endpoint in data['endpoints']
             ],
-            'kwargs': [
-                {'arg': arg, 'annotation': annotation, 'default': default}
-                for arg, annotation, default in init_kwargs
-            ],
-            'docstring': init_docstring,
         }
-    result = {
-        'executor': executor,
-        'docstring': docstring,
-        'init': init,
-        'endpoints': [
-            {
-                'name': endpoint_name,
-                'args': [
-                    {'arg': arg, 'annotation': annotation}
-                    for arg, annotation in endpoint_args
-                ],
-                'kwargs': [
-                    {'arg': arg, 'annotation': annotation, 'default': default}
-                    for arg, annotation, default in endpoint_kwargs
-                ],
-                'docstring': endpoint_docstring,
-                'requests': endpoint_requests,
-            }
-            for endpoint_name, endpoint_args, endpoint_kwargs, endpoint_docstring, endpoint_requests in endpoints
+    )
+
+
+def to_dto(executor: ExecutorRecord, hubble_score_metrics: Dict) -> ExecutorModel:
+    """
+    Convert the given executor to a DTO
+
+    The records are well-formed by construction, the models are built from them
+    without validation.
+
+    :param executor: the executor found
+    :param hubble_score_metrics: hubble score metrics of the executor
+    :return: DTO of the executor
+    """
+    return ExecutorModel.construct(
+        executor=executor.name,
+        docstring=executor.docstring,
+        init=_func_dto(executor.init, FuncArgsModel) if executor.init else None,
+        endpoints=[
+            _func_dto(
+                endpoint,
+                EndpointArgsModel,
+                name=endpoint.name,
+                requests=endpoint.requests,
+            )
+            for endpoint in executor.endpoints
         ],
-        'hubble_score_metrics': hubble_score_metrics,
-        'filepath': str(filepath),
-    }
-    return ExecutorModel(**result)
+        hubble_score_metrics=hubble_score_metrics,
+        filepath=str(executor.filepath),
+        artifacts=None,
+    )
+
+
+def _dump_outputs(outputs: Dict['pathlib.Path', str]):
+    for path, content in outputs.items():
+        with open(path, 'w') as f:
+            f.write(content)
 
 
 def normalize(
@@ -372,16 +514,25 @@ def normalize(
     dry_run: bool = False,
     dockerfile: Optional[str] = None,
     dockerfile_syntax: Optional[str] = None,
+    cache: Optional[NormalizeCache] = None,
+    stats: Optional[RunStats] = None,
+    index: Optional[BundleIndex] = None,
     **_argv,
 ) -> ExecutorModel:
     """Normalize the executor package.
 
-    :param work_path: the executor folder where it located
+    :param work_path: the executor folder where it located, or a zip or tar archive of it
     :param meta: the version info of the Jina to work with
     :param env: the environment variables the Jina works with
-    :param dry_run: if True, dry_run the file dumps
+    :param dry_run: if True, nothing is written to the executor folder and the generated
+        files are returned in the ``artifacts`` of the model instead
     :param dockerfile: custom dockerfile path
     :param dockerfile_syntax: custom dockerfile syntax
+    :param cache: cache of normalize results keyed by the bundle content
+    :param stats: collects the time spent in each stage of the run
+    :param index: the bundle the files are read from, whose root replaces ``work_path``,
+        opened from ``work_path`` if not given. Archives are read-only: nothing is written and the generated files are
+        returned in the ``artifacts`` of the model, as in a dry run
     :param _argv: other arguments
 
     :return: normalized Executor model
@@ -392,7 +543,29 @@ def normalize(
     :raises ExecutorNotFoundError: Can't detect any Executor
     :raises FileNotFoundError: Can't find the path of the folder
     :raises IllegalExecutorError: The count of legal Executor is 0
+    :raises ValueError: The path is neither a folder nor a zip or tar archive
     """
+    if index is None:
+        if not work_path.exists():
+            raise FileNotFoundError(
+                f'The folder "{work_path}" does not exist, can not normalize'
+            )
+        with open_bundle(work_path) as index:
+            return normalize(
+                work_path,
+                meta=meta,
+                env=env,
+                dry_run=dry_run,
+                dockerfile=dockerfile,
+                dockerfile_syntax=dockerfile_syntax,
+                cache=cache,
+                stats=stats,
+                index=index,
+                **_argv,
+            )
+    work_path = index.root
+    if not index.writable:
+        dry_run = True
 
     logger.debug(f'=> The executor repository is located at: {work_path}')
 
@@ -403,10 +576,6 @@ def normalize(
     logger.debug(f'=> The environment variables: ')
     for k, v in env.items():
         logger.debug('%20s: -> %20s' % (k, v))
-    if not work_path.exists():
-        raise FileNotFoundError(
-            f'The folder "{work_path}" does not exist, can not normalize'
-        )
 
     dockerfile_path = (
         (work_path / dockerfile) if dockerfile else (work_path / 'Dockerfile')
@@ -420,86 +589,131 @@ def normalize(
     requirements_path = work_path / 'requirements.txt'
     pyproject_path = work_path / 'pyproject.toml'
     gpu_dockerfile_path = work_path / 'Dockerfile.gpu'
-    test_glob = list(work_path.glob('tests/test_*.py'))
-
-    if pyproject_path.exists():
-        with open(requirements_path, 'a') as f:
+    test_glob = index.glob('tests/test_*.py')
+
+    if stats is None:
+        stats = RunStats()
+
+    with stats.stage('version_resolution'):
+        jina_version = choose_jina_version(meta['jina'])
+
+    cache_key = None
+    if cache is not None:
+        with stats.stage('cache_lookup'):
+            cache_key = bundle_digest(
+                work_path,
+                dockerfile_path,
+                {
+                    'meta': meta,
+                    'dockerfile': dockerfile,
+                    'dockerfile_syntax': dockerfile_syntax,
+                    'jina_version': jina_version,
+                },
+                index=index,
+            )
+            cached = cache.get(cache_key)
+        if cached is not None:
+            logger.debug(f'=> normalize cache hit: {cache_key}')
+            outputs = {work_path / p: c for p, c in cached['outputs'].items()}
+            if not dry_run:
+                _dump_outputs(outputs)
+            cached['executor']['filepath'] = str(work_path / cached['filepath'])
+            dto = dto_from_dict(cached['executor'])
+            if dry_run:
+                dto.artifacts = cached['outputs']
+            return dto
+
+    # the files generated by normalize, dumped once all the steps succeeded
+    outputs: Dict['pathlib.Path', str] = {}
+
+    with stats.stage('requirements_parsing'):
+        if index.exists(pyproject_path):
+            requirements = (
+                index.read_text(requirements_path)
+                if index.exists(requirements_path)
+                else ''
+            )
             logger.debug(f'=> Dependencies extracted from `pyproject.toml`: ')
-            for dep in get_dependencies_from_pyproject(pyproject_path):
+            for dep in get_dependencies_from_pyproject(
+                pyproject_path, content=index.read_text(pyproject_path)
+            ):
                 logger.debug(f'=========> {dep}')
-                f.write(f'{dep}\n')
+                requirements += f'{dep}\n'
+            outputs[requirements_path] = requirements
+    requirements_exists = requirements_path in outputs or index.exists(
+        requirements_path
+    )
 
     # load manifest configuration
-    if manifest_path.exists():
-        manifest_location = manifest_path
-        raw_manifest_cfg = yaml.safe_load(open(manifest_path, 'r'))
-        parsed_manifest_cfg = {
-            k: v for k, v in raw_manifest_cfg.items() if k in manifest_keys
-        }
-        if len(parsed_manifest_cfg) > 0:
-            manifest_cfg = parsed_manifest_cfg
-
-    class_name = None
-    py_glob = []
-    if config_path.exists():
-        config = yaml.safe_load(open(config_path, 'r'))
-        try:
-            class_name: str = config['jtype']
-        except Exception as ex:
-            raise ex
-
-        if class_name is None:
-            raise Exception('Not found jtype in config.yml')
-
-        metas_py_modules = config.get('metas', {}).get('py_modules', None)
-        root_py_modules = config.get('py_modules', None)
-
-        if metas_py_modules and root_py_modules:
-            raise Exception(
-                'The parameter py_modules can only be appear in one of metas and root in config.yml'
-            )
+    with stats.stage('manifest_loading'):
+        if index.exists(manifest_path):
+            manifest_location = manifest_path
+            raw_manifest_cfg = yaml.safe_load(index.read_text(manifest_path))
+            parsed_manifest_cfg = {
+                k: v for k, v in raw_manifest_cfg.items() if k in manifest_keys
+            }
+            if len(parsed_manifest_cfg) > 0:
+                manifest_cfg = parsed_manifest_cfg
+
+    analyzer = ModuleAnalyzer(index=index)
+    with stats.stage('py_modules_discovery'):
+        class_name = None
+        py_glob = []
+        if index.exists(config_path):
+            config = yaml.safe_load(index.read_text(config_path))
+            try:
+                class_name: str = config['jtype']
+            except Exception as ex:
+                raise ex
+
+            if class_name is None:
+                raise Exception('Not found jtype in config.yml')
+
+            metas_py_modules = config.get('metas', {}).get('py_modules', None)
+            root_py_modules = config.get('py_modules', None)
+
+            if metas_py_modules and root_py_modules:
+                raise Exception(
+                    'The parameter py_modules can only be appear in one of metas and root in config.yml'
+                )
 
-        py_modules = metas_py_modules if metas_py_modules else root_py_modules
-        if isinstance(py_modules, str):
-            py_glob = [work_path.joinpath(py_modules)]
-        elif isinstance(py_modules, list):
-            py_glob += [work_path.joinpath(p) for p in py_modules]
-
-        # extend the path from import statement
-        extended_path = None
-        for filepath in py_glob:
-            with filepath.open() as fin:
-                tree = ast.parse(fin.read(), filename=str(filepath))
-                fin.seek(0)
-                lines = fin.readlines()
-                for o in ast.walk(tree):
-                    if isinstance(o, ast.ImportFrom):
-                        for alias in o.names:
-                            if alias.name == class_name:
-                                from_state = list(lines[o.lineno - 1].split(' '))[1]
-                                extended_path = convert_from_to_path(
-                                    from_state, base_dir=filepath.parent
-                                )
-                                if extended_path:
-                                    py_glob.append(extended_path)
-                                    break
-
-        # appending manifest.yml into config.yml
-        # this is done due to deprectation of manifest.yml
-        if manifest_cfg is not None:
-            metas_cfg = {**config.get('metas', {}), **manifest_cfg}
-            config['metas'] = metas_cfg
-            if not dry_run:
-                with open(config_path, 'w') as f:
-                    yaml.dump(config, f, sort_keys=False)
+            py_modules = metas_py_modules if metas_py_modules else root_py_modules
+            if isinstance(py_modules, str):
+                py_glob = [work_path.joinpath(py_modules)]
+            elif isinstance(py_modules, list):
+                py_glob += [work_path.joinpath(p) for p in py_modules]
+
+            # extend the path from import statement
+            extended_path = None
+            for filepath in py_glob:
+                analysis = analyzer.get(filepath)
+                for o in analysis.import_froms:
+                    for alias in o.names:
+                        if alias.name == class_name:
+                            from_state = list(analysis.lines[o.lineno - 1].split(' '))[
+                                1
+                            ]
+                            extended_path = convert_from_to_path(
+                                from_state, base_dir=filepath.parent, index=index
+                            )
+                            if extended_path:
+                                py_glob.append(extended_path)
+                                break
+
+            # appending manifest.yml into config.yml
+            # this is done due to deprectation of manifest.yml
+            if manifest_cfg is not None:
+                metas_cfg = {**config.get('metas', {}), **manifest_cfg}
+                config['metas'] = metas_cfg
+                outputs[config_path] = yaml.dump(config, sort_keys=False)
+            else:
+                metas_cfg = config.get('metas', {})
+                if 'name' in metas_cfg:
+                    manifest_path = config_path
         else:
-            metas_cfg = config.get('metas', {})
-            if 'name' in metas_cfg:
-                manifest_path = config_path
-    else:
-        py_glob = list(work_path.glob('*.py')) + list(work_path.glob('executor/*.py'))
+            py_glob = index.glob('*.py') + index.glob('executor/*.py')
 
-    py_glob = list(set(py_glob))
+        py_glob = list(set(py_glob))
 
     completeness = {
         'Dockerfile': dockerfile_path,
@@ -511,117 +725,106 @@ def normalize(
         'tests': test_glob,
     }
 
+    from jina.helper import colored
+
     logger.info(
         f'=> checking executor repository ...\n'
         + '\n'.join(
-            f'\t{colored("✓", "green") if (None if v is None else v if isinstance(v, list) else v.exists()) else colored("✗", "red"):>4} {k:<20} {v}'
+            f'\t{colored("✓", "green") if (None if v is None else v if isinstance(v, list) else index.exists(v)) else colored("✗", "red"):>4} {k:<20} {v}'
             for k, v in completeness.items()
         )
         + '\n'
     )
 
     hubble_score_metrics = {
-        'dockerfile_exists': dockerfile_path.exists(),
+        'dockerfile_exists': index.exists(dockerfile_path),
         'manifest_exists': manifest_path is not None,
-        'config_exists': config_path.exists(),
-        'readme_exists': readme_path.exists(),
-        'requirements_exists': requirements_path.exists(),
+        'config_exists': index.exists(config_path),
+        'readme_exists': index.exists(readme_path),
+        'requirements_exists': requirements_exists,
         'tests_exists': bool(test_glob),
-        'gpu_dockerfile_exists': gpu_dockerfile_path.exists(),
+        'gpu_dockerfile_exists': index.exists(gpu_dockerfile_path),
     }
 
     # if not requirements_path.exists():
     #     requirements_path.touch()
 
     # inspect executor
-    executors = inspect_executors(py_glob, class_name)
-    if len(executors) == 0:
-        raise ExecutorNotFoundError
-    if len(executors) > 1:
-        raise ExecutorExistsError
-
-    executors = filter_executors(executors)
-    if len(executors) == 0:
-        raise IllegalExecutorError
-
-    executor, filepath, docstring, init, endpoints = executors[0]
-    if init:
-        init_args, init_args_defaults, init_annotations, init_docstring = init
-        init_args, init_kwargs = _get_args_kwargs(
-            init_args, init_args_defaults, init_annotations
+    with stats.stage('inspect_executors'):
+        executors = inspect_executors(
+            py_glob, class_name, analyzer=analyzer, stats=stats
         )
-        init = (init_args, init_kwargs, init_docstring)
-
-    for i, endpoint in enumerate(endpoints):
-        if endpoint is not None:
-            (
-                endpoint_name,
-                endpoint_args,
-                endpoint_args_defaults,
-                endpoint_annotations,
-                endpoint_docstring,
-                endpoint_requests,
-            ) = endpoint
-            endpoint_args, endpoint_kwargs = _get_args_kwargs(
-                endpoint_args, endpoint_args_defaults, endpoint_annotations
-            )
-            endpoints[i] = (
-                endpoint_name,
-                endpoint_args,
-                endpoint_kwargs,
-                endpoint_docstring,
-                endpoint_requests,
-            )
-
-    if not config_path.exists():
-        try:
-            py_modules = order_py_modules(py_glob, work_path)
-        except Exception as ex:
-            raise DependencyError
+        if len(executors) == 0:
+            raise ExecutorNotFoundError
+        if len(executors) > 1:
+            raise ExecutorExistsError
+
+        executors = filter_executors(executors)
+        if len(executors) == 0:
+            raise IllegalExecutorError
+
+    executor = executors[0]
+
+    if not index.exists(config_path):
+        with stats.stage('order_py_modules'):
+            try:
+                py_modules = order_py_modules(
+                    py_glob, work_path, analyzer=analyzer, index=index
+                )
+            except DependencyError:
+                raise
+            except Exception as ex:
+                raise DependencyError from ex
         py_modules = [f'{p.relative_to(work_path)}' for p in py_modules]
 
         # render config.yml content
-        template = get_config_template()
-        config_content = template.render(executor=executor, py_modules=py_modules)
-
-        if not dry_run:
-            # dump config.yml
-            with open(config_path, 'w') as f:
-                f.write(config_content)
-
-            if manifest_cfg is not None:
-                config = yaml.safe_load(open(config_path, 'r'))
-                metas_cfg = {**config.get('metas', {}), **manifest_cfg}
-                config['metas'] = metas_cfg
-                with open(config_path, 'w') as f:
-                    yaml.dump(config, f, sort_keys=False)
+        config_content = render_template(
+            'config.yml.jinja2', executor=executor.name, py_modules=py_modules
+        )
 
-    if requirements_path.exists():
-        imports = [
-            Package(name=p['name'], version=p['version'])
-            for p in parse_requirements(requirements_path)
-        ]
-        logger.debug(f'=> existed imports: {imports}')
-    else:
-        imports = []
-        # WIP: TODO....
-        # candidates = get_all_imports(work_path)
-        # candidates = get_pkg_names(candidates)
+        if manifest_cfg is not None:
+            config = yaml.safe_load(config_content)
+            metas_cfg = {**config.get('metas', {}), **manifest_cfg}
+            config['metas'] = metas_cfg
+            config_content = yaml.dump(config, sort_keys=False)
+        outputs[config_path] = config_content
+
+    with stats.stage('requirements_parsing'):
+        if requirements_exists:
+            if requirements_path in outputs:
+                requirements_content = outputs[requirements_path]
+            elif isinstance(index, DirectoryIndex):
+                # unchanged on disk, parsed from its path
+                requirements_content = None
+            else:
+                requirements_content = index.read_text(requirements_path)
+            imports = [
+                Package(name=p['name'], version=p['version'])
+                for p in parse_requirements(
+                    requirements_path, content=requirements_content
+                )
+            ]
+            logger.debug(f'=> existed imports: {imports}')
+        else:
+            imports = []
+            # WIP: TODO....
+            # candidates = get_all_imports(work_path)
+            # candidates = get_pkg_names(candidates)
 
-        # logger.debug(f'=> inspect imports: {candidates}')
+            # logger.debug(f'=> inspect imports: {candidates}')
 
-        # imports = [get_import_info(m) for m in candidates]
-        # logger.debug(f'=> import pypi package : {imports}')
-        # logger.debug(f'=> writing {len(imports)} requirements.txt')
+            # imports = [get_import_info(m) for m in candidates]
+            # logger.debug(f'=> import pypi package : {imports}')
+            # logger.debug(f'=> writing {len(imports)} requirements.txt')
 
-        # if len(imports) > 0:
-        #     dump_requirements(requirements_path, imports)
+            # if len(imports) > 0:
+            #     dump_requirements(requirements_path, imports)
 
-    base_images, dep_tools = prelude(imports)
-    jina_version = choose_jina_version(meta['jina'])
+        base_images, dep_tools = prelude(imports)
     py_version = meta.get('python', '3.8.0')
 
-    jina_image_tag = get_jina_image_tag(jina_version, py_version)
+    with stats.stage('version_resolution'):
+        jina_image_tag = get_jina_image_tag(jina_version, py_version)
 
     logger.debug(
         f'=> collected env:\n'
@@ -630,72 +833,85 @@ def normalize(
         + f'\tjina_base_image: {jina_image_tag}'
     )
 
-    dockerfile: ExecutorDockerfile = None
-    if dockerfile_path.exists():
-        dockerfile = ExecutorDockerfile(
-            docker_file=dockerfile_path,
-            build_args={'JINA_VERSION': f'{jina_version}'},
-            syntax=dockerfile_syntax,
-        )
+    with stats.stage('dockerfile_generation'):
+        dockerfile: ExecutorDockerfile = None
+        if index.exists(dockerfile_path):
+            dockerfile = ExecutorDockerfile(
+                content=index.read_bytes(dockerfile_path).decode(),
+                build_args={'JINA_VERSION': f'{jina_version}'},
+                syntax=dockerfile_syntax,
+            )
 
-        # if dockerfile.is_multistage():
-        #     # Don't support multi-stage Dockerfile Optimization
-        #     return
-
-        # if dockerfile.baseimage.startswith('jinaai/jina') and len(base_images) > 0:
-        #     dockerfile.baseimage = base_images.pop()
-        #     dockerfile._parser.add_lines(
-        #         f'RUN pip install jina=={jina_version}', at_start=True
-        #     )
-        #     dockerfile.dump(work_path / 'Dockerfile.normed')
-        if not dry_run:
-            dockerfile.dump(dockerfile_path)
-    else:
-        logger.debug('=> generating Dockerfile ...')
-        dockerfile = ExecutorDockerfile(
-            build_args={'JINA_VERSION': jina_image_tag}, syntax=dockerfile_syntax
-        )
+            # if dockerfile.is_multistage():
+            #     # Don't support multi-stage Dockerfile Optimization
+            #     return
+
+            # if dockerfile.baseimage.startswith('jinaai/jina') and len(base_images) > 0:
+            #     dockerfile.baseimage = base_images.pop()
+            #     dockerfile._parser.add_lines(
+            #         f'RUN pip install jina=={jina_version}', at_start=True
+            #     )
+            #     dockerfile.dump(work_path / 'Dockerfile.normed')
+            outputs[dockerfile_path] = dockerfile.dumps()
+        else:
+            logger.debug('=> generating Dockerfile ...')
+            dockerfile = ExecutorDockerfile(
+                build_args={'JINA_VERSION': jina_image_tag}, syntax=dockerfile_syntax
+            )
 
-        # if len(base_images) > 0:
-        #     logger.debug(f'=> use base image: {base_images}')
-        #     dockerfile.baseimage = base_images.pop()
+            # if len(base_images) > 0:
+            #     logger.debug(f'=> use base image: {base_images}')
+            #     dockerfile.baseimage = base_images.pop()
 
-        dockerfile.add_work_dir()
-        # dockerfile._parser.add_lines(f'RUN pip install jina=={jina_version}')
+            dockerfile.add_work_dir()
+            # dockerfile._parser.add_lines(f'RUN pip install jina=={jina_version}')
 
-        if len(dep_tools) > 0:
-            dockerfile.add_apt_installs(dep_tools)
+            if len(dep_tools) > 0:
+                dockerfile.add_apt_installs(dep_tools)
 
-        if requirements_path.exists():
-            dockerfile.add_pip_install()
+            if requirements_exists:
+                dockerfile.add_pip_install()
 
-        # if len(test_glob) > 0:
-        #     dockerfile.add_unitest()
+            # if len(test_glob) > 0:
+            #     dockerfile.add_unitest()
 
-        dockerfile.entrypoint = [
-            'jina',
-            'executor',
-            '--uses',
-            f'{config_path.relative_to(work_path)}',
-        ]
-        if not dry_run:
-            dockerfile.dump(dockerfile_path)
+            dockerfile.entrypoint = [
+                'jina',
+                'executor',
+                '--uses',
+                f'{config_path.relative_to(work_path)}',
+            ]
+            outputs[dockerfile_path] = dockerfile.dumps()
 
-    entrypoint_value = dockerfile.entrypoint
+        entrypoint_value = dockerfile.entrypoint
 
-    new_dockerfile = ExecutorDockerfile(
-        docker_file=__resources_path__ / 'templates' / 'dockerfile.base',
-        syntax=dockerfile_syntax,
-    )
-    new_dockerfile.set_entrypoint(entrypoint_value)
+        new_dockerfile = ExecutorDockerfile(
+            content=get_resource('templates/dockerfile.base'),
+            syntax=dockerfile_syntax,
+        )
+        new_dockerfile.set_entrypoint(entrypoint_value)
+
+        if 'docarray' in meta and '__jina__.Dockerfile' not in str(dockerfile_path):
+            dockerfile.add_docarray_install(meta['docarray'])
+            outputs[dockerfile_path] = dockerfile.dumps()
 
-    if 'docarray' in meta and '__jina__.Dockerfile' not in str(dockerfile_path):
-        dockerfile.add_docarray_install(meta['docarray'])
-        if not dry_run:
-            dockerfile.dump(dockerfile_path)
+        new_dockerfile_path = work_path / '__jina__.Dockerfile'
+        outputs[new_dockerfile_path] = new_dockerfile.dumps()
 
-    new_dockerfile_path = work_path / '__jina__.Dockerfile'
     if not dry_run:
-        new_dockerfile.dump(new_dockerfile_path)
+        _dump_outputs(outputs)
 
-    return to_dto(executor, docstring, init, endpoints, filepath, hubble_score_metrics)
+    dto = to_dto(executor, hubble_score_metrics)
+    artifacts = {str(p.relative_to(work_path)): c for p, c in outputs.items()}
+    if cache is not None:
+        cache.put(
+            cache_key,
+            {
+                'executor': dto.dict(),
+                'filepath': os.path.relpath(executor.filepath, work_path),
+                'outputs': artifacts,
+            },
+        )
+    if dry_run:
+        dto.artifacts = artifacts
+    return dto
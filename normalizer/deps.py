@@ -1,10 +1,9 @@
-from typing import List, Dict, Tuple
+import os
+import tempfile
+from typing import List, Dict, Optional, Tuple
 from pathlib import Path
 from packaging.version import parse
 
-from pipreqs import pipreqs
-from pypi_simple import PyPISimple
-
 from collections import namedtuple
 
 Package = namedtuple('Package', ['name', 'version'])
@@ -70,6 +69,8 @@ def get_all_imports(
     :param follow_links: follow links
     :return: list of imports
     """
+    from pipreqs import pipreqs
+
     return pipreqs.get_all_imports(
         str(path),
         encoding=encoding,
@@ -85,6 +86,8 @@ def get_import_info(import_name):
     :param import_name: the import name to get the info for
     :return: the PyPI info
     """
+    from pypi_simple import PyPISimple
+
     try:
         with PyPISimple() as client:
             result = client.get_project_page(import_name)
@@ -108,6 +111,8 @@ def get_pkg_names(pkgs):
     :param pkgs: list of import names
     :return: corresponding PyPI package names
     """
+    from pipreqs import pipreqs
+
     return pipreqs.get_pkg_names(pkgs)
 
 
@@ -127,14 +132,36 @@ def dump_requirements(path: 'Path', imports: List[Dict] = []):
                 f.write(f'{m.name}\n')
 
 
-def parse_requirements(path: 'Path'):
-    """Parse a requirements formatted file.
-    Traverse a string until a delimiter is detected, then split at said
-    delimiter, get module name by element index, create a dict consisting of
-    module:version, and add dict to list of parsed modules.
+def parse_requirements(path: 'Path', content: Optional[str] = None):
+    """Parse a requirements formatted file with ``pipreqs``.
+
+    ``pipreqs`` only opens files, the content passed in, e.g. not written yet in a dry
+    run or read from an archive, is handed over as an in-memory file descriptor. A
+    temporary file outside the package is only written where those are not supported.
 
     :param path: the file to parse
+    :param content: the content of the file, read from ``path`` if omitted
     :return: list of requiemented modules, excluding comments.
 
     """
-    return pipreqs.parse_requirements(str(path))
+    from pipreqs import pipreqs
+
+    if content is None:
+        return pipreqs.parse_requirements(str(path))
+
+    if hasattr(os, 'memfd_create'):
+        fd = os.memfd_create('requirements.txt')
+        try:
+            os.write(fd, content.encode())
+            os.lseek(fd, 0, os.SEEK_SET)
+        except BaseException:
+            os.close(fd)
+            raise
+        # the descriptor is closed by pipreqs along with the file opened on it
+        return pipreqs.parse_requirements(fd)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp_path = os.path.join(tmpdir, 'requirements.txt')
+        with open(tmp_path, 'w') as fp:
+            fp.write(content)
+        return pipreqs.parse_requirements(tmp_path)
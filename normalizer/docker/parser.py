@@ -1,36 +1,126 @@
-import io
-import pathlib
 import re
 from pathlib import Path
-from posixpath import basename
-from re import template
 from textwrap import dedent
-from typing import Dict, List, Optional
-from dockerfile_parse import DockerfileParser
+from typing import Dict, List, Optional, Tuple
 
-from normalizer import docker
+from dockerfile_parse.constants import COMMENT_INSTRUCTION
+from dockerfile_parse.parser import image_from
+from dockerfile_parse.util import WordSplitter, extract_key_values
 
 RUN_VAR_RE = re.compile(r'(?P<var>(?P<name>^RUN))')
 DIRECTIVE_RE = re.compile(r'^#\s*([a-zA-Z][a-zA-Z0-9]*)\s*=\s*(.+?)\s*$')
 
+# the grammar of dockerfile_parse.DockerfileParser.structure
+INSTRUCTION_RE = re.compile(r'^\s*(\S+)\s+(.*)$')
+COMMENT_RE = re.compile(r'^\s*#')
+ESCAPE_DIRECTIVE_RE = re.compile(r'^\s*#\s*escape\s*=\s*(\\|`)\s*$', re.I)
+SYNTAX_DIRECTIVE_RE = re.compile(r'^\s*#\s*syntax\s*=\s*(.*)\s*$', re.I)
 
-class ExecutorDockerfile:
-    def __init__(
-        self, docker_file: 'Path' = None, build_args: Dict = {'JINA_VERSION': 'master'},
-        syntax: Optional[str] = None,
-    ):
-        self._buffer = io.BytesIO()
-        if docker_file and docker_file.exists():
-            self._buffer.write(docker_file.open('rb').read())
-            self._parser = DockerfileParser(
-                fileobj=self._buffer, env_replace=True, build_args=build_args
+
+def _endline(line: str) -> str:
+    return line.rstrip() + '\n'
+
+
+def _split_lines(text: str) -> List[str]:
+    lines = text.split('\n')
+    return [line + '\n' for line in lines[:-1]] + ([lines[-1]] if lines[-1] else [])
+
+
+class Instruction:
+    """A block of Dockerfile lines: an instruction with its continuation lines, a comment or a blank line."""
+
+    __slots__ = ('instruction', 'value', 'lines', 'continued')
+
+    def __init__(self, instruction: Optional[str], value: Optional[str], line: str):
+        self.instruction = instruction
+        self.value = value
+        self.lines = [line]
+        self.continued = False
+
+    @property
+    def open(self) -> bool:
+        """Whether the lines following the block are parsed as part of it."""
+        return self.continued or not self.lines[-1].endswith('\n')
+
+
+def parse_instructions(
+    text: str, escape: str = '\\', directives: bool = False
+) -> Tuple[List[Instruction], str]:
+    """Split Dockerfile content into instruction blocks covering all of its lines.
+
+    The instructions and their values are the ones of ``DockerfileParser.structure``.
+
+    :param text: the Dockerfile content
+    :param escape: the line continuation character
+    :param directives: whether the content starts the Dockerfile, i.e. may hold parser directives
+    :return: the instruction blocks and the line continuation character
+    """
+
+    def _rstrip_eol(value):
+        value = value.rstrip()
+        return value[:-1] if value.endswith(escape) else value
+
+    continuation_re = re.compile(r'^.*' + re.escape(escape) + r'\s*$')
+    blocks = []
+    current = None
+    for line in _split_lines(text):
+        if directives:
+            matched = ESCAPE_DIRECTIVE_RE.match(line)
+            if matched:
+                escape = matched.group(1)
+                continuation_re = re.compile(r'^.*' + re.escape(escape) + r'\s*$')
+            elif not SYNTAX_DIRECTIVE_RE.match(line):
+                directives = False
+
+        if COMMENT_RE.match(line):
+            if current is not None and current.continued:
+                # comments interjected in a multi-line instruction
+                current.lines.append(line)
+            else:
+                value = re.sub(r'\n', '', re.sub(r'^\s*#\s*', '', line))
+                blocks.append(Instruction(COMMENT_INSTRUCTION, value, line))
+            continue
+
+        if current is None or not current.continued:
+            matched = INSTRUCTION_RE.match(line)
+            if not matched:
+                current = None
+                blocks.append(Instruction(None, None, line))
+                continue
+            current = Instruction(
+                matched.group(1).upper(), _rstrip_eol(matched.group(2)), line
             )
+            blocks.append(current)
         else:
+            current.lines.append(line)
+            if current.value:
+                current.value += _rstrip_eol(line)
+            else:
+                current.value = _rstrip_eol(line.lstrip())
 
-            self._parser = DockerfileParser(
-                fileobj=self._buffer, env_replace=True, build_args=build_args
-            )
+        current.continued = bool(continuation_re.match(line))
+
+    return blocks, escape
+
+
+class ExecutorDockerfile:
+    """Dockerfile held as a list of instruction blocks.
 
+    The content is parsed once, edits replace or insert blocks and only re-parse the
+    inserted lines, and the content is serialized on access.
+    """
+
+    def __init__(
+        self,
+        docker_file: 'Path' = None,
+        build_args: Dict = {'JINA_VERSION': 'master'},
+        syntax: Optional[str] = None,
+        content: Optional[str] = None,
+    ):
+        self._build_args = build_args
+        if content is None and docker_file and docker_file.exists():
+            content = docker_file.open('rb').read().decode()
+        elif content is None:
             dockerfile_template = dedent(
                 """\
                 # This file is automatically generated by Jina executor normalizer plugin.
@@ -41,9 +131,9 @@ class ExecutorDockerfile:
                 """
             )
 
-            self._parser.content = dockerfile_template.format(
-                build_args['JINA_VERSION']
-            )
+            content = dockerfile_template.format(build_args['JINA_VERSION'])
+
+        self._blocks, self._escape = parse_instructions(content, directives=True)
 
         if syntax:
             self.syntax = syntax
@@ -61,7 +151,7 @@ class ExecutorDockerfile:
             """
         )
         content = instruction_template.format(' '.join(tools))
-        self._parser.content += content
+        self._append(content)
 
     def add_work_dir(self):
         content = dedent(
@@ -72,23 +162,27 @@ class ExecutorDockerfile:
 
             """
         )
-        self._parser.content += content
+        self._append(content)
 
     def add_unitest(self):
-        self._parser.content += dedent(
-            """\
+        self._append(
+            dedent(
+                """\
 
-            """
+                """
+            )
         )
 
     def add_pip_install(self):
-        self._parser.content += dedent(
-            """\
-            # install the third-party requirements
-            RUN pip install --default-timeout=1000 --compile --no-cache-dir \\
-                 -r requirements.txt
+        self._append(
+            dedent(
+                """\
+                # install the third-party requirements
+                RUN pip install --default-timeout=1000 --compile --no-cache-dir \\
+                     -r requirements.txt
 
-            """
+                """
+            )
         )
 
     def add_docarray_install(self, docArrayVersion):
@@ -99,38 +193,78 @@ class ExecutorDockerfile:
             """
         )
         content = instruction_template.format(docArrayVersion)
-        for instruction in self._parser.structure:
-            if instruction['instruction'] == 'ENTRYPOINT':
-                self._parser.add_lines_at(instruction['startline']-1, content, after=True)
+        for index, block in enumerate(self._instructions()):
+            if block.instruction == 'ENTRYPOINT':
+                if index == 0:
+                    self._splice(0, 0, _endline(content))
+                else:
+                    self._splice(
+                        index - 1, index, self._endlined(index - 1) + _endline(content)
+                    )
                 break
 
     @property
     def is_multistage(self):
-        return self._parser.is_multistage()
+        return len(self.parent_images) > 1
 
     @property
     def parent_images(self):
-        return self._parser.parent_images
+        in_stage = False
+        top_args = {}
+        images = []
+        for block in self._instructions():
+            if block.instruction == 'ARG' and not in_stage:
+                key_val_list = extract_key_values(
+                    env_replace=False,
+                    args={},
+                    envs={},
+                    instruction_value=block.value,
+                )
+                for key, value in key_val_list:
+                    if key in self._build_args:
+                        value = self._build_args[key]
+                    top_args[key] = value
+            elif block.instruction == 'FROM':
+                in_stage = True
+                image, _ = image_from(block.value)
+                if image is not None:
+                    image = WordSplitter(image, args=top_args).dequote()
+                    images.append(image)
+        return images
 
     @property
     def content(self):
-        return self._parser.content
+        return ''.join(self.lines)
 
     @property
     def lines(self):
-        return self._parser.lines
+        return [line for block in self._blocks for line in block.lines]
 
     @property
     def baseimage(self):
-        return self._parser.baseimage
+        images = self.parent_images
+        return images[-1] if images else None
 
     @baseimage.setter
     def baseimage(self, value: str):
-        self._parser.baseimage = value
+        last_from = None
+        for index, block in enumerate(self._instructions()):
+            if block.instruction == 'FROM' and image_from(block.value)[0] is not None:
+                last_from = index
+        if last_from is None:
+            raise RuntimeError('No stage defined to set base image on')
+
+        image, stage = image_from(self._blocks[last_from].value)
+        if image != value:
+            line = f'FROM {value} AS {stage}\n' if stage else f'FROM {value}\n'
+            self._splice(last_from, last_from + 1, line)
 
     @property
     def syntax(self):
-        matched = DIRECTIVE_RE.match(self._parser.lines[0])
+        if not self._blocks:
+            return None
+
+        matched = DIRECTIVE_RE.match(self._blocks[0].lines[0])
         if not matched:
             return None
 
@@ -139,11 +273,13 @@ class ExecutorDockerfile:
 
         return None
 
-    @baseimage.setter
+    @syntax.setter
     def syntax(self, value: str):
-        matched = DIRECTIVE_RE.match(self._parser.lines[0])
-        self._parser.add_lines_at(0, '# syntax={}'.format(
-            value), replace=bool(matched and matched.group(1) == 'syntax'))
+        line = _endline('# syntax={}'.format(value))
+        if self.syntax is None:
+            self._splice(0, 0, line)
+        else:
+            self._splice(0, 1, line)
 
     @property
     def entrypoint(self):
@@ -152,68 +288,74 @@ class ExecutorDockerfile:
         ENTRYPOINTs from earlier stages are ignored.
         :return: value of final stage ENTRYPOINT
         """
-        value = None
-        for insndesc in self._parser.structure:
-            if insndesc['instruction'] == 'FROM':  # new stage, reset
-                value = None
-            elif insndesc['instruction'].upper() == 'ENTRYPOINT':
-                value = insndesc['value'].strip()
-        return value
+        index = self._entrypoint_index()
+        return self._blocks[index].value.strip() if index is not None else None
 
     @entrypoint.setter
     def entrypoint(self, values: List[str]):
         """
         setter for final 'entrypoint' instruction in final build stage
         """
-        cmd = None
-        for insndesc in self._parser.structure:
-            if insndesc['instruction'] == 'FROM':  # new stage, reset
-                cmd = None
-            elif insndesc['instruction'].upper() == 'ENTRYPOINT':
-                cmd = insndesc
-
-        new_cmd = 'ENTRYPOINT ' + '[' + ', '.join([f'"{_}"' for _ in values]) + ']'
-        if cmd:
-            self._parser.add_lines_at(cmd, new_cmd, replace=True)
-        else:
-            self._parser.add_lines(new_cmd)
+        self.set_entrypoint('[' + ', '.join([f'"{_}"' for _ in values]) + ']')
 
     def set_entrypoint(self, value: str):
         """
         setter for final 'entrypoint' instruction in final build stage
         """
-        cmd = None
-        for insndesc in self._parser.structure:
-            if insndesc['instruction'] == 'FROM':  # new stage, reset
-                cmd = None
-            elif insndesc['instruction'].upper() == 'ENTRYPOINT':
-                cmd = insndesc
-
-        new_cmd = 'ENTRYPOINT ' + value
-        if cmd:
-            self._parser.add_lines_at(cmd, new_cmd, replace=True)
+        new_cmd = _endline('ENTRYPOINT ' + value)
+        index = self._entrypoint_index()
+        if index is not None:
+            self._splice(index, index + 1, new_cmd)
+        elif self._blocks:
+            last = len(self._blocks) - 1
+            self._splice(last, last + 1, self._endlined(last) + new_cmd)
         else:
-            self._parser.add_lines(new_cmd)
-
-    # @property
-    # def entrypoint(self):
-    #     return self._entrypoint
-
-    # @entrypoint.setter
-    # def entrypoint(self, commands: List[str]):
-    #     self._entrypoint = commands
-    #     command_line = ', '.join([f'"{c}"' for c in commands])
-
-    #     entrypoint_line = f'ENTRYPOINT [{command_line}]'
-
-    #     if self._parser.lines[-1].startswith('ENTRYPOINT'):
-    #         self._parser.content = ''.join(self.lines[:-1] + [entrypoint_line])
-    #     else:
-    #         self._parser.content += entrypoint_line
+            self._splice(0, 0, new_cmd)
 
     def dumps(self):
-        return self._buffer.getvalue().decode()
+        return self.content
 
     def dump(self, dockerfile: str):
         with open(dockerfile, 'wb') as fp:
-            fp.write(self._buffer.getvalue())
+            fp.write(self.content.encode())
+
+    def _instructions(self) -> List[Instruction]:
+        # like ``DockerfileParser.structure``, an instruction still continued at the
+        # end of the file is not an instruction yet
+        if self._blocks and self._blocks[-1].continued:
+            return self._blocks[:-1]
+        return self._blocks
+
+    def _entrypoint_index(self) -> Optional[int]:
+        index = None
+        for i, block in enumerate(self._instructions()):
+            if block.instruction == 'FROM':  # new stage, reset
+                index = None
+            elif block.instruction == 'ENTRYPOINT':
+                index = i
+        return index
+
+    def _endlined(self, index: int) -> str:
+        lines = self._blocks[index].lines
+        return ''.join(lines[:-1]) + _endline(lines[-1])
+
+    def _append(self, text: str):
+        self._splice(len(self._blocks), len(self._blocks), text)
+
+    def _splice(self, start: int, end: int, text: str):
+        """Replace the blocks ``[start, end)`` with the blocks parsed from ``text``.
+
+        Only the inserted text is parsed, extended to the neighbouring blocks when they
+        are joined with it by a line continuation or a missing line break.
+        """
+        if start > 0 and self._blocks[start - 1].open:
+            start -= 1
+            text = ''.join(self._blocks[start].lines) + text
+
+        blocks, _ = parse_instructions(text, escape=self._escape)
+        while blocks and blocks[-1].open and end < len(self._blocks):
+            text += ''.join(self._blocks[end].lines)
+            end += 1
+            blocks, _ = parse_instructions(text, escape=self._escape)
+
+        self._blocks[start:end] = blocks
@@ -0,0 +1,385 @@
+"""Read-only views of an executor bundle, a folder or an archive, answering path probes without stat calls."""
+import errno
+import io
+import os
+import pathlib
+import tarfile
+import threading
+import zipfile
+from fnmatch import fnmatchcase
+from typing import BinaryIO, Dict, Iterator, List, Optional, Set, Union
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tar.xz')
+
+# the decompressed size read from an archive, which may be untrusted, is bounded
+ARCHIVE_MEMBER_MAX_BYTES = int(
+    os.environ.get('NORMALIZER_ARCHIVE_MEMBER_MAX_BYTES', 16 * 1024 * 1024)
+)
+ARCHIVE_TOTAL_MAX_BYTES = int(
+    os.environ.get('NORMALIZER_ARCHIVE_TOTAL_MAX_BYTES', 256 * 1024 * 1024)
+)
+ARCHIVE_MAX_MEMBERS = int(os.environ.get('NORMALIZER_ARCHIVE_MAX_MEMBERS', 10000))
+
+
+class ArchiveLimitError(ValueError):
+    """Raised when reading an archive goes over its member count or decompressed size limits."""
+
+
+class BundleIndex:
+    """Files of an executor bundle, addressed by their path below ``root``."""
+
+    root: 'pathlib.Path'
+
+    # whether the generated files can be written next to the bundle files
+    writable = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Release the resources held by the index."""
+
+    def exists(self, path: 'pathlib.Path') -> bool:
+        raise NotImplementedError
+
+    def is_file(self, path: 'pathlib.Path') -> bool:
+        raise NotImplementedError
+
+    def is_dir(self, path: 'pathlib.Path') -> bool:
+        raise NotImplementedError
+
+    def read_bytes(self, path: 'pathlib.Path') -> bytes:
+        raise NotImplementedError
+
+    def iter_files(self) -> Iterator['pathlib.Path']:
+        """Iterate over the files of the bundle, outside of hidden folders, sorted by path."""
+        raise NotImplementedError
+
+    def read_text(self, path: 'pathlib.Path') -> str:
+        """Read a file as text, with universal newlines like :meth:`pathlib.Path.read_text`.
+
+        :param path: the file to read
+        :return: the content of the file
+        """
+        return io.TextIOWrapper(
+            io.BytesIO(self.read_bytes(path)), encoding='utf-8'
+        ).read()
+
+    def glob(self, pattern: str) -> List['pathlib.Path']:
+        """List the files and folders matching a relative pattern without ``**``.
+
+        :param pattern: the pattern, relative to the root of the bundle
+        :return: the matching paths, sorted
+        """
+        raise NotImplementedError
+
+
+class DirectoryIndex(BundleIndex):
+    """Snapshot of a folder tree, taken with a single ``os.scandir`` walk on first use.
+
+    Hidden folders and symbolic links to folders are not walked: probes below them,
+    like probes outside of the folder, fall back to the file system.
+    """
+
+    writable = True
+
+    def __init__(self, root: 'pathlib.Path'):
+        """Create the index of a folder.
+
+        :param root: the folder to index
+        """
+        self.root = root
+        self._root = os.path.abspath(root)
+        self._files: Optional[Set[str]] = None
+        self._dirs: Set[str] = set()
+        self._unindexed: Set[str] = set()
+
+    def exists(self, path: 'pathlib.Path') -> bool:
+        """Whether a file or folder exists.
+
+        :param path: the path to probe
+        :return: True if the path exists
+        """
+        relpath = self._relative(path)
+        if relpath is None:
+            return path.exists()
+        return relpath in self._files or relpath in self._dirs
+
+    def is_file(self, path: 'pathlib.Path') -> bool:
+        """Whether a file exists.
+
+        :param path: the path to probe
+        :return: True if the path is a file
+        """
+        relpath = self._relative(path)
+        if relpath is None:
+            return path.is_file()
+        return relpath in self._files
+
+    def is_dir(self, path: 'pathlib.Path') -> bool:
+        """Whether a folder exists.
+
+        :param path: the path to probe
+        :return: True if the path is a folder
+        """
+        relpath = self._relative(path)
+        if relpath is None:
+            return path.is_dir()
+        return relpath in self._dirs
+
+    def read_bytes(self, path: 'pathlib.Path') -> bytes:
+        return pathlib.Path(path).read_bytes()
+
+    def read_text(self, path: 'pathlib.Path') -> str:
+        return pathlib.Path(path).read_text()
+
+    def iter_files(self) -> Iterator['pathlib.Path']:
+        if self._files is None:
+            self._scan()
+        for relpath in sorted(self._files):
+            yield self.root / relpath
+
+    def glob(self, pattern: str) -> List['pathlib.Path']:
+        return sorted(self.root.glob(pattern))
+
+    def _relative(self, path: 'pathlib.Path') -> Optional[str]:
+        if self._files is None:
+            self._scan()
+
+        relpath = os.path.relpath(os.path.abspath(path), self._root)
+        if relpath == os.curdir:
+            return ''
+        if relpath.split(os.sep, 1)[0] == os.pardir:
+            return None
+
+        parent = relpath
+        while parent:
+            parent = os.path.dirname(parent)
+            if parent in self._unindexed:
+                return None
+        return relpath
+
+    def _scan(self):
+        self._files = set()
+        self._dirs = {''}
+        pending = ['']
+        while pending:
+            relroot = pending.pop()
+            try:
+                entries = os.scandir(os.path.join(self._root, relroot))
+            except OSError:
+                self._unindexed.add(relroot)
+                continue
+            with entries:
+                for entry in entries:
+                    relpath = os.path.join(relroot, entry.name)
+                    if entry.is_dir():
+                        self._dirs.add(relpath)
+                        if entry.name.startswith('.') or entry.is_symlink():
+                            self._unindexed.add(relpath)
+                        else:
+                            pending.append(relpath)
+                    elif entry.is_file():
+                        self._files.add(relpath)
+
+
+class ArchiveIndex(BundleIndex):
+    """Zip or tar archive of a bundle, whose members are only read on demand.
+
+    The member table is read once when the index is created. A single top-level folder
+    holding the whole bundle, as in the archives of source repositories, is stripped.
+    Links, absolute and parent-relative members are ignored, and paths outside of the
+    archive do not exist.
+    """
+
+    def __init__(
+        self,
+        source: Union[str, 'os.PathLike', BinaryIO],
+        root: Optional['pathlib.Path'] = None,
+        max_member_bytes: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        max_members: Optional[int] = None,
+    ):
+        """Open an archive.
+
+        :param source: the path of the archive, or a seekable binary file object
+        :param root: the path the bundle files are addressed below, by default the
+            path of the archive, or ``bundle`` for a file object
+        :param max_member_bytes: maximum decompressed size of a member read,
+            ``ARCHIVE_MEMBER_MAX_BYTES`` if not given
+        :param max_total_bytes: maximum decompressed size of all the members read,
+            and of a tar archive, ``ARCHIVE_TOTAL_MAX_BYTES`` if not given
+        :param max_members: maximum number of members in the archive,
+            ``ARCHIVE_MAX_MEMBERS`` if not given
+        :raises ValueError: the source is neither a zip nor a tar archive
+        :raises ArchiveLimitError: the archive has too many members, or the member
+            table of a tar archive is past the decompressed size limit
+        """
+        self.max_member_bytes = max_member_bytes or ARCHIVE_MEMBER_MAX_BYTES
+        self.max_total_bytes = max_total_bytes or ARCHIVE_TOTAL_MAX_BYTES
+        self.max_members = max_members or ARCHIVE_MAX_MEMBERS
+        self._read_bytes = 0
+        self._owned = None
+        if isinstance(source, (str, os.PathLike)):
+            self.root = pathlib.Path(root or source)
+            fileobj = self._owned = open(source, 'rb')
+        else:
+            self.root = pathlib.Path(root or 'bundle')
+            fileobj = source
+        self._root = os.path.abspath(self.root)
+        self._lock = threading.Lock()
+        self._files: Dict[str, Union[zipfile.ZipInfo, tarfile.TarInfo]] = {}
+        self._dirs: Set[str] = {''}
+
+        try:
+            self._open(fileobj)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._owned is not None:
+            self._owned.close()
+            self._owned = None
+
+    def exists(self, path: 'pathlib.Path') -> bool:
+        relpath = self._relative(path)
+        return relpath in self._files or relpath in self._dirs
+
+    def is_file(self, path: 'pathlib.Path') -> bool:
+        return self._relative(path) in self._files
+
+    def is_dir(self, path: 'pathlib.Path') -> bool:
+        return self._relative(path) in self._dirs
+
+    def read_bytes(self, path: 'pathlib.Path') -> bytes:
+        member = self._files.get(self._relative(path))
+        if member is None:
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), str(path))
+        size = member.file_size if self._zip is not None else member.size
+        if size > self.max_member_bytes:
+            raise ArchiveLimitError(
+                f'{path} is larger than {self.max_member_bytes} bytes once decompressed'
+            )
+
+        with self._lock:
+            if self._read_bytes + size > self.max_total_bytes:
+                raise ArchiveLimitError(
+                    f'{self.root} is larger than {self.max_total_bytes} bytes once decompressed'
+                )
+            self._read_bytes += size
+            # the reads stop at the size declared in the member table
+            if self._zip is not None:
+                with self._zip.open(member) as fp:
+                    return fp.read(size)
+            return self._tar.extractfile(member).read(size)
+
+    def iter_files(self) -> Iterator['pathlib.Path']:
+        for relpath in sorted(self._files):
+            if not any(p.startswith('.') for p in relpath.split('/')[:-1]):
+                yield self.root / relpath
+
+    def glob(self, pattern: str) -> List['pathlib.Path']:
+        parts = pathlib.PurePosixPath(pattern).parts
+        return sorted(
+            self.root / relpath
+            for relpath in (*self._files, *self._dirs)
+            if relpath
+            and len(relpath.split('/')) == len(parts)
+            and all(map(fnmatchcase, relpath.split('/'), parts))
+        )
+
+    def _relative(self, path: 'pathlib.Path') -> Optional[str]:
+        relpath = os.path.relpath(os.path.abspath(path), self._root)
+        if relpath == os.curdir:
+            return ''
+        if relpath.split(os.sep, 1)[0] == os.pardir:
+            return None
+        return relpath.replace(os.sep, '/')
+
+    def _open(self, fileobj: BinaryIO):
+        self._zip = self._tar = None
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            try:
+                self._zip = zipfile.ZipFile(fileobj)
+            except zipfile.BadZipFile as ex:
+                raise ValueError(f'{self.root} is a broken zip archive') from ex
+            infos = self._zip.infolist()
+            self._check_members(len(infos))
+            members = [(m.filename, m, m.is_dir()) for m in infos]
+        else:
+            fileobj.seek(0)
+            try:
+                self._tar = tarfile.open(fileobj=fileobj, mode='r:*')
+            except tarfile.TarError as ex:
+                raise ValueError(
+                    f'{self.root} is neither a zip nor a tar archive'
+                ) from ex
+            members = []
+            # a compressed tar is decompressed up to the member read, its table is
+            # read lazily to stop as soon as it goes over the limits
+            for count, m in enumerate(self._tar, 1):
+                self._check_members(count)
+                if self._tar.offset > self.max_total_bytes:
+                    raise ArchiveLimitError(
+                        f'{self.root} is larger than {self.max_total_bytes} bytes once decompressed'
+                    )
+                if m.isfile() or m.isdir():
+                    members.append((m.name, m, m.isdir()))
+
+        entries = []
+        for name, member, is_dir in members:
+            parts = [p for p in name.split('/') if p not in ('', '.')]
+            if (
+                not parts
+                or name.startswith('/')
+                or '..' in parts
+                or parts[0] == '__MACOSX'
+            ):
+                continue
+            entries.append((parts, member, is_dir))
+
+        # strip the single top-level folder wrapping the whole bundle
+        tops = {parts[0] for parts, _, _ in entries}
+        if len(tops) == 1 and all(
+            len(parts) > 1 or is_dir for parts, _, is_dir in entries
+        ):
+            entries = [(parts[1:], m, d) for parts, m, d in entries if len(parts) > 1]
+
+        for parts, member, is_dir in entries:
+            self._dirs.update('/'.join(parts[:i]) for i in range(1, len(parts)))
+            if is_dir:
+                self._dirs.add('/'.join(parts))
+            else:
+                self._files['/'.join(parts)] = member
+
+    def _check_members(self, count: int):
+        if count > self.max_members:
+            raise ArchiveLimitError(
+                f'{self.root} holds more than {self.max_members} members'
+            )
+
+
+def is_archive(path: 'pathlib.Path') -> bool:
+    """Whether a path names a zip or tar archive, by its suffix.
+
+    :param path: the path to check
+    :return: True if the suffix is the one of an archive
+    """
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def open_bundle(path: 'pathlib.Path') -> BundleIndex:
+    """Open the index of an executor bundle, a folder or a zip or tar archive.
+
+    :param path: the folder or archive of the bundle
+    :return: the index of the bundle, to be closed after use
+    :raises ValueError: the file is neither a zip nor a tar archive
+    """
+    if path.is_dir():
+        return DirectoryIndex(path)
+    return ArchiveIndex(path)
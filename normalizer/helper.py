@@ -1,24 +1,35 @@
+import heapq
+import os
 import pathlib
-from typing import Dict, List
+from functools import lru_cache
+from typing import Dict, List, Optional
 import toml
 import re
 from pprint import pformat
 from loguru import logger
-from jinja2 import Environment, FileSystemLoader
-from jina.jaml import JAML
-from importlab.import_finder import get_imports
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader, Template
 from importlab.resolve import convert_to_path
-from . import __resources_path__
+from .excepts import DependencyError
+from .fs import BundleIndex
+from .resources import get_resource
+from .versions import get_resolver
 
 
-def convert_from_to_path(from_state, base_dir: 'pathlib.Path' = pathlib.Path('.')):
+def convert_from_to_path(
+    from_state,
+    base_dir: 'pathlib.Path' = pathlib.Path('.'),
+    index: Optional[BundleIndex] = None,
+):
     """
     Convert a state name to a path.
 
     :param from_state: the state name
     :param base_dir: the base directory to search
+    :param index: the index of the executor folder, probe the file system if not given
     :return: the path to the state
     """
+    exists = index.exists if index is not None else pathlib.Path.exists
+
     for i, c in enumerate(from_state):
         if c != '.':
             break
@@ -28,19 +39,20 @@ def convert_from_to_path(from_state, base_dir: 'pathlib.Path' = pathlib.Path('.'
     else:
         path_name = from_state.replace('.', '/')
 
-    if base_dir.joinpath(path_name + '.py').exists():
+    if exists(base_dir.joinpath(path_name + '.py')):
         return base_dir.joinpath(path_name + '.py')
-    elif base_dir.joinpath(path_name + '/__init__.py').exists():
+    elif exists(base_dir.joinpath(path_name + '/__init__.py')):
         return base_dir.joinpath(path_name + '/__init__.py')
     return None
 
 
 def load_manifest(yaml_path: 'pathlib.Path') -> Dict:
     """Load manifest of executor from YAML file."""
-    with open(__resources_path__ / 'manifest.yml') as fp:
-        tmp = JAML.load(
-            fp
-        )  # do not expand variables at here, i.e. DO NOT USE expand_dict(yaml.load(fp))
+    from jina.jaml import JAML
+
+    tmp = JAML.load(
+        get_resource('manifest.yml')
+    )  # do not expand variables at here, i.e. DO NOT USE expand_dict(yaml.load(fp))
 
     if yaml_path.exists():
         with open(yaml_path) as fp:
@@ -70,11 +82,21 @@ def convert_version(version: str) -> str:
     return version
 
 
-def get_dependencies_from_pyproject(pyproject_path: 'pathlib.Path') -> List[str]:
-    """Extract dependencies from pyproject.toml file."""
+def get_dependencies_from_pyproject(
+    pyproject_path: 'pathlib.Path', content: Optional[str] = None
+) -> List[str]:
+    """Extract dependencies from pyproject.toml file.
+
+    :param pyproject_path: the pyproject.toml file
+    :param content: the content of the file, read from ``pyproject_path`` if omitted
+    :return: the dependencies in the requirements.txt format
+    """
     try:
-        with open(pyproject_path, 'r') as f:
-            pyproject = toml.load(f)
+        if content is not None:
+            pyproject = toml.loads(content)
+        else:
+            with open(pyproject_path, 'r') as f:
+                pyproject = toml.load(f)
 
         # Try to extract dependencies from different sections of pyproject.toml
         dependencies = pyproject.get('project', {}).get('dependencies')
@@ -107,68 +129,186 @@ def get_dependencies_from_pyproject(pyproject_path: 'pathlib.Path') -> List[str]
         return []
 
 
-def get_config_template():
+class _AtomicBytecodeCache(FileSystemBytecodeCache):
+    """Bytecode cache whose files are never seen half written by concurrent processes."""
+
+    def dump_bytecode(self, bucket):
+        filename = self._get_cache_filename(bucket)
+        tmp_filename = f'{filename}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_filename, 'wb') as f:
+                bucket.write_bytecode(f)
+            os.replace(tmp_filename, filename)
+        except OSError as ex:
+            logger.warning(
+                f'=> failed to cache the compiled template {bucket.key}: {ex}'
+            )
+
+
+def _load_template_source(name: str):
+    # the resources never change while the process runs
+    return get_resource(f'templates/{name}'), None, lambda: True
+
+
+@lru_cache(maxsize=None)
+def get_template_env() -> Environment:
+    """Return the Jinja2 environment of the templates, created once per process.
+
+    The templates are compiled once per process, and their bytecode is cached in the
+    folder ``NORMALIZER_TEMPLATE_CACHE_DIR`` (a temporary folder by default) so that
+    restarted processes skip the compilation.
+
+    :return: the shared environment
+    """
+    cache_dir = os.environ.get('NORMALIZER_TEMPLATE_CACHE_DIR')
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+    return Environment(
+        loader=FunctionLoader(_load_template_source),
+        bytecode_cache=_AtomicBytecodeCache(cache_dir),
+    )
+
+
+def render_template(name: str, **context) -> str:
+    """Render a template of ``normalizer/resources/templates``.
+
+    :param name: the name of the template, e.g. ``config.yml.jinja2``
+    :param context: the variables of the template
+    :return: the rendered template
+    """
+    return get_template_env().get_template(name).render(**context)
+
+
+def get_config_template() -> Template:
     """Load a Jinja2 template for config.yml"""
-    env = Environment(loader=FileSystemLoader(__resources_path__ / 'templates'))
-    return env.get_template('config.yml.jinja2')
+    return get_template_env().get_template('config.yml.jinja2')
 
 
-def resolve_import(name, alias, is_from, is_star, work_path):
+def resolve_import(name, alias, is_from, is_star, work_path, index=None):
     """Use python to resolve an import.
 
     :argument name: The fully qualified module name.
+    :argument index: The index of the executor folder, probe the file system if None.
     :returns: the path to the module source file or None.
     """
+    is_dir = index.is_dir if index is not None else pathlib.Path.is_dir
+    exists = index.exists if index is not None else pathlib.Path.exists
 
     py_path = work_path / pathlib.Path(convert_to_path(name)[0])
 
     while True:
-        if py_path.is_dir():
-            if (py_path / '__init__.py').exists():
+        if is_dir(py_path):
+            if exists(py_path / '__init__.py'):
                 return py_path / '__init__.py'
             return None
 
-        if py_path.with_suffix('.py').exists():
+        if exists(py_path.with_suffix('.py')):
             return py_path.with_suffix('.py')
         else:
             py_path = py_path.parent
 
 
-# copy from: https://stackoverflow.com/a/11564323
 def topological_sort(source):
-    """perform topo sort on elements.
+    """perform topo sort on elements with Kahn's algorithm.
+
+    The order is the one of repeatedly sweeping ``source`` and emitting every name
+    whose dependancies were emitted before: the ready names are kept in a heap keyed
+    by ``(sweep, position)`` instead of rescanning all the pending names.
 
     :argument source: list of ``(name, [list of dependancies])`` pairs
     :returns: list of names, with dependancies listed first
+    :raises DependencyError: the cyclic or missing dependancies
     """
-    pending = [
-        (name, set(deps)) for name, deps in source
-    ]  # copy deps so we can modify set in-place
-    emitted = []
-    while pending:
-        next_pending = []
-        next_emitted = []
-        for entry in pending:
-            name, deps = entry
-            deps.difference_update(emitted)  # remove deps we emitted last pass
-            if deps:  # still has deps? recheck during next pass
-                next_pending.append(entry)
-            else:  # no more deps? time to emit
-                yield name
-                emitted.append(
-                    name
-                )  # <-- not required, but helps preserve original ordering
-                next_emitted.append(
-                    name
-                )  # remember what we emitted for difference_update() in next pass
-        if (
-            not next_emitted
-        ):  # all entries have unmet deps, one of two things is wrong...
-            raise ValueError(
-                'cyclic or missing dependancy detected: %r' % (next_pending,)
-            )
-        pending = next_pending
-        emitted = next_emitted
+    names = [name for name, _ in source]
+    index = {name: i for i, name in enumerate(names)}
+    dependents = [[] for _ in names]
+    in_degree = [0] * len(names)
+    sweep = [0] * len(names)
+    missing = {}
+
+    for i, (name, deps) in enumerate(source):
+        for dep in set(deps):
+            in_degree[i] += 1
+            if dep in index:
+                dependents[index[dep]].append(i)
+            else:
+                missing.setdefault(dep, []).append(name)
+
+    ready = [(0, i) for i, degree in enumerate(in_degree) if degree == 0]
+    emitted = 0
+    while ready:
+        _, i = heapq.heappop(ready)
+        yield names[i]
+        emitted += 1
+        for j in dependents[i]:
+            # a name listed before its dependancy is only reached by the next sweep
+            sweep[j] = max(sweep[j], sweep[i] + (1 if j < i else 0))
+            in_degree[j] -= 1
+            if in_degree[j] == 0:
+                heapq.heappush(ready, (sweep[j], j))
+
+    if emitted < len(names):
+        pending = [i for i, degree in enumerate(in_degree) if degree > 0]
+        errors = [
+            f'missing dependancy {dep!r} required by {required_by!r}'
+            for dep, required_by in missing.items()
+        ] + [
+            f'cyclic dependancy detected: {[names[i] for i in component]!r}'
+            for component in _strongly_connected_components(pending, dependents)
+        ]
+        raise DependencyError('; '.join(errors))
+
+
+def _strongly_connected_components(nodes: List[int], edges: List[List[int]]):
+    """Find the cycles among ``nodes`` with an iterative Tarjan's algorithm.
+
+    :param nodes: the indices of the nodes to consider
+    :param edges: the adjacency list of all the nodes
+    :return: the components of more than one node, or of a node depending on itself
+    """
+    considered = set(nodes)
+    order = {}
+    low_link = {}
+    stack = []
+    on_stack = set()
+    components = []
+
+    for root in nodes:
+        if root in order:
+            continue
+        work = [(root, iter(edges[root]))]
+        order[root] = low_link[root] = len(order)
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in considered:
+                    continue
+                if child not in order:
+                    order[child] = low_link[child] = len(order)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(edges[child])))
+                    break
+                if child in on_stack:
+                    low_link[node] = min(low_link[node], order[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low_link[parent] = min(low_link[parent], low_link[node])
+                if low_link[node] == order[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges[node]:
+                        components.append(sorted(component))
+    return components
 
 
 def choose_jina_version(client_version: str) -> str:
@@ -188,20 +328,13 @@ def choose_jina_version(client_version: str) -> str:
 
 
 def get_jina_latest_version() -> str:
-    try:
-        from urllib.request import Request, urlopen
-        import json
+    """Return the latest Jina release known to the cached version resolver.
 
-        req = Request(
-            'https://pypi.org/pypi/jina/json', headers={'User-Agent': 'Mozilla/5.0'}
-        )
-
-        with urlopen(req, timeout=1) as resource:
-            latest_ver = json.load(resource)['info']['version']
+    The lookup never waits on the package index, see :class:`JinaVersionResolver`.
 
-            return latest_ver
-    except:
-        return None
+    :return: the latest version, or None if it is not resolved yet
+    """
+    return get_resolver().latest()
 
 
 def get_jina_image_tag(jina_version, py_version):
@@ -11,7 +11,8 @@ class ArgModel(BaseModel):
 
 
 class KWArgModel(ArgModel):
-    default: str
+    # None for the keyword-only arguments without default
+    default: Optional[str]
 
 
 class FuncArgsModel(BaseModel):
@@ -32,6 +33,8 @@ class ExecutorModel(BaseModel):
     endpoints: List[EndpointArgsModel]
     hubble_score_metrics: Dict
     filepath: str
+    # the files generated by a dry run, keyed by path relative to the executor folder
+    artifacts: Optional[Dict[str, str]] = None
 
 
 class PackagePayload(BaseModel):
@@ -40,6 +43,17 @@ class PackagePayload(BaseModel):
     env: Optional[Dict] = {}
     dockerfile: Optional[str] = None
     dockerfile_syntax: Optional[str] = None
+    dry_run: bool = False
+
+
+class BatchPackagePayload(BaseModel):
+    package_paths: List[Path] = []
+    packages_dir: Optional[Path] = None
+    meta: Optional[Dict] = {'jina': 'master'}
+    env: Optional[Dict] = {}
+    dockerfile: Optional[str] = None
+    dockerfile_syntax: Optional[str] = None
+    dry_run: bool = False
 
 
 class NormalizeResult(BaseModel):
@@ -47,3 +61,7 @@ class NormalizeResult(BaseModel):
     code: int
     data: Optional[ExecutorModel]
     message: str
+
+
+class BatchNormalizeResult(NormalizeResult):
+    package_path: str
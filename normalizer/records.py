@@ -0,0 +1,56 @@
+"""Compact records of the executors found by inspecting python modules.
+
+They are built once by the inspection and converted to the response models without
+revalidation, see :func:`normalizer.core.to_dto`.
+"""
+import pathlib
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+@dataclass
+class ArgRecord:
+    """A positional argument of a function."""
+
+    __slots__ = ('arg', 'annotation')
+
+    arg: str
+    annotation: Optional[str]
+
+
+@dataclass
+class KWArgRecord:
+    """An argument of a function with a default value."""
+
+    __slots__ = ('arg', 'annotation', 'default')
+
+    arg: str
+    annotation: Optional[str]
+    default: Optional[str]
+
+
+@dataclass
+class FuncRecord:
+    """The ``__init__`` or an endpoint of an executor."""
+
+    __slots__ = ('name', 'args', 'kwargs', 'docstring', 'requests')
+
+    name: str
+    args: List[ArgRecord]
+    kwargs: List[KWArgRecord]
+    docstring: Optional[str]
+    # the endpoints handled, None for the ``__init__``
+    requests: Optional[str]
+
+
+@dataclass
+class ExecutorRecord:
+    """An executor class and the module defining it."""
+
+    __slots__ = ('name', 'filepath', 'docstring', 'init', 'endpoints')
+
+    name: str
+    filepath: 'pathlib.Path'
+    docstring: Optional[str]
+    init: Optional[FuncRecord]
+    endpoints: List[FuncRecord]
@@ -0,0 +1,38 @@
+"""Read-only cache of the files shipped in ``normalizer/resources``."""
+import threading
+from types import MappingProxyType
+from typing import Mapping
+
+from . import __resources_path__
+
+_resources: Mapping[str, str] = MappingProxyType({})
+_lock = threading.Lock()
+
+
+def preload_resources() -> Mapping[str, str]:
+    """Read all the resource files at once, e.g. before forking worker processes.
+
+    :return: immutable mapping of the resource paths, relative to the resources folder,
+        to their content
+    """
+    global _resources
+    with _lock:
+        if not _resources:
+            _resources = MappingProxyType(
+                {
+                    path.relative_to(__resources_path__).as_posix(): path.read_text()
+                    for path in sorted(__resources_path__.rglob('*'))
+                    if path.is_file()
+                }
+            )
+    return _resources
+
+
+def get_resource(name: str) -> str:
+    """Return the content of a resource file, loading all of them on first use.
+
+    :param name: path of the file relative to the resources folder, e.g. ``manifest.yml``
+    :return: the content of the file
+    """
+    resources = _resources or preload_resources()
+    return resources[name]
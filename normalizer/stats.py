@@ -0,0 +1,38 @@
+"""Wall time spent in the stages of a normalize run, and counters of its work."""
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class RunStats:
+    """Accumulate the wall time spent in the named stages of a normalize run.
+
+    The timings are plain floats keyed by stage name and the counters plain ints, so
+    that they can be sent back from the worker process running the normalize.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+
+    def count(self, name: str, value: int = 1):
+        """Add to a counter.
+
+        :param name: the name of the counter
+        :param value: the amount to add
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a stage, adding up the time of repeated stages of the same name.
+
+        :param name: the name of the stage
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = (
+                self.timings.get(name, 0.0) + time.perf_counter() - start
+            )
@@ -0,0 +1,191 @@
+"""Resolve the latest released Jina version without blocking on the package index."""
+import json
+import os
+import pathlib
+import threading
+import time
+import weakref
+from typing import Optional
+
+from loguru import logger
+
+DEFAULT_INDEX_URL = 'https://pypi.org/pypi/jina/json'
+
+# the resolvers whose refresh state is reset in forked children
+_resolvers: 'weakref.WeakSet[JinaVersionResolver]' = weakref.WeakSet()
+
+
+def _reset_resolvers_after_fork():
+    for resolver in list(_resolvers):
+        resolver._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_resolvers_after_fork)
+
+
+class JinaVersionResolver:
+    """Cache the latest Jina release with TTL and stale-while-revalidate semantics.
+
+    Lookups never wait on the network: a fresh value is returned as is, a stale value
+    is returned while a background thread revalidates it, and a missing value yields
+    ``None`` until the first refresh lands. The last known release can be persisted
+    to a snapshot file so that a cold process starts with a usable value.
+    """
+
+    def __init__(
+        self,
+        index_url: str = DEFAULT_INDEX_URL,
+        ttl: float = 3600,
+        stale_ttl: float = 7 * 24 * 3600,
+        retry_interval: float = 60,
+        timeout: float = 1,
+        snapshot_path: Optional['pathlib.Path'] = None,
+    ):
+        """Create a resolver.
+
+        :param index_url: JSON API endpoint of the package index, PyPI compatible
+        :param ttl: seconds during which a resolved version is considered fresh
+        :param stale_ttl: seconds after expiry during which a stale version is still served
+        :param retry_interval: minimum seconds between two failed refresh attempts
+        :param timeout: timeout in seconds of a single index request
+        :param snapshot_path: optional file used to persist the resolved version
+        """
+        self.index_url = index_url
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.retry_interval = retry_interval
+        self.timeout = timeout
+        self.snapshot_path = snapshot_path
+
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._version = None
+        self._fetched_at = 0.0
+        self._next_attempt = 0.0
+
+        if snapshot_path:
+            self._load_snapshot()
+
+        _resolvers.add(self)
+
+    def latest(self, block: bool = False) -> Optional[str]:
+        """Return the latest known Jina version.
+
+        :param block: if True and no usable version is cached, refresh synchronously
+        :return: the latest version, or None if it is unknown
+        """
+        age = time.time() - self._fetched_at
+        version = self._version if age < self.ttl + self.stale_ttl else None
+
+        if version is None and block:
+            return self.refresh()
+
+        if age >= self.ttl:
+            self._revalidate()
+        return version
+
+    def refresh(self) -> Optional[str]:
+        """Fetch the latest version from the index and update the cache.
+
+        :return: the fetched version, or the cached one if the index is unreachable
+        """
+        try:
+            version = self._fetch()
+        except Exception as ex:
+            logger.debug(
+                f'=> failed to resolve jina version from {self.index_url}: {ex}'
+            )
+            self._next_attempt = time.time() + self.retry_interval
+            return self._version
+
+        with self._lock:
+            self._version = version
+            self._fetched_at = time.time()
+        if self.snapshot_path:
+            self._dump_snapshot()
+        return version
+
+    def _revalidate(self):
+        with self._lock:
+            if self._refreshing or time.time() < self._next_attempt:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=_run, name='jina-version-resolver', daemon=True).start()
+
+    def _after_fork(self):
+        # the refresh thread of the parent does not exist in the child
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _fetch(self) -> str:
+        from urllib.request import Request, urlopen
+
+        req = Request(self.index_url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urlopen(req, timeout=self.timeout) as resource:
+            return json.load(resource)['info']['version']
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path) as fp:
+                snapshot = json.load(fp)
+            self._version = snapshot['version']
+            self._fetched_at = float(snapshot['fetched_at'])
+        except FileNotFoundError:
+            pass
+        except Exception as ex:
+            logger.warning(
+                f'=> ignore broken jina version snapshot {self.snapshot_path}: {ex}'
+            )
+
+    def _dump_snapshot(self):
+        tmp_path = pathlib.Path(f'{self.snapshot_path}.{os.getpid()}.tmp')
+        try:
+            with open(tmp_path, 'w') as fp:
+                json.dump(
+                    {'version': self._version, 'fetched_at': self._fetched_at}, fp
+                )
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as ex:
+            logger.warning(
+                f'=> failed to write jina version snapshot {self.snapshot_path}: {ex}'
+            )
+
+
+_resolver: Optional[JinaVersionResolver] = None
+
+
+def get_resolver() -> JinaVersionResolver:
+    """Return the process-wide resolver, configured from the environment on first use.
+
+    Supported variables are ``JINA_VERSION_INDEX_URL``, ``JINA_VERSION_TTL``,
+    ``JINA_VERSION_STALE_TTL`` and ``JINA_VERSION_SNAPSHOT``.
+
+    :return: the shared resolver
+    """
+    global _resolver
+    if _resolver is None:
+        snapshot_path = os.environ.get('JINA_VERSION_SNAPSHOT')
+        _resolver = JinaVersionResolver(
+            index_url=os.environ.get('JINA_VERSION_INDEX_URL', DEFAULT_INDEX_URL),
+            ttl=float(os.environ.get('JINA_VERSION_TTL', 3600)),
+            stale_ttl=float(os.environ.get('JINA_VERSION_STALE_TTL', 7 * 24 * 3600)),
+            snapshot_path=pathlib.Path(snapshot_path) if snapshot_path else None,
+        )
+    return _resolver
+
+
+def set_resolver(resolver: Optional[JinaVersionResolver]):
+    """Replace the process-wide resolver, e.g. with one pointing at a local mirror.
+
+    :param resolver: the resolver to use, or None to rebuild it from the environment
+    """
+    global _resolver
+    _resolver = resolver
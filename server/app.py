@@ -1,11 +1,24 @@
+import asyncio
+
 from fastapi import APIRouter, FastAPI
+from fastapi.responses import PlainTextResponse
 from loguru import logger
+from starlette.concurrency import run_in_threadpool
 from starlette.config import Config
 
 import server
 
-from server.routes.normalizer import router as normalizer_router
-from server.routes.generator import router as generator_router
+from server.metrics import metrics_response
+from server.middleware import BodySizeLimitMiddleware
+from server.routes.normalizer import (
+    NORMALIZER_UPLOAD_MAX_BYTES,
+    UPLOAD_FORM_MAX_BYTES,
+    UPLOAD_PATH,
+    router as normalizer_router,
+    pool as normalizer_pool,
+)
+from server.routes.generator import router as generator_router, pool as generator_pool
+from server.tasks import warm_up
 
 APP_VERSION = server.__version__
 APP_NAME = 'Jina Hubble Python Services'
@@ -14,17 +27,57 @@ config = Config()
 
 IS_DEBUG: bool = config('IS_DEBUG', cast=bool, default=False)
 
+NORMALIZER_PREFIX = '/normalizer/api/v1'
+
 
 def create_app() -> FastAPI:
     fast_app = FastAPI(title=APP_NAME, version=APP_VERSION, debug=IS_DEBUG)
 
     api_router = APIRouter()
 
-    api_router.include_router(normalizer_router, tags=['normalizer'], prefix='/normalizer/api/v1')
-    api_router.include_router(generator_router, tags=['generator'], prefix='/generator/api/v1')
+    api_router.include_router(
+        normalizer_router, tags=['normalizer'], prefix=NORMALIZER_PREFIX
+    )
+    api_router.include_router(
+        generator_router, tags=['generator'], prefix='/generator/api/v1'
+    )
 
     fast_app.include_router(api_router)
 
+    # the uploads over the limit are rejected before they are received
+    fast_app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_bytes=NORMALIZER_UPLOAD_MAX_BYTES + UPLOAD_FORM_MAX_BYTES,
+        paths=[f'{NORMALIZER_PREFIX}{UPLOAD_PATH}'],
+    )
+
+    fast_app.state.ready = False
+    fast_app.state.starting = None
+
+    async def start_pools():
+        try:
+            # warm up before forking the workers, so that they share the loaded pages
+            await run_in_threadpool(warm_up)
+            await normalizer_pool.start()
+            await generator_pool.start()
+        except Exception:
+            logger.exception('Failed to start the workers')
+            return
+        fast_app.state.ready = True
+
+    @fast_app.on_event('startup')
+    async def start():
+        # uvicorn serves the requests once the startup handlers return, the workers
+        # are started in background so that /ready answers 503 until then
+        fast_app.state.starting = asyncio.ensure_future(start_pools())
+
+    @fast_app.on_event('shutdown')
+    def shutdown_pools():
+        if fast_app.state.starting is not None:
+            fast_app.state.starting.cancel()
+        normalizer_pool.shutdown()
+        generator_pool.shutdown()
+
     from fastapi.openapi.docs import (
         get_redoc_html,
         get_swagger_ui_html,
@@ -55,11 +108,21 @@ def create_app() -> FastAPI:
             title=fast_app.title + ' - ReDoc',
             # redoc_js_url='/static/redoc.standalone.js',
         )
-    
+
     @fast_app.get(f'/ping', include_in_schema=False)
     async def ping():
         return 'pong'
 
+    @fast_app.get(f'/ready', include_in_schema=False)
+    async def ready():
+        if not fast_app.state.ready:
+            return PlainTextResponse('starting', status_code=503)
+        return 'ready'
+
+    @fast_app.get(f'/metrics', include_in_schema=False)
+    async def metrics():
+        return metrics_response()
+
     return fast_app
 
 
@@ -7,5 +7,8 @@ class ErrorCode(Enum):
     ExecutorExists = 4001
     IllegalExecutor = 4002
     BrokenDependency = 4003
+    Busy = 4004
+    IllegalArchive = 4005
 
     Others = 5000
+    Timeout = 5001
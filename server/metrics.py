@@ -0,0 +1,56 @@
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from starlette.responses import Response
+
+from normalizer.stats import RunStats
+from server.errors import ErrorCode
+
+REQUESTS = Counter(
+    'normalizer_requests_total',
+    'Normalize requests by route and result code.',
+    ['route', 'code'],
+)
+REQUEST_LATENCY = Histogram(
+    'normalizer_request_duration_seconds',
+    'Latency of normalize requests, queueing included.',
+    ['route'],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+STAGE_LATENCY = Histogram(
+    'normalizer_stage_duration_seconds',
+    'Time spent in each stage of normalize.',
+    ['stage'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+RUN_COUNTERS = Counter(
+    'normalizer_run_total',
+    'Work done by normalize, e.g. the python modules inspected or skipped.',
+    ['counter'],
+)
+
+
+def code_label(code: int) -> str:
+    if code == 200:
+        return 'Success'
+    try:
+        return ErrorCode(code).name
+    except ValueError:
+        return str(code)
+
+
+def observe_normalize(
+    route: str, code: int, seconds: float, stats: Optional[RunStats] = None
+):
+    REQUESTS.labels(route=route, code=code_label(code)).inc()
+    REQUEST_LATENCY.labels(route=route).observe(seconds)
+    if stats is None:
+        return
+    for stage, stage_seconds in stats.timings.items():
+        STAGE_LATENCY.labels(stage=stage).observe(stage_seconds)
+    for counter, value in stats.counters.items():
+        RUN_COUNTERS.labels(counter=counter).inc(value)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
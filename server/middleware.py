@@ -0,0 +1,75 @@
+import json
+from typing import Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class BodySizeLimitMiddleware:
+    """Answer ``413`` to the requests of some paths whose body is over a size limit.
+
+    The declared ``Content-Length`` is checked before the body is received, and the
+    bytes received are counted for the chunked requests, so that large bodies are
+    rejected before the route parses and spools them.
+
+    The route must not answer before it has received the whole body.
+    """
+
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Iterable[str]):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = set(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or scope['path'] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope['headers'])
+        try:
+            declared = int(headers.get(b'content-length', b'0'))
+        except ValueError:
+            declared = 0
+        if declared > self.max_bytes:
+            await self._reject(send)
+            return
+
+        received = 0
+        too_large = False
+
+        async def _receive() -> Message:
+            nonlocal received, too_large
+            if too_large:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > self.max_bytes:
+                    # the route stops reading as if the client went away
+                    too_large = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def _send(message: Message):
+            # the response of the route to the interrupted body is replaced
+            if not too_large:
+                await send(message)
+
+        await self.app(scope, _receive, _send)
+        if too_large:
+            await self._reject(send)
+
+    async def _reject(self, send: Send):
+        body = json.dumps(
+            {'detail': f'The request body is larger than {self.max_bytes} bytes.'}
+        ).encode()
+        await send(
+            {
+                'type': 'http.response.start',
+                'status': 413,
+                'headers': [
+                    (b'content-type', b'application/json'),
+                    (b'content-length', str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({'type': 'http.response.body', 'body': body})
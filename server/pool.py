@@ -0,0 +1,142 @@
+import asyncio
+import os
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Deque, Optional
+
+from loguru import logger
+
+
+def _noop():
+    pass
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the pool has no free worker nor queue slot left."""
+
+
+class BoundedPool:
+    """Run blocking functions in a worker pool without blocking the event loop.
+
+    At most ``max_workers + max_queue`` calls are in flight, further calls are
+    rejected with :class:`PoolSaturatedError` so that callers can apply back-pressure,
+    or wait for a free slot when they are submitted with ``wait=True``.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout: Optional[float] = None,
+        executor_class: Callable[..., Executor] = ProcessPoolExecutor,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = self.max_workers if max_queue is None else max_queue
+        self.timeout = timeout
+        self._executor_class = executor_class
+        self._initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_class(
+                max_workers=self.max_workers, initializer=self._initializer
+            )
+        return self._executor
+
+    async def start(self):
+        """Start the workers now instead of on the first call.
+
+        Forked workers share the memory pages of the parent process loaded so far.
+        """
+        futures = [self.executor.submit(os.getpid) for _ in range(self.max_workers)]
+        pids = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+        logger.info(f'Started {len(set(pids))} workers of {self.max_workers}')
+
+    async def run(
+        self,
+        fn: Callable,
+        *args,
+        wait: bool = False,
+        on_done: Optional[Callable[[], None]] = None,
+        **kwargs,
+    ):
+        """Run ``fn(*args, **kwargs)`` in a worker.
+
+        ``on_done`` is called once the call really finishes, even after a timeout, or
+        right away when it is not submitted, e.g. to release what the call uses.
+        """
+        if on_done is None:
+            on_done = _noop
+        waiter = None
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                if not wait:
+                    on_done()
+                    raise PoolSaturatedError
+                waiter = asyncio.get_running_loop().create_future()
+                self._waiters.append(waiter)
+            else:
+                self._pending += 1
+
+        if waiter is not None:
+            try:
+                # the slot is handed over by the call releasing it
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    queued = waiter in self._waiters
+                    if queued:
+                        self._waiters.remove(waiter)
+                # a slot handed over before the cancellation must be passed on
+                if not queued and not waiter.cancelled():
+                    self._release()
+                on_done()
+                raise
+
+        try:
+            future = self.executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._release()
+            on_done()
+            raise
+
+        def _done(_):
+            # the slot is released when the call really finishes, not when it times out
+            self._release()
+            on_done()
+
+        future.add_done_callback(_done)
+
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def shutdown(self):
+        if self._executor is not None:
+            logger.info(f'Shutdown {self._executor.__class__.__name__}')
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _release(self):
+        with self._lock:
+            if not self._waiters:
+                self._pending -= 1
+                return
+            waiter = self._waiters.popleft()
+
+        def _wake():
+            if waiter.done():
+                self._release()
+            else:
+                waiter.set_result(None)
+
+        waiter.get_loop().call_soon_threadsafe(_wake)
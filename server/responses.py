@@ -0,0 +1,24 @@
+"""JSON responses serialized once with orjson, bypassing the response model validation."""
+from typing import Any
+
+import orjson
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize a pydantic model, already validated, or JSON compatible content."""
+    if isinstance(content, BaseModel):
+        content = content.dict()
+    return orjson.dumps(content, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ModelResponse(JSONResponse):
+    """Response of a pydantic model, returned as is by the routes.
+
+    FastAPI does not validate and encode again the responses returned by the routes
+    against their ``response_model``, which only documents them.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -1,36 +1,170 @@
+import asyncio
 import datetime
-from fastapi import APIRouter, BackgroundTasks
+from typing import Dict, Tuple
+
+from fastapi import APIRouter
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import FileResponse
+from fastapi.responses import JSONResponse, Response
+from starlette.config import Config
 from starlette.requests import Request
 from loguru import logger
 
-from generator.models import PackagePayload
-from generator.core import generate as generate_yaml, clean as clean_yaml
+from generator.cache import Artifact, ArtifactCache, artifact_key
+from generator.models import BatchPackagePayload, InvalidatePayload, PackagePayload
+from server.errors import ErrorCode
+from server.pool import BoundedPool, PoolSaturatedError
+from server.tasks import generate_batch_package, generate_package, warm_up_generator
+
+config = Config()
+
+GENERATOR_WORKERS: int = config('GENERATOR_WORKERS', cast=int, default=0)
+GENERATOR_QUEUE_SIZE: int = config('GENERATOR_QUEUE_SIZE', cast=int, default=0)
+GENERATOR_TIMEOUT: float = config('GENERATOR_TIMEOUT', cast=float, default=60)
+GENERATOR_CACHE_ENTRIES: int = config('GENERATOR_CACHE_ENTRIES', cast=int, default=512)
+GENERATOR_CACHE_BYTES: int = config(
+    'GENERATOR_CACHE_BYTES', cast=int, default=64 * 1024 * 1024
+)
 
 router = APIRouter()
 
+pool = BoundedPool(
+    max_workers=GENERATOR_WORKERS or None,
+    max_queue=GENERATOR_QUEUE_SIZE or None,
+    timeout=GENERATOR_TIMEOUT,
+    initializer=warm_up_generator,
+)
+
+cache = ArtifactCache(
+    max_entries=GENERATOR_CACHE_ENTRIES,
+    max_bytes=GENERATOR_CACHE_BYTES,
+)
+
+# generations in flight, shared by the identical requests received meanwhile
+_inflight: Dict[Tuple[str, str, str], 'asyncio.Future'] = {}
+
+
+def _busy_response() -> Response:
+    return JSONResponse(
+        status_code=429,
+        content={
+            'code': ErrorCode.Busy.value,
+            'message': 'Too many deployments are being generated, please retry later.',
+        },
+    )
+
+
+def _timeout_response(subject: str) -> Response:
+    return JSONResponse(
+        status_code=504,
+        content={
+            'code': ErrorCode.Timeout.value,
+            'message': f'{subject} not generated within {pool.timeout} seconds.',
+        },
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags or f'W/{etag}' in tags
+
+
+def _artifact_response(
+    request: Request, block_data: PackagePayload, artifact: Artifact
+) -> Response:
+    # clients revalidate, the entries are dropped when the executor is republished
+    headers = {'ETag': artifact.etag, 'Cache-Control': 'no-cache'}
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and _etag_matches(if_none_match, artifact.etag):
+        return Response(status_code=304, headers=headers)
+
+    filename = f'{block_data.type}.{artifact.file_type}'
+    headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return Response(
+        artifact.content, media_type='application/octet-stream', headers=headers
+    )
+
+
+async def _generate(block_data: PackagePayload, key: Tuple[str, str, str]) -> Artifact:
+    future = _inflight.get(key)
+    if future is None:
+        epoch = cache.epoch
+
+        async def _run():
+            try:
+                content, file_type = await pool.run(generate_package, block_data)
+            finally:
+                _inflight.pop(key, None)
+            return cache.put(key, content, file_type, epoch=epoch)
+
+        future = _inflight[key] = asyncio.ensure_future(_run())
+
+    # a client going away does not cancel the generation awaited by the others
+    return await asyncio.shield(future)
+
+
 @router.post('/generate')
 async def generate(
     request: Request,
     block_data: PackagePayload,
-    background_tasks: BackgroundTasks,
 ):
     now = datetime.datetime.now()
 
-    (path, file_type) = generate_yaml(
-        block_data.executor,
-        block_data.type,
-        block_data.protocol
+    logger.opt(lazy=True).info(
+        '{}',
+        lambda: {
+            'payload': jsonable_encoder(block_data),
+            'time_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+        },
     )
-    # Remove the file after the request is done
-    background_tasks.add_task(clean_yaml, path)
 
-    logger.info(
-        {
+    key = artifact_key(block_data.executor, block_data.type, block_data.protocol)
+    artifact = cache.get(key)
+    if artifact is not None:
+        return _artifact_response(request, block_data, artifact)
+
+    # the Flow export blocks, it runs in the pool to keep the event loop responsive
+    try:
+        artifact = await _generate(block_data, key)
+    except PoolSaturatedError:
+        return _busy_response()
+    except asyncio.TimeoutError:
+        return _timeout_response('The deployment is')
+
+    return _artifact_response(request, block_data, artifact)
+
+
+@router.post('/generate/batch')
+async def generate_batch(
+    request: Request,
+    block_data: BatchPackagePayload,
+):
+    now = datetime.datetime.now()
+
+    logger.opt(lazy=True).info(
+        '{}',
+        lambda: {
             'payload': jsonable_encoder(block_data),
             'time_at': now.strftime('%Y-%m-%d %H:%M:%S'),
-        }
+        },
     )
 
-    return FileResponse(path, media_type='application/octet-stream', filename=f'{block_data.type}.{file_type}')
+    try:
+        content = await pool.run(generate_batch_package, block_data)
+    except PoolSaturatedError:
+        return _busy_response()
+    except asyncio.TimeoutError:
+        return _timeout_response('The deployments are')
+
+    return Response(
+        content,
+        media_type='application/zip',
+        headers={'Content-Disposition': 'attachment; filename="deployments.zip"'},
+    )
+
+
+@router.post('/invalidate')
+async def invalidate(block_data: InvalidatePayload):
+    """Drop the cached deployment files of an executor whose tag is republished."""
+    count = cache.invalidate(block_data.executor)
+    logger.info(f'Invalidated {count} cached deployments of {block_data.executor}')
+    return {'executor': block_data.executor, 'invalidated': count}
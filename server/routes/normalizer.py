@@ -1,79 +1,337 @@
+import asyncio
 import datetime
-from fastapi import APIRouter
+import json
+import os
+import re
+import tempfile
+import time
+from pathlib import Path
+from typing import BinaryIO, List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from loguru import logger
+from pydantic import ValidationError
 from pydantic.utils import BUILTIN_COLLECTIONS
+from starlette.concurrency import run_in_threadpool
+from starlette.config import Config
 from starlette.requests import Request
 
-from normalizer.core import normalize as _normalize
-from normalizer import excepts
-from normalizer.models import PackagePayload, NormalizeResult
+from normalizer.models import (
+    BatchNormalizeResult,
+    BatchPackagePayload,
+    NormalizeResult,
+    PackagePayload,
+)
 from server.errors import ErrorCode
+from server.metrics import observe_normalize
+from server.pool import BoundedPool, PoolSaturatedError
+from server.responses import ModelResponse, dumps
+from server.tasks import (
+    list_packages,
+    normalize_batch_package,
+    normalize_package,
+    normalize_upload,
+    timed,
+    warm_up_worker,
+)
+
+config = Config()
+
+NORMALIZER_WORKERS: int = config('NORMALIZER_WORKERS', cast=int, default=0)
+NORMALIZER_QUEUE_SIZE: int = config('NORMALIZER_QUEUE_SIZE', cast=int, default=0)
+NORMALIZER_TIMEOUT: float = config('NORMALIZER_TIMEOUT', cast=float, default=60)
+NORMALIZER_UPLOAD_MAX_BYTES: int = config(
+    'NORMALIZER_UPLOAD_MAX_BYTES', cast=int, default=64 * 1024 * 1024
+)
+NORMALIZER_UPLOAD_DIR: str = config('NORMALIZER_UPLOAD_DIR', default='')
+
+# room left in the upload requests for the form fields and the multipart framing
+UPLOAD_FORM_MAX_BYTES = 1024 * 1024
+UPLOAD_PATH = '/upload'
+
+SAFE_FILENAME_RE = re.compile(r'[^A-Za-z0-9_-]')
+
+# size of the chunks the uploads are copied and the result archives are sent in
+CHUNK_SIZE = 64 * 1024
 
 router = APIRouter()
 
+pool = BoundedPool(
+    max_workers=NORMALIZER_WORKERS or None,
+    max_queue=NORMALIZER_QUEUE_SIZE or None,
+    timeout=NORMALIZER_TIMEOUT,
+    initializer=warm_up_worker,
+)
+
 
 @router.post('/', name='normalizer', response_model=NormalizeResult)
-def normalize(
+async def normalize(
     request: Request,
     block_data: PackagePayload = None,
 ):
     now = datetime.datetime.now()
+    start = time.perf_counter()
 
-    result = {
-        'success': True,
-        'code': 200,
-        'data': None,
-        'message': 'The uploaded executor is normalized successfully!',
-    }
-
+    status_code = 200
+    stats = None
     try:
-        result['data'] = _normalize(
-            block_data.package_path,
+        result, stats = await pool.run(timed, normalize_package, block_data)
+    except PoolSaturatedError:
+        status_code = 429
+        result = NormalizeResult(
+            success=False,
+            code=ErrorCode.Busy.value,
+            data=None,
+            message='Too many executors are being normalized, please retry later.',
+        )
+    except asyncio.TimeoutError:
+        status_code = 504
+        result = NormalizeResult(
+            success=False,
+            code=ErrorCode.Timeout.value,
+            data=None,
+            message=f'The executor is not normalized within {pool.timeout} seconds.',
+        )
+    observe_normalize('normalize', result.code, time.perf_counter() - start, stats)
+
+    # encoded only when the log level is enabled
+    logger.opt(lazy=True).info(
+        '{}',
+        lambda: {
+            'payload': jsonable_encoder(block_data),
+            'time_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'response': jsonable_encoder(result),
+        },
+    )
+    return ModelResponse(status_code=status_code, content=result)
+
+
+def _list_batch_packages(
+    package_paths: List[Path], packages_dir: Optional[Path]
+) -> List[Path]:
+    if packages_dir is not None:
+        if not packages_dir.exists():
+            raise HTTPException(
+                status_code=404, detail=f'The folder {packages_dir} does not exist.'
+            )
+        if not packages_dir.is_dir():
+            raise HTTPException(
+                status_code=400, detail=f'{packages_dir} is not a folder.'
+            )
+    return list_packages(package_paths, packages_dir)
+
+
+@router.post('/batch', name='normalizer_batch')
+async def normalize_batch(
+    request: Request,
+    block_data: BatchPackagePayload,
+):
+    now = datetime.datetime.now()
+
+    package_paths = await run_in_threadpool(
+        _list_batch_packages, block_data.package_paths, block_data.packages_dir
+    )
+    payloads = [
+        PackagePayload(
+            package_path=package_path,
             meta=block_data.meta,
             env=block_data.env,
             dockerfile=block_data.dockerfile,
             dockerfile_syntax=block_data.dockerfile_syntax,
+            dry_run=block_data.dry_run,
         )
+        for package_path in package_paths
+    ]
 
-    except Exception as ex:
-        result['success'] = False
-        if isinstance(ex, excepts.ExecutorNotFoundError):
-            result['code'] = ErrorCode.ExecutorNotFound.value
-            result['message'] = """We can not discover any Executor in your bundle. This is often due to one of the following errors:
-    The bundle did not contain any valid executor.
-    The config.yml's jtype is mismatched with the actual Executor class name."""
-        elif isinstance(ex, excepts.ExecutorExistsError):
-            result['code'] = ErrorCode.ExecutorExists.value
-            result[
-                'message'
-            ] = 'Multiple executors are placed at one package, which is not allowed by Jina Hub now!'
-        elif isinstance(ex, excepts.IllegalExecutorError):
-            result['code'] = ErrorCode.IllegalExecutor.value
-            result[
-                'message'
-            ] = 'The uploaded executor is illegal, please double check it!'
-        elif isinstance(ex, excepts.DependencyError):
-            result['code'] = ErrorCode.BrokenDependency.value
-            result[
-                'message'
-            ] = 'The uploaded executor contains cycing and missing dependencies'
-        else:
-            result['code'] = ErrorCode.Others.value
-
-            result['message'] = str(ex)
-            logger.exception(ex)
-
-    logger.info(
-        {
+    logger.opt(lazy=True).info(
+        '{}',
+        lambda: {
             'payload': jsonable_encoder(block_data),
             'time_at': now.strftime('%Y-%m-%d %H:%M:%S'),
-            'response': result,
-        }
+            'packages': len(payloads),
+        },
     )
-    return NormalizeResult(
-        success=result['success'],
-        code=result['code'],
-        data=result['data'],
-        message=result['message'],
+
+    # leave the queue of the pool to the single normalize requests
+    semaphore = asyncio.Semaphore(pool.max_workers)
+
+    def _failed(payload: PackagePayload, code: ErrorCode, message: str):
+        return BatchNormalizeResult(
+            package_path=str(payload.package_path),
+            success=False,
+            code=code.value,
+            data=None,
+            message=message,
+        )
+
+    async def _run(payload: PackagePayload) -> BatchNormalizeResult:
+        async with semaphore:
+            start = time.perf_counter()
+            stats = None
+            # a failed package must not cut off the results of the others
+            try:
+                result, stats = await pool.run(
+                    timed, normalize_batch_package, payload, wait=True
+                )
+            except PoolSaturatedError:
+                result = _failed(
+                    payload,
+                    ErrorCode.Busy,
+                    'Too many executors are being normalized, please retry later.',
+                )
+            except asyncio.TimeoutError:
+                result = _failed(
+                    payload,
+                    ErrorCode.Timeout,
+                    f'The executor is not normalized within {pool.timeout} seconds.',
+                )
+            except Exception as ex:
+                logger.exception(ex)
+                result = _failed(payload, ErrorCode.Others, str(ex))
+            observe_normalize('batch', result.code, time.perf_counter() - start, stats)
+            return result
+
+    async def _stream():
+        tasks = [asyncio.ensure_future(_run(payload)) for payload in payloads]
+        try:
+            for task in asyncio.as_completed(tasks):
+                result = await task
+                yield dumps(result) + b'\n'
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(_stream(), media_type='application/x-ndjson')
+
+
+def _spool_upload(source: BinaryIO, max_bytes: int) -> str:
+    """Copy an upload to a file the workers can open, up to ``max_bytes``."""
+    fd, path = tempfile.mkstemp(
+        prefix='upload-', suffix='.bundle', dir=NORMALIZER_UPLOAD_DIR or None
+    )
+    try:
+        with os.fdopen(fd, 'wb') as target:
+            size = 0
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f'The bundle is larger than {max_bytes} bytes.',
+                    )
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+
+def _remove_upload(path: str):
+    try:
+        os.unlink(path)
+    except OSError as ex:
+        logger.warning(f'=> failed to remove the upload {path}: {ex}')
+
+
+@router.post(
+    UPLOAD_PATH,
+    name='normalizer_upload',
+    response_class=StreamingResponse,
+    responses={200: {'content': {'application/zip': {}}}},
+)
+async def normalize_upload_bundle(
+    request: Request,
+    file: UploadFile = File(..., description='zip or tar archive of the executor'),
+    meta: Optional[str] = Form(None, description='JSON object of the version info'),
+    env: Optional[str] = Form(None, description='JSON object of the environment'),
+    dockerfile: Optional[str] = Form(None),
+    dockerfile_syntax: Optional[str] = Form(None),
+):
+    """Normalize an uploaded bundle, responding with a zip of the generated files."""
+    now = datetime.datetime.now()
+    start = time.perf_counter()
+    filename = Path(file.filename or 'bundle').name
+
+    fields = {
+        'meta': meta,
+        'env': env,
+        'dockerfile': dockerfile,
+        'dockerfile_syntax': dockerfile_syntax,
+    }
+    # the upload is spooled by the multipart parser, bounded in memory
+    path = await run_in_threadpool(
+        _spool_upload, file.file, NORMALIZER_UPLOAD_MAX_BYTES
+    )
+    try:
+        block_data = PackagePayload(
+            package_path=path,
+            dry_run=True,
+            **{
+                k: json.loads(v) if k in ('meta', 'env') else v
+                for k, v in fields.items()
+                if v is not None
+            },
+        )
+    except (ValueError, ValidationError) as ex:
+        os.unlink(path)
+        raise HTTPException(status_code=422, detail=str(ex))
+
+    status_code = 200
+    stats = None
+    archive = None
+    try:
+        # the archive is removed once the worker is done with it, not on a timeout
+        (result, archive), stats = await pool.run(
+            timed,
+            normalize_upload,
+            block_data,
+            filename,
+            on_done=lambda: _remove_upload(path),
+        )
+        if not result.success:
+            status_code = 422
+    except PoolSaturatedError:
+        status_code = 429
+        result = NormalizeResult(
+            success=False,
+            code=ErrorCode.Busy.value,
+            data=None,
+            message='Too many executors are being normalized, please retry later.',
+        )
+    except asyncio.TimeoutError:
+        status_code = 504
+        result = NormalizeResult(
+            success=False,
+            code=ErrorCode.Timeout.value,
+            data=None,
+            message=f'The executor is not normalized within {pool.timeout} seconds.',
+        )
+    observe_normalize('upload', result.code, time.perf_counter() - start, stats)
+
+    logger.opt(lazy=True).info(
+        '{}',
+        lambda: {
+            'payload': {'filename': filename, **fields},
+            'time_at': now.strftime('%Y-%m-%d %H:%M:%S'),
+            'response': jsonable_encoder(result, exclude={'data': {'artifacts'}}),
+        },
+    )
+    if status_code != 200:
+        return ModelResponse(status_code=status_code, content=result)
+
+    def _chunks():
+        for offset in range(0, len(archive), CHUNK_SIZE):
+            yield archive[offset : offset + CHUNK_SIZE]
+
+    # the name comes from the client, only the safe characters are kept in the header
+    stem = SAFE_FILENAME_RE.sub('_', filename.split('.', 1)[0]) or 'bundle'
+    return StreamingResponse(
+        _chunks(),
+        media_type='application/zip',
+        headers={
+            'Content-Disposition': f'attachment; filename="{stem}.normalized.zip"',
+            'Content-Length': str(len(archive)),
+        },
     )
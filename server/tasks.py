@@ -0,0 +1,232 @@
+import io
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+from starlette.config import Config
+
+from generator.core import derive_templates, render as render_yaml, render_batch
+from generator.models import (
+    BatchPackagePayload as BatchGeneratorPayload,
+    PackagePayload as GeneratorPayload,
+)
+from normalizer.cache import NormalizeCache
+from normalizer.core import normalize as _normalize
+from normalizer import excepts
+from normalizer.fs import ArchiveIndex, ArchiveLimitError, BundleIndex, is_archive
+from normalizer.helper import get_config_template
+from normalizer.models import (
+    BatchNormalizeResult,
+    NormalizeResult,
+    PackagePayload,
+)
+from normalizer.resources import preload_resources
+from normalizer.stats import RunStats
+from normalizer.versions import get_resolver
+from server.errors import ErrorCode
+
+config = Config()
+
+NORMALIZE_CACHE_ENTRIES: int = config('NORMALIZE_CACHE_ENTRIES', cast=int, default=256)
+NORMALIZE_CACHE_BYTES: int = config(
+    'NORMALIZE_CACHE_BYTES', cast=int, default=64 * 1024 * 1024
+)
+NORMALIZE_CACHE_DIR: str = config('NORMALIZE_CACHE_DIR', default='')
+
+if NORMALIZE_CACHE_DIR:
+    _cache_dir = Path(NORMALIZE_CACHE_DIR)
+else:
+    # the results are normalized in forked workers, each with its own entries in
+    # memory, they share theirs through a folder removed when the server exits
+    _cache_tmpdir = tempfile.TemporaryDirectory(prefix='normalize-cache-')
+    _cache_dir = Path(_cache_tmpdir.name)
+
+cache = NormalizeCache(
+    max_entries=NORMALIZE_CACHE_ENTRIES,
+    max_bytes=NORMALIZE_CACHE_BYTES,
+    cache_dir=_cache_dir,
+)
+
+
+def warm_up_worker():
+    """Load what the first normalize would load lazily.
+
+    The initializer of the workers, a no-op for the ones forked from a warmed up
+    server process, for the platforms not forking them.
+    """
+    import jina.helper  # noqa: F401
+    import pipreqs.pipreqs  # noqa: F401
+
+    preload_resources()
+    get_config_template()
+    # a worker never waits for the index, the version is revalidated in background
+    get_resolver().latest()
+
+
+def warm_up():
+    """Warm up the server process before the workers are forked."""
+    warm_up_worker()
+    # resolved before the workers are forked, so that they start with the version
+    get_resolver().latest(block=True)
+
+
+def normalize_package(
+    block_data: PackagePayload,
+    stats: Optional[RunStats] = None,
+    index: Optional[BundleIndex] = None,
+) -> NormalizeResult:
+    result = {
+        'success': True,
+        'code': 200,
+        'data': None,
+        'message': 'The uploaded executor is normalized successfully!',
+    }
+
+    try:
+        result['data'] = _normalize(
+            block_data.package_path,
+            meta=block_data.meta,
+            env=block_data.env,
+            dockerfile=block_data.dockerfile,
+            dockerfile_syntax=block_data.dockerfile_syntax,
+            dry_run=block_data.dry_run,
+            cache=cache,
+            stats=stats,
+            index=index,
+        )
+
+    except Exception as ex:
+        result['success'] = False
+        if isinstance(ex, excepts.ExecutorNotFoundError):
+            result['code'] = ErrorCode.ExecutorNotFound.value
+            result[
+                'message'
+            ] = """We can not discover any Executor in your bundle. This is often due to one of the following errors:
+    The bundle did not contain any valid executor.
+    The config.yml's jtype is mismatched with the actual Executor class name."""
+        elif isinstance(ex, excepts.ExecutorExistsError):
+            result['code'] = ErrorCode.ExecutorExists.value
+            result[
+                'message'
+            ] = 'Multiple executors are placed at one package, which is not allowed by Jina Hub now!'
+        elif isinstance(ex, excepts.IllegalExecutorError):
+            result['code'] = ErrorCode.IllegalExecutor.value
+            result[
+                'message'
+            ] = 'The uploaded executor is illegal, please double check it!'
+        elif isinstance(ex, excepts.DependencyError):
+            result['code'] = ErrorCode.BrokenDependency.value
+            result[
+                'message'
+            ] = 'The uploaded executor contains cycing and missing dependencies'
+            if str(ex):
+                result['message'] += f': {ex}'
+        elif isinstance(ex, ArchiveLimitError):
+            result['code'] = ErrorCode.IllegalArchive.value
+            result['message'] = str(ex)
+        else:
+            result['code'] = ErrorCode.Others.value
+
+            result['message'] = str(ex)
+            logger.exception(ex)
+
+    return NormalizeResult(
+        success=result['success'],
+        code=result['code'],
+        data=result['data'],
+        message=result['message'],
+    )
+
+
+def normalize_batch_package(
+    block_data: PackagePayload, stats: Optional[RunStats] = None
+) -> BatchNormalizeResult:
+    return BatchNormalizeResult(
+        package_path=str(block_data.package_path),
+        **normalize_package(block_data, stats=stats).dict(),
+    )
+
+
+def normalize_upload(
+    block_data: PackagePayload, filename: str, stats: Optional[RunStats] = None
+) -> Tuple[NormalizeResult, Optional[bytes]]:
+    """Normalize an uploaded archive, returning the result and a zip of the generated files."""
+    try:
+        index = ArchiveIndex(block_data.package_path, root=Path(filename))
+    except ValueError as ex:
+        result = NormalizeResult(
+            success=False,
+            code=ErrorCode.IllegalArchive.value,
+            data=None,
+            message=str(ex),
+        )
+        return result, None
+
+    with index:
+        result = normalize_package(block_data, stats=stats, index=index)
+    if not result.success:
+        return result, None
+    return result, zip_artifacts(result.data.artifacts)
+
+
+def zip_artifacts(artifacts: Dict[str, str]) -> bytes:
+    """Archive the files generated by normalize, with fixed timestamps."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, content in sorted(artifacts.items()):
+            info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, content, compress_type=zipfile.ZIP_DEFLATED)
+    return buffer.getvalue()
+
+
+def timed(task: Callable, block_data: PackagePayload, *args) -> Tuple[Any, RunStats]:
+    """Run a normalize task, returning its result with the stats of the run."""
+    stats = RunStats()
+    return task(block_data, *args, stats=stats), stats
+
+
+def list_packages(
+    package_paths: List[Path], packages_dir: Optional[Path] = None
+) -> List[Path]:
+    """List the executor bundles of a batch, the sub-folders and archives of ``packages_dir`` included."""
+    packages = list(package_paths)
+    if packages_dir is not None:
+        packages += sorted(
+            p
+            for p in packages_dir.iterdir()
+            if (p.is_dir() or is_archive(p)) and not p.name.startswith('.')
+        )
+    return packages
+
+
+def normalize_batch(
+    payloads: List[PackagePayload], max_workers: Optional[int] = None
+) -> Iterator[BatchNormalizeResult]:
+    """Normalize executor bundles in parallel processes, yielding results as they finish."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(normalize_batch_package, p) for p in payloads]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def warm_up_generator():
+    """Derive the deployment templates, importing the Flow, in the generator workers."""
+    derive_templates()
+
+
+def generate_package(block_data: GeneratorPayload) -> Tuple[bytes, str]:
+    """Generate the deployment files of an executor, returning their content and file type."""
+    return render_yaml(block_data.executor, block_data.type, block_data.protocol)
+
+
+def generate_batch_package(block_data: BatchGeneratorPayload) -> bytes:
+    """Generate the deployment files of a Flow of several executors, returning a zip archive."""
+    return render_batch(
+        [spec.dict() for spec in block_data.executors],
+        block_data.types,
+        block_data.protocol,
+    )
@@ -0,0 +1,29 @@
+import ast
+from pathlib import Path
+
+import pytest
+
+from importlab.import_finder import get_imports
+
+from normalizer import core
+from normalizer.analysis import ModuleAnalyzer
+
+cur_dir = Path(__file__).parent
+
+
+def test_module_analysis_imports():
+    filepath = cur_dir / 'cases' / 'nested_3' / 'executors' / 'exec.py'
+    analysis = ModuleAnalyzer().get(filepath)
+
+    assert analysis.imports == get_imports(str(filepath))
+
+
+@pytest.mark.parametrize('package', ['nested', 'nested_4', 'executor_3'])
+def test_module_parsed_once(mocker, package):
+    work_path = cur_dir / 'cases' / package
+    parse = mocker.spy(ast, 'parse')
+
+    core.normalize(work_path, dry_run=True)
+
+    parsed = [call.kwargs['filename'] for call in parse.call_args_list]
+    assert parsed and len(parsed) == len(set(parsed))
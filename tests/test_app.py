@@ -0,0 +1,26 @@
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from server import app as server_app
+
+
+def test_ready_after_startup(mocker):
+    started = threading.Event()
+    mocker.patch.object(server_app, 'warm_up', lambda: started.wait(10))
+    mocker.patch.object(server_app.normalizer_pool, 'start', mocker.AsyncMock())
+    mocker.patch.object(server_app.generator_pool, 'start', mocker.AsyncMock())
+    mocker.patch.object(server_app.normalizer_pool, 'shutdown')
+    mocker.patch.object(server_app.generator_pool, 'shutdown')
+
+    with TestClient(server_app.create_app()) as client:
+        assert client.get('/ping').status_code == 200
+        assert client.get('/ready').status_code == 503
+
+        started.set()
+        for _ in range(100):
+            if client.get('/ready').status_code == 200:
+                break
+            time.sleep(0.01)
+        assert client.get('/ready').status_code == 200
@@ -0,0 +1,79 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server import app as server_app
+from server.errors import ErrorCode
+from server.routes import normalizer as normalizer_routes
+
+cur_dir = Path(__file__).parent
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch.object(normalizer_routes.pool, '_executor_class', ThreadPoolExecutor)
+    yield TestClient(server_app.create_app())
+    normalizer_routes.pool.shutdown()
+
+
+def test_batch_stream(client):
+    package_paths = [cur_dir / 'cases' / 'executor_1', cur_dir / 'cases' / 'nested']
+    response = client.post(
+        '/normalizer/api/v1/batch',
+        json={'package_paths': [str(p) for p in package_paths], 'dry_run': True},
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r['package_path'] for r in results) == sorted(map(str, package_paths))
+    assert all(r['success'] for r in results)
+    assert all('__jina__.Dockerfile' in r['data']['artifacts'] for r in results)
+
+
+def test_batch_stream_pool_failure(client, mocker):
+    run = normalizer_routes.pool.run
+
+    async def _run(fn, task, payload, **kwargs):
+        if payload.package_path.name == 'nested':
+            raise BrokenProcessPool('A worker died')
+        return await run(fn, task, payload, **kwargs)
+
+    mocker.patch.object(normalizer_routes.pool, 'run', _run)
+    package_paths = [cur_dir / 'cases' / 'executor_1', cur_dir / 'cases' / 'nested']
+    response = client.post(
+        '/normalizer/api/v1/batch',
+        json={'package_paths': [str(p) for p in package_paths], 'dry_run': True},
+    )
+
+    results = {
+        Path(r['package_path']).name: r
+        for r in map(json.loads, response.text.splitlines())
+    }
+    assert results['executor_1']['success']
+    assert not results['nested']['success']
+    assert results['nested']['code'] == ErrorCode.Others.value
+    assert results['nested']['message'] == 'A worker died'
+
+
+def test_batch_packages_dir(client, tmp_path):
+    response = client.post(
+        '/normalizer/api/v1/batch', json={'packages_dir': str(tmp_path / 'missing')}
+    )
+    assert response.status_code == 404
+
+    (tmp_path / 'file').write_text('')
+    response = client.post(
+        '/normalizer/api/v1/batch', json={'packages_dir': str(tmp_path / 'file')}
+    )
+    assert response.status_code == 400
+
+    response = client.post(
+        '/normalizer/api/v1/batch', json={'packages_dir': str(tmp_path)}
+    )
+    assert response.status_code == 200
+    assert response.text == ''
@@ -0,0 +1,116 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from normalizer import core
+from normalizer.cache import NormalizeCache, bundle_digest
+from normalizer.models import ExecutorModel
+
+cur_dir = Path(__file__).parent
+
+
+def test_normalize_cache_hit(mocker):
+    package_path = cur_dir / 'cases' / 'executor_4'
+    cache = NormalizeCache()
+
+    executor = core.normalize(package_path, dry_run=True, cache=cache)
+    assert len(cache) == 1
+
+    inspect = mocker.spy(core, 'inspect_executors')
+    assert core.normalize(package_path, dry_run=True, cache=cache) == executor
+    inspect.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    'package_name',
+    [
+        'executor_1',
+        'executor_2',
+        'executor_3',
+        'executor_4',
+        'executor_5',
+        'executor_6',
+        'nested',
+        'nested_2',
+        'nested_3',
+        'nested_4',
+        'nested_5',
+    ],
+)
+def test_normalize_cache_hit_equals_miss(package_name):
+    package_path = cur_dir / 'cases' / package_name
+    cache = NormalizeCache()
+
+    miss = core.normalize(package_path, dry_run=True, cache=cache)
+    hit = core.normalize(package_path, dry_run=True, cache=cache)
+    assert hit.dict() == miss.dict()
+    assert [type(e) for e in hit.endpoints] == [type(e) for e in miss.endpoints]
+    assert type(hit.init) is type(miss.init)
+
+
+def test_normalize_cache_hit_kwonly_args(tmp_path):
+    package_path = tmp_path / 'executor'
+    package_path.mkdir()
+    (package_path / 'executor.py').write_text(
+        'from jina import Executor\n\n\n'
+        'class MyExecutor(Executor):\n'
+        '    def __init__(self, *, foo, bar=1, **kwargs):\n'
+        '        super().__init__(**kwargs)\n'
+    )
+    cache = NormalizeCache()
+
+    miss = core.normalize(package_path, dry_run=True, cache=cache)
+    hit = core.normalize(package_path, dry_run=True, cache=cache)
+    assert hit.dict() == miss.dict()
+    assert [type(e) for e in hit.endpoints] == [type(e) for e in miss.endpoints]
+    assert type(hit.init) is type(miss.init)
+    assert [(a.arg, a.default) for a in hit.init.kwargs] == [
+        ('foo', None),
+        ('bar', '1'),
+    ]
+    assert ExecutorModel(**miss.dict()) == miss
+
+
+def test_normalize_cache_key():
+    package_path = cur_dir / 'cases' / 'executor_4'
+    dockerfile_path = package_path / 'Dockerfile'
+
+    key = bundle_digest(package_path, dockerfile_path, {'meta': {'jina': '2'}})
+    assert key == bundle_digest(package_path, dockerfile_path, {'meta': {'jina': '2'}})
+    assert key != bundle_digest(package_path, dockerfile_path, {'meta': {'jina': '3'}})
+    assert key != bundle_digest(
+        cur_dir / 'cases' / 'executor_5', dockerfile_path, {'meta': {'jina': '2'}}
+    )
+
+
+def test_normalize_cache_eviction():
+    cache = NormalizeCache(max_entries=2)
+    for key in ['a', 'b', 'c']:
+        cache.put(key, {'key': key})
+    assert cache.get('a') is None
+    assert cache.get('b') == {'key': 'b'}
+
+    cache = NormalizeCache(max_bytes=40)
+    cache.put('a', {'content': 'x' * 10})
+    cache.put('b', {'content': 'y' * 10})
+    assert cache.get('a') is None
+    assert cache.size <= 40
+
+
+def test_normalize_cache_on_disk(tmp_path):
+    NormalizeCache(cache_dir=tmp_path).put('a', {'key': 'a'})
+
+    assert NormalizeCache(cache_dir=tmp_path).get('a') == {'key': 'a'}
+
+
+def test_server_cache_shared_between_workers():
+    from server import tasks
+
+    worker = multiprocessing.get_context('fork').Process(
+        target=tasks.cache.put, args=('shared', {'key': 'shared'})
+    )
+    worker.start()
+    worker.join()
+
+    assert tasks.cache.get('shared') == {'key': 'shared'}
@@ -1,10 +1,14 @@
 import json
+import multiprocessing
 from pathlib import Path
 import pytest
 import os
+import shutil
 
 from normalizer import deps, core
+from normalizer.analysis import ModuleAnalysis, ModuleAnalyzer
 from normalizer.models import ExecutorModel
+from normalizer.stats import RunStats
 
 
 def test_inspect_dummy_execs():
@@ -12,28 +16,108 @@ def test_inspect_dummy_execs():
         [Path(__file__).parent / 'cases' / 'simple_case' / 'dummy_exec.py']
     )
     assert len(executors) == 4
-    assert executors[0][0] == 'DummyExecutor'
-    assert executors[1][0] == 'Dummy2Executor'
-    assert executors[2][0] == 'Dummy3Executor'
-    assert executors[3][0] == 'FailedExecutor'
-
-    for executor in executors:
-        assert len(executor) == 5
+    assert executors[0].name == 'DummyExecutor'
+    assert executors[1].name == 'Dummy2Executor'
+    assert executors[2].name == 'Dummy3Executor'
+    assert executors[3].name == 'FailedExecutor'
 
     # success case
-    assert len(executors[0][3][0]) == 1
-    assert len(executors[0][3][1]) == 0
-    assert len(executors[0][3][2]) == 1
+    assert [a.arg for a in executors[0].init.args] == ['self']
+    assert executors[0].init.kwargs == []
 
     # success case with argument with default values
-    assert len(executors[2][3][0]) == 2
-    assert len(executors[2][3][1]) == 1
-    assert len(executors[2][3][2]) == 2
+    assert len(executors[2].init.args) == 1
+    assert len(executors[2].init.kwargs) == 1
 
     # failed case
-    assert len(executors[3][3][0]) == 2
-    assert len(executors[3][3][1]) == 0
-    assert len(executors[3][3][2]) == 2
+    assert len(executors[3].init.args) == 2
+    assert executors[3].init.kwargs == []
+
+
+def test_inspect_executors_parallel(tmp_path):
+    cases = Path(__file__).parent / 'cases'
+    py_modules = sorted(cases.glob('*/*.py'))
+    py_modules.remove(cases / 'executor_4' / 'bar.py')
+    sequential = core.inspect_executors(py_modules, max_workers=1)
+
+    analyzer = ModuleAnalyzer()
+    parallel = core.inspect_executors(
+        py_modules, analyzer=analyzer, max_workers=2, threshold=2
+    )
+
+    assert parallel == sequential
+    assert [analyzer.get(p).imports for p in py_modules] == [
+        ModuleAnalyzer().get(p).imports for p in py_modules
+    ]
+
+    # a module possibly defining an executor fails the inspection in both modes
+    broken = tmp_path / 'broken.py'
+    broken.write_text('from jina import Executor\n\nclass Broken(Executor)\n')
+    for max_workers in [1, 2]:
+        with pytest.raises(SyntaxError):
+            core.inspect_executors(
+                py_modules + [broken], max_workers=max_workers, threshold=2
+            )
+
+
+def test_inspect_executors_parallel_skips_filtered(tmp_path, mocker):
+    py_modules = []
+    for i in range(4):
+        py_module = tmp_path / f'module_{i}.py'
+        py_module.write_text(f'def foo_{i}():\n    pass\n')
+        py_modules.append(py_module)
+
+    get_pool = mocker.spy(core, '_get_inspect_pool')
+    stats = RunStats()
+    assert (
+        core.inspect_executors(py_modules, max_workers=2, threshold=2, stats=stats)
+        == []
+    )
+    get_pool.assert_not_called()
+    assert stats.counters == {'modules_skipped': 4, 'modules_inspected': 0}
+
+
+def test_default_inspect_workers_in_worker_process():
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        assert pool.apply(core._default_inspect_workers) == 1
+    assert core._default_inspect_workers() == (os.cpu_count() or 1)
+
+
+@pytest.mark.parametrize(
+    'source, class_name, expected',
+    [
+        ('import os\n', None, False),
+        ('def foo():\n    pass\n', None, False),
+        ('class Foo:\n    pass\n', None, False),
+        ('from jina import Executor\n', None, False),
+        ('class Foo(Executor):\n    pass\n', None, True),
+        ('class Foo(\n    jina.Executor,\n):\n    pass\n', None, True),
+        ('class Foo(Bar):\n    pass\n', 'Foo', True),
+        ('class FooBar(Bar):\n    pass\n', 'Foo', False),
+        ('class Foo(Ｅxecutor):\n    pass\n', None, True),
+    ],
+)
+def test_may_define_executor(source, class_name, expected):
+    assert core._may_define_executor(source, class_name) == expected
+    # the modules skipped would not define any executor
+    analysis = ModuleAnalysis(Path('module.py'), source=source)
+    assert expected or not core._inspect_module(analysis, class_name)
+
+
+def test_inspect_executors_skip_counters():
+    cases = Path(__file__).parent / 'cases'
+    stats = RunStats()
+    analyzer = ModuleAnalyzer()
+    executors = core.inspect_executors(
+        [cases / 'executor_4' / 'bar.py', cases / 'executor_4' / 'foo.py'],
+        analyzer=analyzer,
+        max_workers=1,
+        stats=stats,
+    )
+
+    assert [e.name for e in executors] == ['Executor4']
+    assert stats.counters == {'modules_skipped': 1, 'modules_inspected': 1}
+    assert not analyzer.get(cases / 'executor_4' / 'bar.py').parsed
 
 
 @pytest.mark.parametrize(
@@ -41,48 +125,30 @@ def test_inspect_dummy_execs():
     [
         (
             Path(__file__).parent / 'cases' / 'executor_1',
-            Path(__file__).parent / 'cases' / 'executor_1.json'
+            Path(__file__).parent / 'cases' / 'executor_1.json',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_2',
-            Path(__file__).parent / 'cases' / 'executor_2.json'
+            Path(__file__).parent / 'cases' / 'executor_2.json',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_3',
-            Path(__file__).parent / 'cases' / 'executor_3.json'
+            Path(__file__).parent / 'cases' / 'executor_3.json',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_4',
-            Path(__file__).parent / 'cases' / 'executor_4.json'
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'executor_5',
-            None
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'executor_6',
-            None
+            Path(__file__).parent / 'cases' / 'executor_4.json',
         ),
+        (Path(__file__).parent / 'cases' / 'executor_5', None),
+        (Path(__file__).parent / 'cases' / 'executor_6', None),
         (
             Path(__file__).parent / 'cases' / 'nested',
-            Path(__file__).parent / 'cases' / 'nested.json'
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'nested_2',
-            None
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'nested_3',
-            None
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'nested_4',
-            None
-        ),
-        (
-            Path(__file__).parent / 'cases' / 'nested_5',
-            None
+            Path(__file__).parent / 'cases' / 'nested.json',
         ),
+        (Path(__file__).parent / 'cases' / 'nested_2', None),
+        (Path(__file__).parent / 'cases' / 'nested_3', None),
+        (Path(__file__).parent / 'cases' / 'nested_4', None),
+        (Path(__file__).parent / 'cases' / 'nested_5', None),
     ],
 )
 def test_get_executor_args(package_path, expected_path):
@@ -90,6 +156,7 @@ def test_get_executor_args(package_path, expected_path):
         with open(expected_path, 'r') as fp:
             expected_executor = ExecutorModel(**json.loads(fp.read()))
             executor = core.normalize(package_path, dry_run=True)
+            assert executor.artifacts == expected_executor.artifacts
             executor.hubble_score_metrics = expected_executor.hubble_score_metrics
             executor.filepath = expected_executor.filepath
             assert executor == expected_executor
@@ -97,6 +164,12 @@ def test_get_executor_args(package_path, expected_path):
         core.normalize(package_path, dry_run=True)
 
 
+def _copy_case(package_path, tmp_path):
+    copy_path = tmp_path / package_path.name
+    shutil.copytree(package_path, copy_path)
+    return copy_path
+
+
 @pytest.mark.parametrize(
     'package_path, dockerfile_syntax, meta_dict, dockerfile_name',
     [
@@ -104,52 +177,56 @@ def test_get_executor_args(package_path, expected_path):
             Path(__file__).parent / 'cases' / 'executor_1',
             None,
             {'jina': '2'},
-            'Dockerfile'
+            'Dockerfile',
         ),
-         (
+        (
             Path(__file__).parent / 'cases' / 'executor_2',
             None,
             {'jina': '2'},
-            'Dockerfile'
+            'Dockerfile',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_6',
             'jinahub/dockerfile:1.4.3-magic-shell',
             {'jina': '2'},
-            'Dockerfile'
+            'Dockerfile',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_7',
             'jinahub/dockerfile:1.4.3-magic-shell',
             {'jina': '2'},
-            'Dockerfile'
+            'Dockerfile',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_8',
             None,
             {'jina': '3.16.0', 'docarray': '0.30.0'},
-            'Dockerfile'
+            'Dockerfile',
         ),
         (
             Path(__file__).parent / 'cases' / 'executor_9',
             None,
             {'jina': '3.16.0', 'docarray': '0.30.0'},
-            '__jina__.Dockerfile'
+            '__jina__.Dockerfile',
         ),
     ],
 )
-def test_compare_dockerfile_syntax(package_path, dockerfile_syntax, meta_dict, dockerfile_name):
-
+def test_compare_dockerfile_syntax(
+    package_path, dockerfile_syntax, meta_dict, dockerfile_name, tmp_path
+):
+    # the files are written to a copy, the cases stay as they are for the next runs
+    package_path = _copy_case(package_path, tmp_path)
     dockerfile_path = Path(package_path / dockerfile_name)
     dockerfile_expected_path = Path(package_path / 'Dockerfile.expect')
 
-    originDockerfileStr = None;
-    if dockerfile_path.exists():
-        with open(dockerfile_path, 'r') as fp:
-            originDockerfileStr = str(fp.read())
-
-    core.normalize(package_path, dockerfile_syntax=dockerfile_syntax, dry_run=False, meta=meta_dict, dockerfile=dockerfile_name)
-    assert dockerfile_path.exists() == True;
+    core.normalize(
+        package_path,
+        dockerfile_syntax=dockerfile_syntax,
+        dry_run=False,
+        meta=meta_dict,
+        dockerfile=dockerfile_name,
+    )
+    assert dockerfile_path.exists() == True
 
     dockerfileStr = None
     with open(dockerfile_path, 'r') as fp:
@@ -159,12 +236,6 @@ def test_compare_dockerfile_syntax(package_path, dockerfile_syntax, meta_dict, d
     with open(dockerfile_expected_path, 'r') as fp:
         dockerfileExpectedStr = str(fp.read())
 
-    if originDockerfileStr:
-        with open(dockerfile_path, 'w') as fp:
-            fp.write(originDockerfileStr)
-    else:
-        os.remove(dockerfile_path)
-
     assert dockerfileExpectedStr == dockerfileStr
 
 
@@ -188,20 +259,23 @@ def test_prelude():
         (
             Path(__file__).parent / 'cases' / 'executor_7',
             'jinahub/dockerfile:1.4.3-magic-shell',
-            'Dockerfile.custom'
+            'Dockerfile.custom',
         ),
     ],
 )
-def test_normalized_custom_dockerfile(package_path, dockerfile_syntax, dockerfile):
+def test_normalized_custom_dockerfile(
+    package_path, dockerfile_syntax, dockerfile, tmp_path
+):
+    package_path = _copy_case(package_path, tmp_path)
     dockerfile_path = Path(package_path / dockerfile)
     dockerfile_expected_path = Path(package_path / 'Dockerfile.expect')
 
-    originDockerfileStr = None;
-    if dockerfile_path.exists():
-        with open(dockerfile_path, 'r') as fp:
-            originDockerfileStr = str(fp.read())
-
-    core.normalize(package_path, dockerfile_syntax=dockerfile_syntax, dockerfile=dockerfile , dry_run=False)
+    core.normalize(
+        package_path,
+        dockerfile_syntax=dockerfile_syntax,
+        dockerfile=dockerfile,
+        dry_run=False,
+    )
 
     dockerfileStr = None
     with open(dockerfile_path, 'r') as fp:
@@ -213,6 +287,50 @@ def test_normalized_custom_dockerfile(package_path, dockerfile_syntax, dockerfil
 
     assert dockerfileStr == dockerfileExpectedStr
 
-    if originDockerfileStr:
-        with open(dockerfile_path, 'w') as fp:
-            fp.write(originDockerfileStr)
+
+def test_dry_run_does_not_write(tmp_path):
+    package_path = tmp_path / 'executor'
+    package_path.mkdir()
+    (package_path / 'executor.py').write_text(
+        'from jina import Executor\n\n\nclass MyExecutor(Executor):\n    pass\n'
+    )
+    (package_path / 'pyproject.toml').write_text(
+        '[tool.poetry.dependencies]\npython = "^3.8"\nnumpy = "^1.20"\n'
+    )
+    package_path.chmod(0o555)
+
+    try:
+        executor = core.normalize(package_path, dry_run=True)
+    finally:
+        package_path.chmod(0o755)
+
+    assert sorted(p.name for p in package_path.iterdir()) == [
+        'executor.py',
+        'pyproject.toml',
+    ]
+    assert executor.hubble_score_metrics['requirements_exists']
+    assert sorted(executor.artifacts) == [
+        'Dockerfile',
+        '__jina__.Dockerfile',
+        'config.yml',
+        'requirements.txt',
+    ]
+    assert 'numpy' in executor.artifacts['requirements.txt']
+    assert 'requirements.txt' in executor.artifacts['Dockerfile']
+    assert 'jtype: MyExecutor' in executor.artifacts['config.yml']
+
+
+def test_unchanged_requirements_parsed_from_disk(tmp_path, mocker):
+    package_path = tmp_path / 'executor'
+    package_path.mkdir()
+    (package_path / 'executor.py').write_text(
+        'from jina import Executor\n\n\nclass MyExecutor(Executor):\n    pass\n'
+    )
+    (package_path / 'requirements.txt').write_text('numpy>=1.20\n')
+    parse_requirements = mocker.spy(core, 'parse_requirements')
+
+    core.normalize(package_path, dry_run=True)
+
+    parse_requirements.assert_called_once_with(
+        package_path / 'requirements.txt', content=None
+    )
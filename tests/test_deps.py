@@ -58,3 +58,40 @@ def test_get_dep_tools():
 # )
 # def test_get_base_images(package, expect_base_image):
 #     assert deps.get_baseimage(package) == expect_base_image
+
+
+def test_parse_requirements(tmp_path):
+    from pipreqs import pipreqs
+
+    requirements_path = tmp_path / 'requirements.txt'
+    content = (
+        '# comment\n'
+        'jina\n'
+        '\n'
+        'numpy>=1.20\n'
+        'torch==1.12.0\n'
+        'torch==1.12.0\n'
+        'git+https://github.com/jina-ai/docarray.git\n'
+        '-r other.txt\n'
+        'pillow~=9.0\n'
+    )
+    requirements_path.write_text(content)
+
+    expected = pipreqs.parse_requirements(str(requirements_path))
+    assert deps.parse_requirements(requirements_path) == expected
+    assert (
+        deps.parse_requirements(tmp_path / 'missing.txt', content=content) == expected
+    )
+
+
+@pytest.mark.skipif(not hasattr(os, 'memfd_create'), reason='no in-memory files')
+def test_parse_requirements_in_memory(tmp_path, mocker):
+    mocker.patch.object(
+        deps.tempfile,
+        'TemporaryDirectory',
+        side_effect=AssertionError('written to disk'),
+    )
+
+    assert deps.parse_requirements(
+        tmp_path / 'missing.txt', content='jina\nnumpy>=1.20\n'
+    ) == [{'name': 'jina', 'version': None}, {'name': 'numpy', 'version': '1.20'}]
@@ -41,14 +41,13 @@ def test_baseimage(exe_dockerfile):
         (
             Path(__file__).parent / 'docker_cases' / 'Dockerfile.case1',
             Path(__file__).parent / 'docker_cases' / 'Dockerfile.case1.expect',
-            None
+            None,
         ),
-
         (
             Path(__file__).parent / 'docker_cases' / 'Dockerfile.case2',
             Path(__file__).parent / 'docker_cases' / 'Dockerfile.case2.expect',
-            'jinahub/dockerfile:1.4.3-magic-shell'
-        )
+            'jinahub/dockerfile:1.4.3-magic-shell',
+        ),
     ],
 )
 def test_load_dockerfile(docker_file, docker_expect_file, dockerfile_syntax):
@@ -87,3 +86,41 @@ def test_dump(exe_dockerfile):
         assert lines == exe_dockerfile.lines
 
     os.unlink(temp_file.name)
+
+
+def test_edits_keep_continuations(tmp_path):
+    docker_file = tmp_path / 'Dockerfile'
+    docker_file.write_text(
+        'FROM builder AS build\n'
+        'ENTRYPOINT ["build"]\n'
+        'FROM jinaai/jina:2.0-perf\n'
+        'RUN apt-get update \\\n'
+        '# interjected comment\n'
+        '    && apt-get install -y git\n'
+        'ENTRYPOINT ["jina", \\\n'
+        '    "executor"]'
+    )
+    parser = ExecutorDockerfile(docker_file=docker_file)
+
+    assert parser.is_multistage
+    assert parser.parent_images == ['builder', 'jinaai/jina:2.0-perf']
+    assert parser.entrypoint == '["jina",     "executor"]'
+
+    parser.add_docarray_install('0.13.0')
+    parser.entrypoint = ['jina', 'executor', '--uses', 'config.yml']
+    parser.baseimage = 'jinaai/jina:3.0-perf'
+    parser.add_unitest()
+
+    assert parser.dumps() == (
+        'FROM builder AS build\n'
+        'RUN pip install --default-timeout=1000 --compile --no-cache-dir '
+        'docarray==0.13.0 # generated\n'
+        'ENTRYPOINT ["build"]\n'
+        'FROM jinaai/jina:3.0-perf\n'
+        'RUN apt-get update \\\n'
+        '# interjected comment\n'
+        '    && apt-get install -y git\n'
+        'ENTRYPOINT ["jina", "executor", "--uses", "config.yml"]\n'
+        '\n'
+    )
+    assert parser.content == parser.dumps()
@@ -0,0 +1,181 @@
+import shutil
+import tarfile
+from pathlib import Path
+
+import pytest
+
+from normalizer import core
+from normalizer.fs import ArchiveIndex, ArchiveLimitError, DirectoryIndex, open_bundle
+
+cur_dir = Path(__file__).parent
+
+
+@pytest.mark.parametrize(
+    'path',
+    [
+        '.',
+        'config.yml',
+        'missing.py',
+        'executors',
+        'executors/__init__.py',
+        'executors/exec.py',
+        'executors/../deps/dep.py',
+        'executors/missing',
+        '../nested_3/deps',
+        '../nested_4/config.yml',
+    ],
+)
+def test_directory_index(path):
+    work_path = cur_dir / 'cases' / 'nested_3'
+    index = DirectoryIndex(work_path)
+
+    assert index.exists(work_path / path) == (work_path / path).exists()
+    assert index.is_file(work_path / path) == (work_path / path).is_file()
+    assert index.is_dir(work_path / path) == (work_path / path).is_dir()
+
+
+def test_directory_index_single_walk(mocker):
+    work_path = cur_dir / 'cases' / 'nested_5'
+    index = DirectoryIndex(work_path)
+    scan = mocker.spy(index, '_scan')
+
+    for _ in range(3):
+        assert index.exists(work_path / 'executor' / 'utils' / 'data.py')
+        assert not index.exists(work_path / 'executor' / 'missing.py')
+    assert scan.call_count == 1
+
+
+@pytest.fixture(params=['zip', 'gztar'])
+def nested_3_archive(request, tmp_path):
+    shutil.copytree(
+        cur_dir / 'cases' / 'nested_3',
+        tmp_path / 'nested_3',
+        ignore=shutil.ignore_patterns('__pycache__'),
+    )
+    archive = shutil.make_archive(
+        str(tmp_path / 'bundle'), request.param, tmp_path, 'nested_3'
+    )
+    return tmp_path / 'nested_3', Path(archive)
+
+
+@pytest.mark.parametrize(
+    'path',
+    [
+        '.',
+        'config.yml',
+        'missing.py',
+        'executors',
+        'executors/__init__.py',
+        'executors/exec.py',
+        'executors/../deps/dep.py',
+        'executors/missing',
+    ],
+)
+def test_archive_index(nested_3_archive, path):
+    work_path, archive = nested_3_archive
+    with ArchiveIndex(archive) as index:
+        assert index.exists(archive / path) == (work_path / path).exists()
+        assert index.is_file(archive / path) == (work_path / path).is_file()
+        assert index.is_dir(archive / path) == (work_path / path).is_dir()
+        assert not index.exists(archive / '..' / 'nested_3' / 'deps')
+
+
+def test_archive_index_read(nested_3_archive):
+    work_path, archive = nested_3_archive
+    with open(archive, 'rb') as fileobj:
+        index = ArchiveIndex(fileobj, root=Path('upload'))
+
+        assert (
+            index.read_text(Path('upload/config.yml'))
+            == (work_path / 'config.yml').read_text()
+        )
+        assert index.glob('*/*.py') == [
+            Path('upload/deps/__init__.py'),
+            Path('upload/deps/dep.py'),
+            Path('upload/executors/__init__.py'),
+            Path('upload/executors/exec.py'),
+        ]
+        assert [p.relative_to('upload') for p in index.iter_files()] == [
+            p.relative_to(work_path) for p in DirectoryIndex(work_path).iter_files()
+        ]
+        with pytest.raises(FileNotFoundError):
+            index.read_bytes(Path('upload/missing.py'))
+
+
+@pytest.mark.parametrize('format', ['zip', 'tar'])
+def test_archive_index_size_limits(tmp_path, format):
+    bundle = tmp_path / 'bundle'
+    bundle.mkdir()
+    (bundle / 'small.py').write_bytes(b'x' * 10)
+    (bundle / 'large.py').write_bytes(b'\0' * 1000)
+    archive = shutil.make_archive(str(tmp_path / 'bundle'), format, bundle)
+
+    with ArchiveIndex(archive, max_member_bytes=100) as index:
+        assert index.read_bytes(index.root / 'small.py') == b'x' * 10
+        with pytest.raises(ArchiveLimitError):
+            index.read_bytes(index.root / 'large.py')
+
+    # the tar stream holds the headers and all the members, 25 bytes are enough for
+    # the zip member table only
+    max_total_bytes = 25 if format == 'zip' else 10 * 1024
+    with ArchiveIndex(archive, max_total_bytes=max_total_bytes) as index:
+        for _ in range(max_total_bytes // 10):
+            index.read_bytes(index.root / 'small.py')
+        with pytest.raises(ArchiveLimitError):
+            index.read_bytes(index.root / 'small.py')
+
+
+@pytest.mark.parametrize('format', ['zip', 'tar'])
+def test_archive_index_member_limit(tmp_path, format):
+    bundle = tmp_path / 'bundle'
+    bundle.mkdir()
+    for i in range(5):
+        (bundle / f'module_{i}.py').write_text('pass\n')
+    archive = shutil.make_archive(str(tmp_path / 'bundle'), format, bundle)
+
+    with ArchiveIndex(archive, max_members=10) as index:
+        assert len(list(index.iter_files())) == 5
+    with pytest.raises(ArchiveLimitError):
+        ArchiveIndex(archive, max_members=4)
+
+
+def test_archive_index_tar_bomb(tmp_path, mocker):
+    bundle = tmp_path / 'bundle'
+    bundle.mkdir()
+    for i in range(4):
+        (bundle / f'weights_{i}.bin').write_bytes(b'\0' * 8 * 1024 * 1024)
+    archive = shutil.make_archive(str(tmp_path / 'bundle'), 'gztar', bundle)
+    headers = mocker.spy(tarfile.TarInfo, 'fromtarfile')
+
+    with pytest.raises(ArchiveLimitError):
+        ArchiveIndex(archive, max_total_bytes=1000)
+    # stops on the first member, before its content is decompressed to reach the next
+    assert headers.call_count <= 2
+
+
+def test_archive_index_not_an_archive(tmp_path):
+    (tmp_path / 'bundle.zip').write_text('not an archive')
+
+    with pytest.raises(ValueError):
+        open_bundle(tmp_path / 'bundle.zip')
+
+
+@pytest.mark.parametrize('case', ['executor_1', 'executor_7', 'nested_5'])
+@pytest.mark.parametrize('format', ['zip', 'gztar'])
+def test_normalize_archive(tmp_path, case, format):
+    package_path = tmp_path / case
+    shutil.copytree(
+        cur_dir / 'cases' / case,
+        package_path,
+        ignore=shutil.ignore_patterns('__pycache__'),
+    )
+    archive = Path(shutil.make_archive(str(tmp_path / case), format, tmp_path, case))
+
+    expected = core.normalize(package_path, dry_run=True)
+    executor = core.normalize(archive)
+
+    assert executor.artifacts == expected.artifacts
+    assert executor.dict(exclude={'filepath'}) == expected.dict(exclude={'filepath'})
+    assert Path(executor.filepath).relative_to(archive) == Path(
+        expected.filepath
+    ).relative_to(package_path)
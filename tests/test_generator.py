@@ -0,0 +1,219 @@
+import asyncio
+import io
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server import app as server_app
+from server import tasks
+from server.errors import ErrorCode
+from server.routes import generator as generator_routes
+
+
+@pytest.fixture
+def renders(mocker):
+    calls = []
+
+    def _render(executor, type, protocol):
+        calls.append((executor, type, protocol))
+        return f'{executor} {type} {protocol}'.encode(), 'yaml'
+
+    mocker.patch.object(tasks, 'render_yaml', _render)
+    return calls
+
+
+@pytest.fixture
+def thread_pool(mocker):
+    mocker.patch.object(generator_routes.pool, '_executor_class', ThreadPoolExecutor)
+    mocker.patch.object(generator_routes.pool, '_initializer', None)
+    generator_routes.cache.clear()
+    yield generator_routes.pool
+    generator_routes.pool.shutdown()
+    generator_routes.cache.clear()
+
+
+@pytest.fixture
+def client(thread_pool):
+    return TestClient(server_app.create_app())
+
+
+def _generate(client, executor='Hello/v1', headers=None, **fields):
+    return client.post(
+        '/generator/api/v1/generate',
+        json={'executor': executor, **fields},
+        headers=headers,
+    )
+
+
+def test_generate(client, renders):
+    response = _generate(client, type='docker_compose', protocol='grpc')
+
+    assert response.status_code == 200
+    assert response.content == b'Hello/v1 docker_compose grpc'
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="docker_compose.yaml"'
+    )
+    assert renders == [('Hello/v1', 'docker_compose', 'grpc')]
+
+
+@pytest.fixture
+def blocked(mocker):
+    release = threading.Event()
+    started = threading.Event()
+
+    def _render(executor, type, protocol):
+        started.set()
+        release.wait(5)
+        return executor.encode(), 'yaml'
+
+    mocker.patch.object(tasks, 'render_yaml', _render)
+    yield started, release
+    release.set()
+
+
+def test_generate_busy(client, blocked, mocker):
+    started, release = blocked
+    mocker.patch.object(generator_routes.pool, 'max_workers', 1)
+    mocker.patch.object(generator_routes.pool, 'max_queue', 0)
+
+    first = threading.Thread(target=_generate, args=(client, 'First'))
+    first.start()
+    assert started.wait(5)
+
+    response = _generate(client, 'Second')
+    assert response.status_code == 429
+    assert response.json()['code'] == ErrorCode.Busy.value
+
+    release.set()
+    first.join()
+
+
+def test_generate_timeout(client, blocked, mocker):
+    mocker.patch.object(generator_routes.pool, 'timeout', 0.05)
+
+    response = _generate(client)
+    assert response.status_code == 504
+    assert response.json()['code'] == ErrorCode.Timeout.value
+
+
+def test_generate_etag(client, renders):
+    response = _generate(client)
+    etag = response.headers['etag']
+
+    response = _generate(client, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.content == b''
+
+    response = _generate(client, headers={'If-None-Match': '"other"'})
+    assert response.status_code == 200
+    assert response.headers['etag'] == etag
+    assert len(renders) == 1
+
+
+def test_generate_invalidate(client, renders):
+    _generate(client)
+    _generate(client, 'Hello')
+    _generate(client, 'Other/v1')
+    assert len(renders) == 3
+
+    response = client.post(
+        '/generator/api/v1/invalidate', json={'executor': 'Hello/v1'}
+    )
+    assert response.json() == {'executor': 'Hello/v1', 'invalidated': 2}
+
+    _generate(client)
+    _generate(client, 'Other/v1')
+    assert renders[3:] == [('Hello/v1', 'k8s', 'http')]
+
+
+def test_generate_shared_in_flight(thread_pool, blocked):
+    started, release = blocked
+    payload = generator_routes.PackagePayload(executor='Hello/v1')
+    key = generator_routes.artifact_key(
+        payload.executor, payload.type, payload.protocol
+    )
+
+    async def _run():
+        first = asyncio.ensure_future(generator_routes._generate(payload, key))
+        second = asyncio.ensure_future(generator_routes._generate(payload, key))
+        await asyncio.sleep(0.01)
+        # an invalidation meanwhile prevents the result from being cached
+        generator_routes.cache.invalidate('Hello')
+        release.set()
+        return await asyncio.gather(first, second)
+
+    first, second = asyncio.run(_run())
+    assert first is second
+    assert first.content == b'Hello/v1'
+    assert len(generator_routes.cache) == 0
+    assert not generator_routes._inflight
+
+
+def test_generate_batch(client, mocker):
+    calls = []
+
+    def _render_batch(executors, types, protocol):
+        calls.append((executors, types, protocol))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as archive:
+            for type in types:
+                archive.writestr(type, type)
+        return buffer.getvalue()
+
+    mocker.patch.object(tasks, 'render_batch', _render_batch)
+    response = client.post(
+        '/generator/api/v1/generate/batch',
+        json={
+            'executors': [
+                {'executor': 'Encoder/v1', 'name': 'enc'},
+                {'executor': 'Indexer', 'needs': ['enc', 'gateway']},
+            ],
+            'types': ['k8s', 'jcloud'],
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/zip'
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="deployments.zip"'
+    )
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.namelist() == ['k8s', 'jcloud']
+    assert calls == [
+        (
+            [
+                {'executor': 'Encoder/v1', 'name': 'enc', 'needs': None},
+                {'executor': 'Indexer', 'name': None, 'needs': ['enc', 'gateway']},
+            ],
+            ['k8s', 'jcloud'],
+            'http',
+        )
+    ]
+
+
+@pytest.mark.parametrize(
+    'payload',
+    [
+        {'executors': [{'executor': 'Indexer', 'needs': ['enc']}]},
+        {
+            'executors': [
+                {'executor': 'Indexer', 'name': 'idx', 'needs': ['enc']},
+                {'executor': 'Encoder/v1', 'name': 'enc'},
+            ]
+        },
+        {'executors': [{'executor': 'A', 'name': 'a'}, {'executor': 'B', 'name': 'a'}]},
+        {'executors': [{'executor': 'A'}], 'types': ['helm']},
+        {'executors': []},
+    ],
+)
+def test_generate_batch_invalid(client, mocker, payload):
+    render_batch = mocker.patch.object(tasks, 'render_batch')
+
+    response = client.post('/generator/api/v1/generate/batch', json=payload)
+
+    assert response.status_code == 422
+    render_batch.assert_not_called()
@@ -1,5 +1,10 @@
 from pathlib import Path
-from normalizer import helper
+
+import pytest
+from jinja2 import Environment, FileSystemLoader
+
+from normalizer import __resources_path__, helper
+from normalizer.excepts import DependencyError
 
 cur_dir = Path(__file__).parent
 
@@ -13,5 +18,58 @@ def test_choose_jina_version(mocker):
 
 
 def test_convert_from_path():
-    assert helper.convert_from_to_path('..deps', base_dir=cur_dir / 'cases/nested_3/executors')
-    assert helper.convert_from_to_path('deps', base_dir= cur_dir / 'cases/nested_3')
\ No newline at end of file
+    assert helper.convert_from_to_path(
+        '..deps', base_dir=cur_dir / 'cases/nested_3/executors'
+    )
+    assert helper.convert_from_to_path('deps', base_dir=cur_dir / 'cases/nested_3')
+
+
+def test_topological_sort():
+    source = [
+        ('a', ['b', 'c']),
+        ('b', ['d']),
+        ('c', []),
+        ('d', []),
+        ('e', ['c']),
+    ]
+    assert list(helper.topological_sort(source)) == ['c', 'd', 'e', 'b', 'a']
+
+
+def test_topological_sort_cycles():
+    source = [
+        ('a', ['b']),
+        ('b', ['c']),
+        ('c', ['a']),
+        ('d', ['d']),
+        ('e', ['a', 'f']),
+    ]
+    with pytest.raises(DependencyError) as exc_info:
+        list(helper.topological_sort(source))
+
+    message = str(exc_info.value)
+    assert "missing dependancy 'f' required by ['e']" in message
+    assert "['a', 'b', 'c']" in message
+    assert "['d']" in message
+    assert "'e'" not in message.split(';', 1)[1]
+
+
+def test_render_template(tmp_path, monkeypatch):
+    monkeypatch.setenv('NORMALIZER_TEMPLATE_CACHE_DIR', str(tmp_path / 'jinja2'))
+    helper.get_template_env.cache_clear()
+    try:
+        assert helper.get_template_env() is helper.get_template_env()
+
+        context = {'executor': 'MyExecutor', 'py_modules': ['a.py', 'b/c.py']}
+        expected = (
+            Environment(loader=FileSystemLoader(__resources_path__ / 'templates'))
+            .get_template('config.yml.jinja2')
+            .render(**context)
+        )
+        assert helper.render_template('config.yml.jinja2', **context) == expected
+        assert len(list((tmp_path / 'jinja2').iterdir())) == 1
+
+        # a new process loads the compiled template from the bytecode cache
+        helper.get_template_env.cache_clear()
+        assert helper.render_template('config.yml.jinja2', **context) == expected
+    finally:
+        helper.get_template_env.cache_clear()
@@ -0,0 +1,23 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+DEFERRED_MODULES = ['jina', 'docarray', 'pipreqs', 'pypi_simple']
+
+
+@pytest.mark.parametrize(
+    'module',
+    ['normalizer.core', 'generator.core', 'server.app', 'executor_manager.main'],
+)
+def test_heavy_dependencies_are_imported_on_use(module):
+    code = (
+        f'import sys, json, {module}; '
+        f'print(json.dumps([m for m in {DEFERRED_MODULES!r} if m in sys.modules]))'
+    )
+    output = subprocess.check_output(
+        [sys.executable, '-c', code], cwd=Path(__file__).parent.parent, text=True
+    )
+    assert json.loads(output.splitlines()[-1]) == []
@@ -0,0 +1,52 @@
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from server.middleware import BodySizeLimitMiddleware
+
+
+def _client(max_bytes):
+    app = FastAPI()
+
+    @app.post('/upload')
+    async def upload(file: UploadFile = File(...)):
+        return {'size': len(await file.read())}
+
+    @app.post('/other')
+    async def other(file: UploadFile = File(...)):
+        return {'size': len(await file.read())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=max_bytes, paths=['/upload'])
+    return TestClient(app)
+
+
+def test_body_size_limit_content_length():
+    client = _client(1024)
+
+    response = client.post('/upload', files={'file': ('a.zip', b'x' * 100)})
+    assert response.status_code == 200
+    assert response.json() == {'size': 100}
+
+    response = client.post('/upload', files={'file': ('a.zip', b'x' * 2048)})
+    assert response.status_code == 413
+
+    response = client.post('/other', files={'file': ('a.zip', b'x' * 2048)})
+    assert response.status_code == 200
+
+
+def test_body_size_limit_chunked():
+    client = _client(1024)
+
+    def _chunks():
+        yield (
+            b'--b\r\nContent-Disposition: form-data; name="file"; filename="a.zip"\r\n'
+            b'Content-Type: application/octet-stream\r\n\r\n'
+        )
+        for _ in range(8):
+            yield b'x' * 512
+
+    response = client.post(
+        '/upload',
+        data=_chunks(),
+        headers={'Content-Type': 'multipart/form-data; boundary=b'},
+    )
+    assert response.status_code == 413
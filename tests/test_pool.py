@@ -0,0 +1,152 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server.pool import BoundedPool, PoolSaturatedError
+
+
+def _pool(**kwargs):
+    return BoundedPool(executor_class=ThreadPoolExecutor, **kwargs)
+
+
+def test_pool_on_done_after_timeout():
+    release = threading.Event()
+    done = threading.Event()
+    pool = _pool(max_workers=1, max_queue=0, timeout=0.05)
+
+    async def _run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(release.wait, 5, on_done=done.set)
+        # the call still runs after the timeout
+        assert not done.is_set()
+        release.set()
+        assert await asyncio.get_running_loop().run_in_executor(None, done.wait, 5)
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_on_done_when_saturated():
+    release = threading.Event()
+    pool = _pool(max_workers=1, max_queue=0)
+    done = []
+
+    async def _run():
+        running = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait, 5, on_done=lambda: done.append(True))
+        assert done == [True]
+        release.set()
+        await running
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_saturated():
+    release = threading.Event()
+    pool = _pool(max_workers=1, max_queue=1)
+
+    async def _run():
+        calls = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert pool.pending == 2
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait, 5)
+        release.set()
+        assert await asyncio.gather(*calls) == [True, True]
+        assert pool.pending == 0
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_waiter_handoff():
+    release = threading.Event()
+    pool = _pool(max_workers=1, max_queue=0)
+    order = []
+
+    def _task(name):
+        release.wait(5)
+        order.append(name)
+        return name
+
+    async def _run():
+        first = asyncio.ensure_future(pool.run(_task, 'first'))
+        await asyncio.sleep(0.01)
+        # waits for the slot instead of being rejected
+        second = asyncio.ensure_future(pool.run(_task, 'second', wait=True))
+        await asyncio.sleep(0.01)
+        assert pool.pending == 1
+        assert not second.done()
+
+        release.set()
+        assert await asyncio.gather(first, second) == ['first', 'second']
+        assert order == ['first', 'second']
+        assert pool.pending == 0
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_cancelled_waiter():
+    release = threading.Event()
+    pool = _pool(max_workers=1, max_queue=0)
+
+    async def _run():
+        first = asyncio.ensure_future(pool.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(pool.run(release.wait, 5, wait=True))
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        release.set()
+        await first
+        # the slot is not leaked by the cancelled waiter
+        assert pool.pending == 0
+        assert await pool.run(lambda: 'next') == 'next'
+        assert pool.pending == 0
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
+
+
+def test_pool_slot_released_after_timeout():
+    release = threading.Event()
+    pool = _pool(max_workers=1, max_queue=0, timeout=0.05)
+
+    async def _run():
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.run(release.wait, 5)
+        # the call still holds its slot until it really finishes
+        assert pool.pending == 1
+        with pytest.raises(PoolSaturatedError):
+            await pool.run(release.wait, 5)
+
+        release.set()
+        for _ in range(100):
+            if pool.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool.pending == 0
+        assert await pool.run(lambda: 'next') == 'next'
+
+    try:
+        asyncio.run(_run())
+    finally:
+        pool.shutdown()
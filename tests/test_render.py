@@ -0,0 +1,83 @@
+import pytest
+
+from generator import core
+
+
+@pytest.fixture
+def no_templates(mocker):
+    mocker.patch.object(core, '_templates', {})
+    mocker.patch.object(core, '_template_failures', {})
+
+
+def test_template_failure_retried_later(no_templates, mocker):
+    derive = mocker.patch.object(
+        core, '_derive_template', side_effect=ConnectionError('offline')
+    )
+    now = mocker.patch.object(core.time, 'monotonic', return_value=1000.0)
+
+    assert core._get_template('k8s', 'grpc') is None
+    assert core._get_template('k8s', 'grpc') is None
+    assert derive.call_count == 1
+
+    now.return_value += core.TEMPLATE_RETRY_INTERVAL
+    derive.side_effect = None
+    derive.return_value = core._Template(files={}, needs_image=False)
+
+    assert core._get_template('k8s', 'grpc') == derive.return_value
+    assert derive.call_count == 2
+    assert core._template_failures == {}
+
+
+@pytest.fixture
+def image_names(mocker):
+    from jina.orchestrate.deployments.config import helper
+
+    mocker.patch.object(
+        helper, 'get_image_name', lambda uses: f'jinahub/{uses.rpartition("/")[2]}'
+    )
+
+
+@pytest.mark.parametrize('type', core.TEMPLATE_TYPES)
+def test_export_files_ports_sequential(image_names, type):
+    from jina import Flow, helper
+
+    random_port = helper.random_port
+    files = core._export_files('jinahub+docker://Hello', type, 'grpc')
+    # ports drawn in between do not shift the ones of the next export
+    Flow().add(uses='jinahub+docker://Other')
+
+    assert core._export_files('jinahub+docker://Hello', type, 'grpc') == files
+    assert helper.random_port is random_port
+
+
+@pytest.fixture
+def no_tempdir(mocker, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return mocker.patch.object(
+        core.tempfile,
+        'TemporaryDirectory',
+        side_effect=AssertionError('exported to disk'),
+    )
+
+
+@pytest.mark.parametrize(
+    'type, paths, executor_path',
+    [
+        (
+            'k8s',
+            {'executor0/executor0.yml', 'gateway/gateway.yml'},
+            'executor0/executor0.yml',
+        ),
+        ('docker_compose', {'docker-compose.yml'}, 'docker-compose.yml'),
+    ],
+)
+def test_flow_files_captured(
+    image_names, no_tempdir, tmp_path, type, paths, executor_path
+):
+    from jina import Flow
+
+    files = core._flow_files(Flow().add(uses='jinahub+docker://Hello'), type)
+
+    assert set(files) == paths
+    assert 'jinahub/Hello' in files[executor_path]
+    assert list(tmp_path.iterdir()) == []
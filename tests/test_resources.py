@@ -0,0 +1,29 @@
+import pytest
+
+from normalizer import __resources_path__
+from normalizer.docker import ExecutorDockerfile
+from normalizer.resources import get_resource, preload_resources
+
+
+def test_preload_resources():
+    resources = preload_resources()
+
+    assert set(resources) == {
+        'manifest.yml',
+        'templates/config.yml.jinja2',
+        'templates/dockerfile.base',
+    }
+    assert preload_resources() is resources
+    with pytest.raises(TypeError):
+        resources['manifest.yml'] = ''
+
+
+def test_dockerfile_from_resource():
+    dockerfile_path = __resources_path__ / 'templates' / 'dockerfile.base'
+    content = get_resource('templates/dockerfile.base')
+
+    assert content == dockerfile_path.read_text()
+    assert (
+        ExecutorDockerfile(content=content).dumps()
+        == ExecutorDockerfile(docker_file=dockerfile_path).dumps()
+    )
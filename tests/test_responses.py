@@ -0,0 +1,42 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from normalizer.models import NormalizeResult
+from server import app as server_app
+from server.responses import ModelResponse, dumps
+from server.routes import normalizer as normalizer_routes
+
+cur_dir = Path(__file__).parent
+
+
+def test_dumps():
+    result = NormalizeResult(success=False, code=4000, data=None, message='missing')
+
+    assert json.loads(dumps(result)) == result.dict()
+    assert json.loads(dumps({1: Path('a/b')})) == {'1': 'a/b'}
+    assert ModelResponse(content=result).body == dumps(result)
+
+
+def test_normalize_response(mocker):
+    mocker.patch.object(normalizer_routes.pool, '_executor_class', ThreadPoolExecutor)
+    client = TestClient(server_app.create_app())
+    try:
+        response = client.post(
+            '/normalizer/api/v1/',
+            json={
+                'package_path': str(cur_dir / 'cases' / 'executor_1'),
+                'dry_run': True,
+            },
+        )
+    finally:
+        normalizer_routes.pool.shutdown()
+
+    assert response.status_code == 200
+    assert response.headers['content-type'] == 'application/json'
+    result = NormalizeResult(**response.json())
+    assert result.success
+    assert result.data.executor == 'Executor1'
+    assert '__jina__.Dockerfile' in result.data.artifacts
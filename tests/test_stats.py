@@ -0,0 +1,38 @@
+import shutil
+from pathlib import Path
+
+from normalizer import core
+from normalizer.stats import RunStats
+
+
+def test_run_stats_accumulates():
+    stats = RunStats()
+    for _ in range(2):
+        with stats.stage('parse'):
+            pass
+
+    assert list(stats.timings) == ['parse']
+    assert stats.timings['parse'] >= 0
+
+
+def test_normalize_stage_timings(tmp_path):
+    package_path = tmp_path / 'executor_1'
+    shutil.copytree(
+        Path(__file__).parent / 'cases' / 'executor_1',
+        package_path,
+        ignore=shutil.ignore_patterns(
+            'config.yml', 'Dockerfile', '__jina__.Dockerfile'
+        ),
+    )
+    stats = RunStats()
+    core.normalize(package_path, dry_run=True, stats=stats)
+
+    assert set(stats.timings) == {
+        'version_resolution',
+        'requirements_parsing',
+        'manifest_loading',
+        'py_modules_discovery',
+        'inspect_executors',
+        'order_py_modules',
+        'dockerfile_generation',
+    }
@@ -0,0 +1,69 @@
+import io
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from server import app as server_app
+from server.errors import ErrorCode
+from server.routes import normalizer as normalizer_routes
+
+cur_dir = Path(__file__).parent
+
+
+@pytest.fixture
+def client(mocker):
+    mocker.patch.object(normalizer_routes.pool, '_executor_class', ThreadPoolExecutor)
+    yield TestClient(server_app.create_app())
+    normalizer_routes.pool.shutdown()
+
+
+def _upload(client, name, content, **fields):
+    return client.post(
+        '/normalizer/api/v1/upload',
+        files={'file': (name, content)},
+        data=fields,
+    )
+
+
+def test_upload_round_trip(client, tmp_path, mocker):
+    spool_dir = tmp_path / 'spool'
+    spool_dir.mkdir()
+    mocker.patch.object(normalizer_routes, 'NORMALIZER_UPLOAD_DIR', str(spool_dir))
+    archive = shutil.make_archive(
+        str(tmp_path / 'executor_1'), 'zip', cur_dir / 'cases' / 'executor_1'
+    )
+
+    response = _upload(
+        client, 'my exec;$.zip', Path(archive).read_bytes(), meta='{"jina": "3"}'
+    )
+
+    assert response.status_code == 200
+    assert response.headers['content-disposition'] == (
+        'attachment; filename="my_exec__.normalized.zip"'
+    )
+    with zipfile.ZipFile(io.BytesIO(response.content)) as result:
+        assert '__jina__.Dockerfile' in result.namelist()
+    # the spooled upload is removed
+    assert not list(spool_dir.iterdir())
+
+
+def test_upload_not_an_archive(client):
+    response = _upload(client, 'executor.zip', b'not an archive')
+
+    assert response.status_code == 422
+    assert response.json()['code'] == ErrorCode.IllegalArchive.value
+
+
+def test_upload_too_large(client, mocker):
+    mocker.patch.object(normalizer_routes, 'NORMALIZER_UPLOAD_MAX_BYTES', 10)
+    response = _upload(client, 'executor.zip', b'x' * 100)
+    assert response.status_code == 413
+
+    mocker.patch.object(server_app, 'NORMALIZER_UPLOAD_MAX_BYTES', 10)
+    mocker.patch.object(server_app, 'UPLOAD_FORM_MAX_BYTES', 10)
+    response = _upload(TestClient(server_app.create_app()), 'executor.zip', b'x' * 100)
+    assert response.status_code == 413
@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from normalizer.versions import JinaVersionResolver, get_resolver, set_resolver
+
+
+def _stub_index(path, version):
+    path.write_text(json.dumps({'info': {'version': version}}))
+    return path.as_uri()
+
+
+def test_resolver_cold_start_does_not_block(tmp_path, mocker):
+    resolver = JinaVersionResolver(
+        index_url=_stub_index(tmp_path / 'jina.json', '3.6.9')
+    )
+    fetch = resolver._fetch
+    release = threading.Event()
+
+    def _fetch():
+        release.wait(5)
+        return fetch()
+
+    mocker.patch.object(resolver, '_fetch', _fetch)
+
+    start = time.perf_counter()
+    assert resolver.latest() is None
+    assert time.perf_counter() - start < 1
+
+    release.set()
+    for _ in range(100):
+        if resolver.latest() == '3.6.9':
+            break
+        time.sleep(0.01)
+    assert resolver.latest() == '3.6.9'
+
+
+def test_resolver_cold_start_blocking(tmp_path):
+    resolver = JinaVersionResolver(
+        index_url=_stub_index(tmp_path / 'jina.json', '3.6.9')
+    )
+
+    assert resolver.latest(block=True) == '3.6.9'
+    assert resolver.latest() == '3.6.9'
+
+
+def test_resolver_serves_stale_while_revalidating(tmp_path):
+    index_path = tmp_path / 'jina.json'
+    resolver = JinaVersionResolver(index_url=_stub_index(index_path, '3.6.9'), ttl=0)
+    resolver.refresh()
+
+    _stub_index(index_path, '3.7.0')
+    assert resolver.latest() == '3.6.9'
+
+    for _ in range(100):
+        if resolver.latest() == '3.7.0':
+            break
+        time.sleep(0.01)
+    assert resolver.latest() == '3.7.0'
+
+
+def test_resolver_unreachable_index(tmp_path):
+    resolver = JinaVersionResolver(index_url=(tmp_path / 'missing.json').as_uri())
+
+    assert resolver.latest(block=True) is None
+
+
+def test_resolver_snapshot(tmp_path):
+    snapshot_path = tmp_path / 'snapshot.json'
+    resolver = JinaVersionResolver(
+        index_url=_stub_index(tmp_path / 'jina.json', '3.6.9'),
+        snapshot_path=snapshot_path,
+    )
+    resolver.refresh()
+
+    offline = JinaVersionResolver(
+        index_url=(tmp_path / 'missing.json').as_uri(), snapshot_path=snapshot_path
+    )
+    assert offline.latest() == '3.6.9'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='requires fork')
+def test_resolver_revalidates_in_forked_child(tmp_path):
+    index_path = tmp_path / 'jina.json'
+    resolver = JinaVersionResolver(index_url=_stub_index(index_path, '3.6.9'), ttl=0)
+    resolver.refresh()
+
+    # a refresh started in the parent, whose thread is not inherited by the children
+    with resolver._lock:
+        resolver._refreshing = True
+    _stub_index(index_path, '3.7.0')
+
+    set_resolver(resolver)
+    try:
+        with multiprocessing.get_context('fork').Pool(1) as pool:
+            assert pool.apply(_latest_in_child) == '3.7.0'
+    finally:
+        set_resolver(None)
+
+
+def _latest_in_child():
+    resolver = get_resolver()
+    for _ in range(100):
+        if resolver.latest() == '3.7.0':
+            break
+        time.sleep(0.01)
+    return resolver.latest()
+
+
+def test_worker_warm_up_does_not_block(tmp_path, mocker):
+    from server import tasks
+
+    resolver = JinaVersionResolver(index_url=(tmp_path / 'missing.json').as_uri())
+    latest = mocker.spy(resolver, 'latest')
+    set_resolver(resolver)
+    try:
+        tasks.warm_up_worker()
+    finally:
+        set_resolver(None)
+
+    latest.assert_called_once_with()